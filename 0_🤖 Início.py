@@ -8,6 +8,16 @@
 #   • pipeline RAG + OpenAI Function‑Calling                                  #
 ###############################################################################
 
+# ─────────────────────────────────────────────────────────────────────────────
+# 0.  Perfil da inicialização (CHAT_PRONAF_STARTUP_PROFILE=1 cronometra cada
+#     import; o relatório fica na página ⏱️ Latência) — core/startup.py
+# ─────────────────────────────────────────────────────────────────────────────
+import os
+
+from core.startup import STARTUP_PROFILE, install_import_profiler, mark
+if STARTUP_PROFILE:
+    install_import_profiler()
+
 # ─────────────────────────────────────────────────────────────────────────────
 # 1.  Ajuste de compatibilidade SQLite  (precisa vir ANTES de importar Chroma)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -16,15 +26,22 @@ patch_sqlite()                      # garante sqlite3 ≥ 3.35 em Linux/Cloud
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 2.  Imports padrão
+#     Nada pesado entra aqui: openai, pandas, langchain/torch e Chroma são
+#     adiados (core/lazy.py e imports dentro das fábricas de recursos) e só
+#     carregam na 1ª pergunta que precisa deles.
 # ─────────────────────────────────────────────────────────────────────────────
 import streamlit as st
-import openai, json                 # OpenAI SDK + utilitário p/ argumentos
 
 # Recursos do projeto (módulos que você criou)
-from core.rag_engine     import get_vector_db, N_DOCS
-from core.rag_utils      import format_docs
-from core.prompt_template import SYSTEM_MSG, build_prompt
-from core.tools          import TOOLS_SPEC, consulta_pronaf_por_estado
+from core.rag_engine     import get_semantic_cache, N_DOCS
+from core.resources      import resource_stats
+from core.tool_cache     import get_tool_cache
+from core.llm_gateway    import get_llm_gateway
+from core.chat_pipeline  import ChatPipeline
+from core.api_client     import API_URL, RemotePipeline
+from core.hot_swap       import start_watcher
+from core.tools          import prewarm_tools
+mark("imports")
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 3.  Configuração da página Streamlit  (DEVE ser o 1º comando Streamlit)
@@ -65,8 +82,59 @@ with st.sidebar:
         help="0 = resposta mais objetiva, 1 = mais criativa."
     )
 
+    # 3) Streaming: tokens aparecem à medida que são gerados
+    streaming = st.toggle(
+        "⚡ Resposta em streaming",
+        value=True,
+        help="Mostra a resposta enquanto ela é gerada (menor tempo até o 1º token).",
+    )
+
     st.markdown("---")
 
+    # --- Recursos compartilhados (modelo + Chroma) ---------------------------
+    with st.expander("⚙️ Recursos carregados"):
+        for r in resource_stats():
+            if r["loaded"]:
+                st.caption(
+                    f"**{r['name']}** · {r['load_seconds']:.1f}s · "
+                    f"{r['rss_delta_mb']:.0f} MB · cargas: {r['loads']} · "
+                    f"reusos: {r['hits']}"
+                )
+            else:
+                st.caption(f"**{r['name']}** · ainda não carregado")
+            if r["name"] == "semantic_cache" and r["loaded"]:
+                c = get_semantic_cache().stats()
+                st.caption(
+                    f"↳ acertos {c['hits']}/{c['hits'] + c['misses']} "
+                    f"({c['hit_rate']:.0%}) · {c['entries']} respostas · "
+                    f"invalidações {c['invalidations']}"
+                )
+            if r["name"] == "tool_cache" and r["loaded"]:
+                c = get_tool_cache().stats()
+                st.caption(
+                    f"↳ acertos {c['hits'] + c['disk_hits']}/"
+                    f"{c['hits'] + c['disk_hits'] + c['misses']} ({c['hit_rate']:.0%}, "
+                    f"{c['disk_hits']} do disco) · {c['entries']} resultados"
+                )
+            if r["name"] == "llm_gateway" and r["loaded"]:
+                c = get_llm_gateway().stats()
+                st.caption(
+                    f"↳ em voo {c['in_flight']}/{c['concurrency']} · fila {c['queue_depth']} "
+                    f"(máx {c['max_queue_depth']}) · espera p95 {c['wait_p95_ms']:.0f} ms · "
+                    f"retries {c['retries']} · 429 {c['rate_limited']} · "
+                    f"{c['tokens_last_min']} tokens/min"
+                )
+
+    # --- Memória da conversa (tokens por requisição) ------------------------
+    if "chat" in st.session_state and st.session_state.chat.memoria.prompt_tokens:
+        with st.expander("🧠 Memória da conversa"):
+            g = st.session_state.chat.memoria.growth()
+            st.caption(
+                f"Tokens do prompt — último: {g['last']} · média: {g['mean']:.0f} · "
+                f"crescimento: {g['slope']:+.0f}/turno"
+            )
+            st.line_chart(st.session_state.chat.memoria.prompt_tokens, height=120)
+
     # --- Créditos / links ---------------------------------------------------
 with st.sidebar:
     # … sliders / outras seções …
@@ -107,14 +175,34 @@ with st.sidebar:
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 4.  Chave da OpenAI (lida de .streamlit/secrets.toml)
+#     Com CHAT_PRONAF_API_URL a página é só cliente do serviço (core/api.py),
+#     que usa a própria OPENAI_API_KEY.
 # ─────────────────────────────────────────────────────────────────────────────
-openai.api_key = st.secrets["openai_api_key"]
+if not API_URL:
+    # via ambiente: o SDK (adiado) lê a chave ao criar o cliente, no 1º turno
+    os.environ["OPENAI_API_KEY"] = st.secrets["openai_api_key"]
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 5.  Carrega (ou reconecta) ao banco vetorial do RAG
-#     A função interna já tem @st.cache_resource, então só é carregado 1x
+# 5.  Banco vetorial do RAG
+#     `get_retriever()` consulta o registro de recursos do processo
+#     (core/resources.py): modelo de embeddings, cliente Chroma e índice BM25
+#     são criados uma única vez e compartilhados por todas as sessões. A
+#     carga é lazy — só acontece na 1ª pergunta — a menos que
+#     CHAT_PRONAF_WARM_AT_BOOT=1.
+#     Com CHAT_PRONAF_API_URL, tudo isso roda no serviço HTTP e a página
+#     apenas envia a pergunta + estado da sessão e desenha a resposta.
+#     Com CHAT_PRONAF_DATA_POLL_S > 0, uma thread do processo troca para a
+#     versão de dados publicada em data/versions/CURRENT sem reinício
+#     (core/hot_swap.py).
 # ─────────────────────────────────────────────────────────────────────────────
-vector_db = get_vector_db()
+@st.cache_resource
+def _remoto(url: str) -> RemotePipeline:
+    return RemotePipeline(url)          # 1 pool de conexões HTTP por processo
+
+pipeline = _remoto(API_URL) if API_URL else ChatPipeline()
+if not API_URL:
+    prewarm_tools()                     # idempotente; resumos das 27 UFs em background
+start_watcher()                         # idempotente; 0 s (padrão) desliga
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 6.  Cabeçalho e instruções de uso
@@ -135,73 +223,53 @@ st.markdown("---")
 # ─────────────────────────────────────────────────────────────────────────────
 # 7.  Estado da conversa
 # ─────────────────────────────────────────────────────────────────────────────
-if "msgs" not in st.session_state:
-    # A primeira mensagem define o “papel” do assistente
-    st.session_state.msgs = [{"role": "system", "content": SYSTEM_MSG}]
+if "chat" not in st.session_state:
+    # log completo (a 1ª mensagem define o “papel” do assistente), memória
+    # limitada enviada à LLM (core/history.py) e TTFT por pergunta
+    st.session_state.chat = pipeline.new_session()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 8.  Renderiza o histórico do chat (usuário e assistente)
+#     Vem antes do pipeline para que a nova resposta seja desenhada (e
+#     transmitida em streaming) logo abaixo das anteriores.
+# ─────────────────────────────────────────────────────────────────────────────
+for m in st.session_state.chat.msgs:
+    if m["role"] in ("user", "assistant") and m.get("content"):
+        with st.chat_message(m["role"]):
+            st.markdown(m["content"])
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 8.  Caixa de entrada do chat
+# 9.  Caixa de entrada do chat
 # ─────────────────────────────────────────────────────────────────────────────
 pergunta = st.chat_input("Digite sua pergunta…")
+mark("primeiro render")             # página inteira desenhada (1ª execução)
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 9.  Pipeline de processamento quando o usuário envia algo
+# 10.  Pipeline de processamento quando o usuário envia algo
+#      Todo o fluxo (cache semântico → RAG → prompt → roteador → LLM + tools)
+#      está em core/chat_pipeline.py; aqui só se desenha o resultado.
 # ─────────────────────────────────────────────────────────────────────────────
 if pergunta:
-    # 9.1  adiciona a pergunta ao histórico
-    st.session_state.msgs.append({"role": "user", "content": pergunta})
-
-    # 9.2  Recupera contexto via RAG (k documentos) e formata
-    contexto = (
-        vector_db.as_retriever(k=N_DOCS) | format_docs
-    ).invoke(pergunta)
-
-    # 9.3  Constrói o prompt combinando pergunta + contexto
-    prompt = build_prompt(contexto, pergunta)
-    #st.session_state.msgs.append({"role": "user", "content": prompt})
-
-    # 9.4  Primeira chamada à LLM para ver se ela solicita uma função
-    resp = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=st.session_state.msgs,
-        tools=TOOLS_SPEC,           # descreve a função disponível
-    )
-
-    msg = resp.choices[0].message
-
-    # 9.5  Se a LLM pedir uma function‑call…
-    if msg.tool_calls:
-        st.session_state.msgs.append(msg.model_dump())   # log da chamada
-
-        # executa cada chamada solicitada (pode haver mais de uma)
-        for call in msg.tool_calls:
-            args = json.loads(call.function.arguments)
-            resultado = consulta_pronaf_por_estado(**args)
-
-            st.session_state.msgs.append({
-                "role": "tool",
-                "tool_call_id": call.id,
-                "content": resultado,
-            })
+    with st.chat_message("user"):
+        st.markdown(pergunta)
 
-        # 9.6  Segunda chamada: agora a LLM responde com base no resultado
-        final = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=st.session_state.msgs,
+    with st.chat_message("assistant"):
+        r = pipeline.run_turn(
+            st.session_state.chat,
+            pergunta,
+            k=k_docs,
+            streaming=streaming,
+            write_stream=st.write_stream,     # texto desenhado token a token
         )
-        st.session_state.msgs.append(
-            {"role": "assistant", "content": final.choices[0].message.content}
-        )
-    else:
-        # A LLM respondeu direto, sem precisar da função
-        st.session_state.msgs.append(
-            {"role": "assistant", "content": msg.content}
-        )
-
-# ─────────────────────────────────────────────────────────────────────────────
-# 10.  Renderiza o histórico do chat (usuário e assistente)
-# ─────────────────────────────────────────────────────────────────────────────
-for m in st.session_state.msgs:
-    if m["role"] in ("user", "assistant"):
-        with st.chat_message(m["role"]):
-            st.markdown(m["content"])
\ No newline at end of file
+        if r.cache_hit:
+            st.markdown(r.answer)
+            st.caption(
+                f"♻️ Resposta do cache semântico "
+                f"(similaridade {r.similarity:.2f}) · {r.ttft:.2f}s"
+            )
+        else:
+            if not streaming:
+                st.markdown(r.answer)
+            if r.ttft is not None:
+                via = f" · 🧭 roteado para {r.route.tool}" if r.route is not None else ""
+                st.caption(f"⏱️ 1º token em {r.ttft:.2f}s{via}")
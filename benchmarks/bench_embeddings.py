@@ -0,0 +1,127 @@
+"""
+Benchmark: backend de embeddings ``torch`` (FP32) × ``onnx`` (int8).
+
+Sobre a coleção do Chroma já existente (vetores gerados pelo modelo FP32):
+
+- **carga**: tempo para instanciar cada backend (inclui imports);
+- **latência** de ``embed_query`` isolada (p50/p95);
+- **throughput** de ``embed_documents`` em lotes de chunks reais;
+- **concorrência**: N threads codificando perguntas ao mesmo tempo, com e
+  sem micro-batching (:class:`core.embeddings.BatchedEmbeddings`);
+- **recall@k**: top-k da busca exata com o vetor da pergunta de cada
+  backend, comparado ao top-k com o vetor FP32 (referência = 1,0), e o
+  cosseno médio entre os dois vetores da mesma pergunta.
+
+Perguntas: as de ``benchmarks/router_questions.jsonl`` + trechos de chunks.
+
+Uso (na raiz do projeto)::
+
+    python -m benchmarks.bench_embeddings [--onnx-dir data/models/all-mpnet-base-v2-int8]
+        [--queries 200] [--threads 8] [--k 1 3 5 10]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from core.embeddings import ONNX_DIR, BatchedEmbeddings, load_embeddings
+from core.rag_engine import EMBED_MODEL, PERSIST_DIR
+from benchmarks.bench_router import QUESTIONS
+
+
+def _colecao(persist_dir: str) -> tuple[np.ndarray, list[str]]:
+    import chromadb
+
+    col = chromadb.PersistentClient(path=persist_dir).get_collection("langchain")
+    dados = col.get(include=["embeddings", "documents"])
+    emb = np.asarray(dados["embeddings"], dtype=np.float32)
+    emb /= np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+    return emb, list(dados["documents"])
+
+
+def _perguntas(docs: list[str], n: int, seed: int = 0) -> list[str]:
+    with open(QUESTIONS, encoding="utf-8") as fh:
+        qs = [json.loads(linha)["pergunta"] for linha in fh if linha.strip()]
+    rng = random.Random(seed)
+    for doc in rng.sample(docs, min(len(docs), max(0, n - len(qs)))):
+        qs.append(doc.split(". ")[0][:200])          # 1ª frase do chunk
+    return qs[:n]
+
+
+def _topk(emb: np.ndarray, q: np.ndarray, k: int) -> np.ndarray:
+    return np.argpartition(-(q @ emb.T), k - 1, axis=1)[:, :k]
+
+
+def _concorrente(fn, perguntas: list[str], threads: int) -> float:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(fn, perguntas))
+    return len(perguntas) / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--persist-dir", default=PERSIST_DIR)
+    ap.add_argument("--onnx-dir", default=ONNX_DIR)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--docs", type=int, default=256, help="chunks no teste de throughput")
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    args = ap.parse_args()
+
+    emb, docs = _colecao(args.persist_dir)
+    perguntas = _perguntas(docs, args.queries)
+    amostra_docs = random.Random(1).sample(docs, min(args.docs, len(docs)))
+    print(f"coleção: {len(docs)} chunks · perguntas: {len(perguntas)} · threads: {args.threads}\n")
+
+    vetores: dict[str, np.ndarray] = {}
+    for backend in ("torch", "onnx"):
+        t0 = time.perf_counter()
+        try:
+            modelo = load_embeddings(EMBED_MODEL, backend, onnx_dir=args.onnx_dir, microbatch=False)
+        except (OSError, ImportError) as exc:
+            print(f"[{backend}] indisponível ({exc}); rode `python -m scripts.export_onnx`.\n")
+            continue
+        t_carga = time.perf_counter() - t0
+        modelo.embed_query("aquecimento")
+
+        lat = []
+        vs = []
+        for q in perguntas:
+            t = time.perf_counter()
+            vs.append(modelo.embed_query(q))
+            lat.append((time.perf_counter() - t) * 1000)
+        vetores[backend] = np.asarray(vs, dtype=np.float32)
+
+        t = time.perf_counter()
+        modelo.embed_documents(amostra_docs)
+        docs_s = len(amostra_docs) / (time.perf_counter() - t)
+
+        qps_direto = _concorrente(modelo.embed_query, perguntas, args.threads)
+        lotes = BatchedEmbeddings(modelo)
+        qps_lote = _concorrente(lotes.embed_query, perguntas, args.threads)
+        lat.sort()
+        print(f"[{backend}] carga {t_carga:.1f}s · embed_query p50 {statistics.median(lat):.1f} ms "
+              f"p95 {lat[int(0.95 * (len(lat) - 1))]:.1f} ms · embed_documents {docs_s:.0f} chunks/s")
+        print(f"[{backend}] {args.threads} threads: {qps_direto:.0f} perguntas/s direto · "
+              f"{qps_lote:.0f} perguntas/s com micro-batching "
+              f"(lote médio {lotes.batcher.stats()['mean_batch']:.1f})\n")
+
+    if "torch" in vetores and "onnx" in vetores:
+        ref, alt = vetores["torch"], vetores["onnx"]
+        cos = float(np.mean(np.sum(ref * alt, axis=1)
+                            / (np.linalg.norm(ref, axis=1) * np.linalg.norm(alt, axis=1))))
+        print(f"cosseno médio torch × onnx (mesma pergunta): {cos:.4f}")
+        for k in (k for k in args.k if k <= len(docs)):
+            a, b = _topk(emb, ref, k), _topk(emb, alt, k)
+            recall = np.mean([len(set(x) & set(y)) / k for x, y in zip(a, b)])
+            print(f"recall@{k} do onnx em relação ao torch: {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
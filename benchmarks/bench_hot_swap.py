@@ -0,0 +1,210 @@
+"""
+Troca a quente da versão dos dados sob carga: duração, memória e latência.
+
+Num diretório temporário (``CHAT_PRONAF_DATA_DIR``) publica duas versões com
+``scripts.publish_data_version``: ``v1`` (o Parquet dado) e ``v2`` (o mesmo
+com ``VL_PARC_CREDITO`` × 1,01 — outro hash, sem cubo pronto). Um processo
+filho serve ``v1`` — índice de filtros, cubo e cache das tools carregados,
+mais retriever/Chroma com ``--rag`` — com ``--threads`` threads consultando
+o Painel e a tool por UF sem parar; então aponta ``CURRENT`` para ``v2`` e
+deixa o *watcher* de ``core/hot_swap.py`` trocar.
+
+Relata o :class:`core.hot_swap.SwapReport` (preparo, janela da troca,
+RSS com as duas versões vivas e depois), a latência das consultas antes /
+durante o preparo / depois, os erros e se o total de crédito passou a ser
+o de ``v2``. Sai com código 1 se houver erro ou a troca não acontecer.
+
+Uso (na raiz do projeto)::
+
+    python -m benchmarks.bench_hot_swap [--parquet data/pronaf.parquet]
+        [--persist-dir data/data-rag/persist_directory] [--threads 4] [--rag] [--keep]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from core.data_loader import PRONAF_PATH
+from core.rag_engine import PERSIST_DIR
+
+FATOR_V2 = 1.01
+
+
+# -------- Subprocesso --------
+def _resumo(ms: list[float]) -> dict:
+    if not ms:
+        return {"n": 0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    ms = sorted(ms)
+    return {"n": len(ms), "p50": statistics.median(ms),
+            "p99": ms[round(0.99 * (len(ms) - 1))], "max": ms[-1]}
+
+
+def _filho(args: argparse.Namespace) -> dict:
+    from core import painel
+    from core.data_versions import active_version, write_current
+    from core.hot_swap import start_watcher, swap_history
+    from core.resources import current_rss_mb
+    from core.tools import consulta_pronaf_por_estado
+
+    # serve v1 como um processo que já atendeu o Painel e o chat
+    ufs, anos, sexos = painel.options()
+    consulta_pronaf_por_estado(ufs[0])
+    if args.rag:
+        from core.rag_engine import get_retriever
+        get_retriever()
+    antes = active_version().name
+    credito_v1 = painel.summary(None, anos[0], anos[-1], sexos).credito
+    rss_servindo = current_rss_mb()
+
+    amostras: list[tuple[float, float]] = []
+    erros: list[str] = []
+    parar = threading.Event()
+
+    def carga(seed: int) -> None:
+        rng = random.Random(seed)
+        while not parar.is_set():
+            uf = rng.choice(ufs)
+            a0, a1 = sorted(rng.sample(anos, 2)) if len(anos) > 1 else (anos[0], anos[0])
+            t0 = time.perf_counter()
+            try:
+                painel.summary(uf, a0, a1, sexos)
+                painel.detail_page(uf, a0, a1, sexos, limit=100,
+                                   sort_by=rng.choice([None, "VL_PARC_CREDITO"]))
+                consulta_pronaf_por_estado(uf)
+            except Exception as exc:
+                erros.append(f"{type(exc).__name__}: {exc}")
+            amostras.append((t0, (time.perf_counter() - t0) * 1000))
+
+    threads = [threading.Thread(target=carga, args=(i,), daemon=True) for i in range(args.threads)]
+    for th in threads:
+        th.start()
+    time.sleep(args.warm_s)
+
+    t_pub = time.perf_counter()
+    write_current("v2")
+    start_watcher(args.poll_s)
+    # o relatório entra no histórico no início da troca; espera o fim
+    while (not swap_history() or not (swap_history()[-1]["ok"] or swap_history()[-1]["error"])) \
+            and time.perf_counter() - t_pub < args.timeout_s:
+        time.sleep(0.01)
+    t_fim = time.perf_counter()
+    time.sleep(args.warm_s)
+    parar.set()
+    for th in threads:
+        th.join()
+
+    return {
+        "de": antes,
+        "para": active_version().name,
+        "swap": swap_history()[-1] if swap_history() else None,
+        "rss_servindo_mb": rss_servindo,
+        "credito_v1": credito_v1,
+        "credito_v2": painel.summary(None, anos[0], anos[-1], sexos).credito,
+        "antes": _resumo([ms for t, ms in amostras if t < t_pub]),
+        "durante": _resumo([ms for t, ms in amostras if t_pub <= t < t_fim]),
+        "depois": _resumo([ms for t, ms in amostras if t >= t_fim]),
+        "erros": erros[:10],
+        "n_erros": len(erros),
+    }
+
+
+# -------- Preparação --------
+def _parquet_v2(src: str, dst: str) -> None:
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(src)
+    tabela = pf.read()
+    i = tabela.schema.get_field_index("VL_PARC_CREDITO")
+    col = pc.multiply(tabela.column(i).cast("float64"), FATOR_V2).cast(tabela.schema.field(i).type)
+    pq.write_table(tabela.set_column(i, "VL_PARC_CREDITO", col), dst,
+                   row_group_size=pf.metadata.row_group(0).num_rows)
+
+
+def _publicar(nome: str, parquet: str, args: argparse.Namespace, env: dict, *extra: str) -> None:
+    cmd = [sys.executable, "-m", "scripts.publish_data_version", nome, "--parquet", parquet,
+           "--persist-dir", args.persist_dir, "--link", "--source", "bench_hot_swap", *extra]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise SystemExit(f"publicação de {nome} falhou:\n{proc.stderr.strip()[-1500:]}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--parquet", default=PRONAF_PATH)
+    ap.add_argument("--persist-dir", default=PERSIST_DIR)
+    ap.add_argument("--threads", type=int, default=4, help="threads de consulta durante a troca")
+    ap.add_argument("--warm-s", type=float, default=2.0, help="carga antes e depois da troca")
+    ap.add_argument("--poll-s", type=float, default=0.2, help="intervalo do watcher")
+    ap.add_argument("--timeout-s", type=float, default=600.0)
+    ap.add_argument("--rag", action="store_true", help="carrega e troca também Chroma + retriever")
+    ap.add_argument("--keep", action="store_true", help="mantém o diretório temporário")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(_filho(args)))
+        return
+
+    tmp = tempfile.mkdtemp(prefix="chat-pronaf-swap-")
+    env = dict(os.environ, CHAT_PRONAF_DATA_DIR=tmp, CHAT_PRONAF_TOOL_CACHE_PATH="",
+               CHAT_PRONAF_PREWARM_TOOLS="0", CHAT_PRONAF_DATA_POLL_S="0")
+    try:
+        v2 = os.path.join(tmp, "pronaf_v2.parquet")
+        _parquet_v2(args.parquet, v2)
+        _publicar("v1", args.parquet, args, env, "--activate")
+        _publicar("v2", v2, args, env)
+
+        cmd = [sys.executable, "-m", "benchmarks.bench_hot_swap", "--child",
+               "--threads", str(args.threads), "--warm-s", str(args.warm_s),
+               "--poll-s", str(args.poll_s), "--timeout-s", str(args.timeout_s)]
+        proc = subprocess.run(cmd + (["--rag"] if args.rag else []), capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            raise SystemExit(f"rodada falhou:\n{proc.stderr.strip()[-1500:]}")
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        if args.keep:
+            print(f"diretório mantido: {tmp}")
+        else:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    s = r["swap"] or {}
+    print(f"versão {r['de']} → {r['para']} · preparo {s.get('prepare_s', 0):.2f}s "
+          f"({', '.join(s.get('prepared', [])) or '-'}) · troca {s.get('swap_ms', 0):.3f} ms · "
+          f"invalidação {s.get('invalidate_ms', 0):.1f} ms")
+    print(f"RSS servindo v1 {r['rss_servindo_mb']:.0f} MB · no início da troca {s.get('rss_before_mb', 0):.0f} MB · "
+          f"com as duas versões +{s.get('overlap_mb', 0):.0f} MB · "
+          f"depois da troca −{s.get('released_mb', 0):.0f} MB ({s.get('rss_after_mb', 0):.0f} MB)\n")
+
+    print(f"{'consultas (ms)':<22}{'n':>7}{'p50':>9}{'p99':>9}{'máx':>9}")
+    for fase, nome in (("antes", "antes"), ("durante", "durante o preparo"), ("depois", "depois")):
+        f = r[fase]
+        print(f"{nome:<22}{f['n']:>7}{f['p50']:>9.1f}{f['p99']:>9.1f}{f['max']:>9.1f}")
+
+    razao = r["credito_v2"] / r["credito_v1"] if r["credito_v1"] else float("nan")
+    print(f"\nerros: {r['n_erros']} · crédito total v1 {r['credito_v1']:,.2f} → {r['credito_v2']:,.2f} "
+          f"(×{razao:.4f}, esperado ×{FATOR_V2})")
+
+    falhas = []
+    if not s.get("ok"):
+        falhas.append(f"troca não concluída: {s.get('error') or 'sem relatório'}")
+    if r["n_erros"]:
+        falhas.append(f"{r['n_erros']} consultas falharam: {r['erros'][:3]}")
+    if abs(razao - FATOR_V2) > 1e-3:
+        falhas.append("o Painel não passou a servir os dados de v2")
+    if falhas:
+        print("\nFALHOU:\n  " + "\n  ".join(falhas))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: loader padrão × layout compacto do PRONAF.
+
+Mede, para cada modo, o tempo de leitura, a memória do DataFrame
+(``memory_usage(deep=True)``) e a latência de uma consulta típica
+(filtro por UF + ``groupby`` ANO × SEXO com soma, contagem e ``nunique``).
+
+Uso (na raiz do projeto)::
+
+    python -m benchmarks.bench_loader [--path data/pronaf.parquet] [--repeat 5]
+"""
+
+import argparse
+import statistics
+import time
+
+import pandas as pd
+
+from core.data_loader import PRONAF_PATH, read_pronaf, read_pronaf_compact
+
+COLUNAS = ["CD_ESTADO", "ANO", "SEXO_BIOLOGICO", "CD_CPF_CNPJ", "VL_PARC_CREDITO"]
+
+
+def _consulta(df: pd.DataFrame, uf: str) -> pd.DataFrame:
+    return (
+        df[df["CD_ESTADO"] == uf]
+        .groupby(["ANO", "SEXO_BIOLOGICO"], observed=True)
+        .agg(
+            Soma_VL_PARC_CREDITO=("VL_PARC_CREDITO", "sum"),
+            Quantidade_Operacoes=("CD_CPF_CNPJ", "count"),
+            Quantidade_Beneficiarios=("CD_CPF_CNPJ", "nunique"),
+        )
+    )
+
+
+def _mediana_ms(fn, repeat: int) -> float:
+    tempos = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tempos)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--path", default=PRONAF_PATH)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--uf", default="RS")
+    args = ap.parse_args()
+
+    modos = {
+        "padrão (todas as colunas)": lambda: read_pronaf(args.path),
+        "compacto (5 colunas)": lambda: read_pronaf_compact(args.path, COLUNAS),
+    }
+
+    print(f"{'modo':<28}{'leitura ms':>12}{'memória MB':>12}{'consulta ms':>13}")
+    for nome, ler in modos.items():
+        leitura = _mediana_ms(ler, args.repeat)
+        df = ler()
+        memoria = df.memory_usage(deep=True).sum() / 2**20
+        consulta = _mediana_ms(lambda: _consulta(df, args.uf), args.repeat)
+        print(f"{nome:<28}{leitura:>12.1f}{memoria:>12.1f}{consulta:>13.1f}")
+
+    print("\ndtypes (compacto):")
+    print(read_pronaf_compact(args.path, COLUNAS).dtypes.to_string())
+
+
+if __name__ == "__main__":
+    main()
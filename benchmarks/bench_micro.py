@@ -0,0 +1,94 @@
+"""
+Micro-benchmarks das peças do turno do chat.
+
+- ``consulta_pronaf_por_estado``: execução direta (``.uncached``, cubo ou
+  DuckDB) × via cache de tools, para as 27 UFs;
+- ``format_docs`` e ``pack_context``: sobre documentos reais do Chroma,
+  para vários ``k``;
+- recuperação no Chroma: ``similarity_search`` (codifica a pergunta),
+  ``similarity_search_by_vector`` (vetor pronto, só a busca) e o retriever
+  híbrido completo (BM25 + vetor).
+
+Cada linha mostra p50/p95/máx em ms sobre ``--repeat`` execuções.
+
+Uso (na raiz do projeto)::
+
+    python -m benchmarks.bench_micro [--repeat 50] [--k 3 10] [--skip-rag]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+
+from benchmarks.bench_router import QUESTIONS, _percentil
+from core.query_engine import UFS
+from core.rag_engine import CONTEXT_TOKENS, get_embeddings, get_retriever, get_vector_db
+from core.rag_utils import format_docs, pack_context
+from core.tools import consulta_pronaf_por_estado
+
+
+def _mede(nome: str, fn: Callable[[int], object], repeat: int) -> None:
+    tempos = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(i)
+        tempos.append((time.perf_counter() - t0) * 1000)
+    print(f"{nome:<44}{statistics.median(tempos):>10.3f}"
+          f"{_percentil(tempos, 0.95):>10.3f}{max(tempos):>10.3f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--k", type=int, nargs="+", default=[3, 10])
+    ap.add_argument("--skip-rag", action="store_true", help="só as tools (sem Chroma)")
+    args = ap.parse_args()
+
+    with open(QUESTIONS, encoding="utf-8") as fh:
+        perguntas = [json.loads(linha)["pergunta"] for linha in fh if linha.strip()]
+    ufs = sorted(UFS)
+
+    print(f"{'ms':<44}{'p50':>10}{'p95':>10}{'máx':>10}")
+
+    # -------- Tools --------
+    consulta_pronaf_por_estado.uncached(ufs[0])                # carga do cubo/DuckDB
+    _mede("consulta_pronaf_por_estado (direto)",
+          lambda i: consulta_pronaf_por_estado.uncached(ufs[i % len(ufs)]), args.repeat)
+    for uf in ufs:
+        consulta_pronaf_por_estado(uf)                         # preenche o cache
+    _mede("consulta_pronaf_por_estado (cache)",
+          lambda i: consulta_pronaf_por_estado(ufs[i % len(ufs)]), args.repeat)
+
+    if args.skip_rag:
+        return
+
+    # -------- RAG --------
+    t0 = time.perf_counter()
+    vector_db, retriever, emb = get_vector_db(), get_retriever(), get_embeddings()
+    print(f"(carga do modelo + Chroma + BM25: {time.perf_counter() - t0:.1f}s)")
+    vetores = [emb.embed_query(q) for q in perguntas]
+
+    def pq(i: int) -> str:
+        return perguntas[i % len(perguntas)]
+
+    for k in args.k:
+        _mede(f"Chroma similarity_search k={k}",
+              lambda i: vector_db.similarity_search(pq(i), k=k), args.repeat)
+        _mede(f"Chroma similarity_search_by_vector k={k}",
+              lambda i: vector_db.similarity_search_by_vector(vetores[i % len(vetores)], k=k),
+              args.repeat)
+        _mede(f"retriever híbrido k={k}",
+              lambda i: retriever.invoke(pq(i), k=k, query_vector=vetores[i % len(vetores)]),
+              args.repeat)
+
+        lotes = [retriever.invoke(q, k=k, query_vector=v) for q, v in zip(perguntas, vetores)]
+        _mede(f"format_docs k={k}", lambda i: format_docs(lotes[i % len(lotes)]), args.repeat)
+        _mede(f"pack_context k={k}",
+              lambda i: pack_context(lotes[i % len(lotes)], budget_tokens=CONTEXT_TOKENS),
+              args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Teste de carga offline do pipeline do chat (``core.chat_pipeline``).
+
+N sessões concorrentes (threads, como as sessões do Streamlit num mesmo
+processo) fazem turnos completos — cache semântico, RAG híbrido, prompt,
+histórico, roteador, tools e LLM — contra :class:`benchmarks.mock_openai.MockOpenAI`,
+sem custo nem dependência da API. Relata:
+
+- **throughput** (turnos/s) e duração total;
+- **latência** por turno e **TTFT** (p50/p95/p99);
+- **memória**: variação de RSS do processo por sessão e tamanho do estado
+  de cada sessão (log + memória da conversa);
+- quantas respostas foram roteadas, vieram de tool calls do modelo ou do
+  cache semântico;
+- com ``--gateway``, o modelo falso passa por :class:`core.llm_gateway.LLMGateway`
+  (fila limitada, retry, TPM): profundidade da fila, espera e tentativas.
+  ``--rate-limit`` faz uma fração das chamadas voltar com 429.
+
+Perguntas: as de ``benchmarks/router_questions.jsonl``, em rodízio. O 1º
+turno (carga do modelo de embeddings, Chroma, BM25) fica fora da medição.
+
+Uso (na raiz do projeto)::
+
+    python -m benchmarks.bench_pipeline [--sessions 16] [--turns 5]
+        [--ttft-ms 400] [--tokens-per-s 80] [--answer-tokens 120]
+        [--no-streaming] [--no-router] [--semantic-cache] [--no-rag]
+        [--gateway] [--concurrency 8] [--tpm 0] [--rate-limit 0.1]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from benchmarks.bench_router import QUESTIONS, _percentil
+from benchmarks.mock_openai import MockOpenAI
+from core.chat_pipeline import ChatPipeline, ChatSession, TurnResult
+from core.llm_gateway import LLM_CONCURRENCY, LLMGateway
+from core.resources import current_rss_mb
+
+
+class _SemRAG:
+    """Retriever vazio (``--no-rag``): isola LLM + tools do custo do RAG."""
+
+    def invoke(self, query: str, k: int = 3, *, query_vector: Any = None) -> list:
+        return []
+
+
+def _tamanho(obj: Any, vistos: set[int] | None = None) -> int:
+    """Bytes aproximados de ``obj`` e de tudo que ele referencia."""
+    vistos = set() if vistos is None else vistos
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    total = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        total += sum(_tamanho(k, vistos) + _tamanho(v, vistos) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        total += sum(_tamanho(x, vistos) for x in obj)
+    elif hasattr(obj, "__dict__") and not callable(obj):
+        total += _tamanho(vars(obj), vistos)
+    return total
+
+
+def _sessao(pipeline: ChatPipeline, perguntas: list[str], inicio: int, turnos: int,
+            streaming: bool) -> tuple[ChatSession, list[TurnResult]]:
+    sessao = pipeline.new_session()
+    resultados = [
+        pipeline.run_turn(sessao, perguntas[(inicio + i) % len(perguntas)], streaming=streaming)
+        for i in range(turnos)
+    ]
+    return sessao, resultados
+
+
+def _linha(nome: str, valores: list[float]) -> str:
+    if not valores:
+        return f"{nome:<14}{'—':>10}"
+    return (f"{nome:<14}{statistics.median(valores):>10.0f}{_percentil(valores, 0.95):>10.0f}"
+            f"{_percentil(valores, 0.99):>10.0f}{max(valores):>10.0f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sessions", type=int, default=16, help="sessões concorrentes")
+    ap.add_argument("--turns", type=int, default=5, help="turnos por sessão")
+    ap.add_argument("--ttft-ms", type=float, default=400.0)
+    ap.add_argument("--tokens-per-s", type=float, default=80.0)
+    ap.add_argument("--answer-tokens", type=int, default=120)
+    ap.add_argument("--no-streaming", action="store_true")
+    ap.add_argument("--no-router", action="store_true", help="o modelo falso decide as tools")
+    ap.add_argument("--semantic-cache", action="store_true", help="liga o cache semântico")
+    ap.add_argument("--no-rag", action="store_true", help="retriever vazio (sem Chroma)")
+    ap.add_argument("--gateway", action="store_true", help="passa o modelo falso pelo LLMGateway")
+    ap.add_argument("--concurrency", type=int, default=LLM_CONCURRENCY, help="vagas do gateway")
+    ap.add_argument("--tpm", type=int, default=0, help="orçamento de tokens/min do gateway")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="fração de 429 do modelo falso")
+    ap.add_argument("--questions", default=QUESTIONS)
+    args = ap.parse_args()
+
+    with open(args.questions, encoding="utf-8") as fh:
+        perguntas = [json.loads(linha)["pergunta"] for linha in fh if linha.strip()]
+
+    mock = MockOpenAI(ttft_ms=args.ttft_ms, tokens_per_s=args.tokens_per_s,
+                      answer_tokens=args.answer_tokens, rate_limit=args.rate_limit)
+    gateway = LLMGateway(mock, concurrency=args.concurrency, tpm=args.tpm) if args.gateway else None
+    pipeline = ChatPipeline(
+        client=gateway or mock,
+        retriever=_SemRAG() if args.no_rag else None,
+        use_semantic_cache=args.semantic_cache,
+        router=not args.no_router,
+    )
+    streaming = not args.no_streaming
+
+    t0 = time.perf_counter()
+    _sessao(pipeline, ["aquecimento: o que é o PRONAF?"], 0, 1, streaming)
+    print(f"aquecimento (carga dos recursos): {time.perf_counter() - t0:.1f}s")
+    mock.calls = mock.tool_responses = mock.rate_limited = 0
+    if gateway is not None:
+        gateway = LLMGateway(mock, concurrency=args.concurrency, tpm=args.tpm)   # métricas zeradas
+        pipeline.client = gateway
+
+    rss0 = current_rss_mb()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        futs = [
+            pool.submit(_sessao, pipeline, perguntas, s * args.turns, args.turns, streaming)
+            for s in range(args.sessions)
+        ]
+        saidas = [f.result() for f in futs]
+    duracao = time.perf_counter() - t0
+    rss1 = current_rss_mb()
+
+    resultados = [r for _, rs in saidas for r in rs]
+    totais = [r.total * 1000 for r in resultados]
+    ttfts = [r.ttft * 1000 for r in resultados if r.ttft is not None]
+    estado = [_tamanho(s.msgs) + _tamanho(s.memoria) for s, _ in saidas]
+
+    print(f"\n{args.sessions} sessões × {args.turns} turnos · "
+          f"{'streaming' if streaming else 'sem streaming'} · "
+          f"modelo falso: TTFT {args.ttft_ms:.0f} ms, {args.tokens_per_s:.0f} tok/s, "
+          f"{args.answer_tokens} tokens")
+    print(f"throughput: {len(resultados) / duracao:.2f} turnos/s ({len(resultados)} em {duracao:.1f}s)\n")
+    print(f"{'ms':<14}{'p50':>10}{'p95':>10}{'p99':>10}{'máx':>10}")
+    print(_linha("turno", totais))
+    print(_linha("1º token", ttfts))
+
+    roteadas = sum(r.route is not None for r in resultados)
+    cache = sum(r.cache_hit for r in resultados)
+    print(f"\nroteadas: {roteadas} · tool calls do modelo: {mock.tool_responses} · "
+          f"cache semântico: {cache} · chamadas ao modelo: {mock.calls} (429: {mock.rate_limited})")
+    if gateway is not None:
+        g = gateway.stats()
+        print(f"gateway: {g['concurrency']} vagas · fila máx {g['max_queue_depth']} · espera p50 "
+              f"{g['wait_p50_ms']:.0f} ms, p95 {g['wait_p95_ms']:.0f} ms · retries {g['retries']} · "
+              f"erros {g['errors']} · recusadas {g['rejected']} · {g['tokens_last_min']} tokens no último minuto")
+    print(f"memória: RSS {rss1 - rss0:+.1f} MB no total "
+          f"({(rss1 - rss0) / args.sessions:+.2f} MB/sessão) · estado por sessão "
+          f"{statistics.mean(estado) / 1024:.1f} KB (máx {max(estado) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
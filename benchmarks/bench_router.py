@@ -0,0 +1,165 @@
+"""
+Benchmark: roteador local de intenções (``core.intent_router``).
+
+Roda o roteador sobre um conjunto rotulado de perguntas (no estilo das de
+``a_preparatorios/anotacoes.txt``) e mede:
+
+- **decisão**: rotear × deixar para a LLM (acurácia, rotas indevidas e
+  rotas perdidas — rota indevida é o erro caro: responde dado errado);
+- **tool** e **argumentos** corretos entre as perguntas roteadas
+  (argumentos comparados após ``parse_query``, ou seja, já normalizados);
+- **execução**: cada rota passa pela tool de verdade (``TOOL_REGISTRY``)
+  sobre a versão ativa dos dados e precisa devolver resultado não vazio e
+  não zerado — argumentos "certos" que não casam com a base (ex.: grafia
+  de ``SEXO_BIOLOGICO``) respondem 0 e não passam;
+- **latência** por pergunta (p50/p95/máx, em µs).
+
+As métricas saem em separado para dois conjuntos: o de **ajuste**
+(``router_questions.jsonl``, usado ao escrever as regras) e o
+**reservado** (``router_questions_heldout.jsonl``) — perguntas de outro
+punho, com qualificadores que a rota não representa (custeio, município,
+mês, "ano passado"…). Regras novas não devem ser ajustadas a ele; é o
+número que estima o comportamento com perguntas reais.
+
+Uso (na raiz do projeto)::
+
+    python -m benchmarks.bench_router [--questions benchmarks/router_questions.jsonl]
+        [--heldout benchmarks/router_questions_heldout.jsonl] [--repeat 200] [--verbose]
+        [--no-exec]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from dataclasses import asdict
+
+from core.intent_router import route
+from core.query_engine import parse_query, run_query
+from core.tools import TOOL_REGISTRY
+
+QUESTIONS = "benchmarks/router_questions.jsonl"
+HELDOUT   = "benchmarks/router_questions_heldout.jsonl"
+
+
+def _normaliza(tool: str | None, args: dict | None):
+    if tool == "consulta_pronaf":
+        return asdict(parse_query(args))
+    if tool == "consulta_pronaf_por_estado":
+        return {"cd_estado": args["cd_estado"].upper()}
+    return None
+
+
+def _executa(tool: str, args: dict) -> str | None:
+    """Roda a rota pela tool registrada; devolve o motivo da falha ou ``None``."""
+    saida = TOOL_REGISTRY[tool](**args)
+    if saida.startswith(("Nenhum dado", "Consulta inválida")):
+        return saida
+    if tool == "consulta_pronaf":
+        spec = parse_query(args)
+        tabela, _ = run_query(spec)
+        if not (tabela[spec.medidas].fillna(0) > 0).any().any():
+            return "resultado zerado"
+    return None
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def _avalia(itens: list[dict], repeat: int, executa: bool = True) -> dict:
+    decisao = tool_ok = args_ok = indevidas = perdidas = roteaveis = roteadas = exec_ok = 0
+    erros = []
+    vazias = []
+    latencias = []
+    for item in itens:
+        pergunta, esperado = item["pergunta"], item.get("tool")
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            rota = route(pergunta)
+        latencias.append((time.perf_counter() - t0) / repeat * 1e6)
+
+        obtido = rota.tool if rota else None
+        roteaveis += esperado is not None
+        if (obtido is None) == (esperado is None):
+            decisao += 1
+        elif obtido is not None:
+            indevidas += 1
+        else:
+            perdidas += 1
+
+        if executa and rota is not None:
+            roteadas += 1
+            if (motivo := _executa(rota.tool, rota.args)) is None:
+                exec_ok += 1
+            else:
+                vazias.append((pergunta, rota.tool, rota.args, motivo))
+
+        if esperado is not None and obtido == esperado:
+            tool_ok += 1
+            if _normaliza(obtido, rota.args) == _normaliza(esperado, item["args"]):
+                args_ok += 1
+                continue
+        elif obtido == esperado:
+            continue
+        erros.append((pergunta, esperado, item.get("args"), obtido, rota.args if rota else None))
+    return {"n": len(itens), "roteaveis": roteaveis, "decisao": decisao, "indevidas": indevidas,
+            "perdidas": perdidas, "tool_ok": tool_ok, "args_ok": args_ok,
+            "roteadas": roteadas, "exec_ok": exec_ok, "vazias": vazias,
+            "erros": erros, "latencias": latencias}
+
+
+def _relatorio(titulo: str, r: dict, verbose: bool) -> None:
+    n, roteaveis = r["n"], r["roteaveis"]
+    print(f"{titulo}: {n} perguntas  (roteáveis: {roteaveis}, para a LLM: {n - roteaveis})")
+    print(f"  decisão rotear/LLM: {r['decisao'] / n:.1%}  "
+          f"rotas indevidas: {r['indevidas']}  rotas perdidas: {r['perdidas']}")
+    if roteaveis:
+        print(f"  tool correta: {r['tool_ok'] / roteaveis:.1%}  "
+              f"argumentos corretos: {r['args_ok'] / roteaveis:.1%}")
+    if r["roteadas"]:
+        print(f"  execução com dados: {r['exec_ok']}/{r['roteadas']} rotas  "
+              f"(vazias ou zeradas: {len(r['vazias'])})")
+    for pergunta, tool, tool_args, motivo in r["vazias"]:
+        print(f"  ! {pergunta}\n      {tool} {tool_args}\n      → {motivo.splitlines()[0]}")
+    if verbose and r["erros"]:
+        print("  erros:")
+        for pergunta, esp, esp_args, obt, obt_args in r["erros"]:
+            print(f"  - {pergunta}\n      esperado: {esp} {esp_args}\n      obtido:   {obt} {obt_args}")
+
+
+def _carrega(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(linha) for linha in fh if linha.strip()]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--questions", default=QUESTIONS)
+    ap.add_argument("--heldout", default=HELDOUT, help="conjunto reservado ('' desliga)")
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--verbose", action="store_true", help="lista cada erro")
+    ap.add_argument("--no-exec", action="store_true",
+                    help="não executa as rotas (sem a base de dados à mão)")
+    args = ap.parse_args()
+
+    conjuntos = [("ajuste", args.questions)]
+    if args.heldout and os.path.exists(args.heldout):
+        conjuntos.append(("reservado", args.heldout))
+
+    latencias = []
+    for titulo, path in conjuntos:
+        r = _avalia(_carrega(path), args.repeat, executa=not args.no_exec)
+        _relatorio(titulo, r, args.verbose)
+        latencias += r["latencias"]
+
+    print(f"latência (µs): p50 {statistics.median(latencias):.0f}  "
+          f"p95 {_percentil(latencias, 0.95):.0f}  máx {max(latencias):.0f}")
+    print("cada pergunta roteada economiza 1 chamada à LLM (a que só escolhe a tool)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Cold start da página do chat: imports e tempo até o 1º render, com teto.
+
+Cada rodada é um processo Python novo que:
+
+1. importa o ``streamlit`` — pago pelo servidor antes de qualquer página,
+   fica fora da conta;
+2. liga o cronômetro de imports (``core/startup.py``) e faz o que
+   ``0_🤖 Início.py`` faz antes do 1º render: importa os módulos da página,
+   cria o ``ChatPipeline`` e a sessão (sem desenhar nada). Com ``--app``
+   roda a página de verdade pelo ``AppTest`` do Streamlit;
+3. devolve os tempos, o perfil por pacote e os pacotes novos em
+   ``sys.modules``.
+
+Sai com código 1 se a mediana passar de ``--budget-s``
+(``CHAT_PRONAF_STARTUP_BUDGET_S``) ou se algum pacote de ``--forbid`` for
+importado no caminho até o 1º render — serve de teste de regressão no CI.
+``CHAT_PRONAF_PREWARM_TOOLS`` e ``CHAT_PRONAF_WARM_AT_BOOT`` ficam
+desligados: rodam em background e não atrasam o 1º render.
+
+Uso (na raiz do projeto)::
+
+    python -m benchmarks.bench_startup [--runs 5] [--budget-s 1.0]
+        [--forbid torch pandas ...] [--eager] [--app]
+
+``--eager`` (``CHAT_PRONAF_EAGER_IMPORTS=1``) mede sem os imports adiados,
+para comparação.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PAGINA = "0_🤖 Início.py"
+BUDGET_S = float(os.getenv("CHAT_PRONAF_STARTUP_BUDGET_S", "1.0"))
+
+# pacotes que só podem carregar na 1ª pergunta (ou na página que os usa)
+PESADOS = [
+    "torch", "transformers", "sentence_transformers", "onnxruntime", "langchain_core",
+    "langchain_community", "langchain_huggingface", "chromadb", "openai", "httpx",
+    "pandas", "pyarrow", "duckdb", "plotly",
+]
+
+
+# -------- Subprocesso --------
+def _filho(app: bool) -> dict:
+    from core.startup import install_import_profiler, since_start, startup_report
+
+    import streamlit  # noqa: F401  (já carregado pelo servidor)
+    antes = set(sys.modules)
+    t_streamlit = since_start()
+
+    install_import_profiler()
+    t0 = time.perf_counter()
+    if app:
+        from streamlit.testing.v1 import AppTest
+
+        at = AppTest.from_file(PAGINA, default_timeout=120)
+        at.secrets["openai_api_key"] = "sk-bench"
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"a página falhou: {at.exception[0].value}")
+        t_imports = None
+    else:
+        from utils.sqlite_patch import patch_sqlite
+        patch_sqlite()
+        from core.api_client import API_URL, RemotePipeline        # noqa: F401
+        from core.chat_pipeline import ChatPipeline
+        from core.hot_swap import start_watcher                    # noqa: F401
+        from core.rag_engine import N_DOCS, get_semantic_cache     # noqa: F401
+        from core.resources import resource_stats
+        from core.tool_cache import get_tool_cache                 # noqa: F401
+        t_imports = time.perf_counter() - t0
+
+        ChatPipeline().new_session()
+        resource_stats()
+    t_render = time.perf_counter() - t0
+
+    rel = startup_report(top=10)
+    return {
+        "streamlit_s": t_streamlit,
+        "imports_s": t_imports,
+        "render_s": t_render,
+        "process_s": since_start(),
+        "new_packages": sorted({m.split(".")[0] for m in set(sys.modules) - antes}),
+        "packages": rel["packages"][:10],
+        "modules": rel["modules"],
+    }
+
+
+def _roda(args: argparse.Namespace) -> dict:
+    env = dict(os.environ, CHAT_PRONAF_PREWARM_TOOLS="0", CHAT_PRONAF_WARM_AT_BOOT="0")
+    if args.eager:
+        env["CHAT_PRONAF_EAGER_IMPORTS"] = "1"
+    cmd = [sys.executable, "-m", "benchmarks.bench_startup", "--child"] + (["--app"] if args.app else [])
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise SystemExit(f"rodada falhou:\n{proc.stderr.strip()[-1500:]}")
+    res = json.loads(proc.stdout.strip().splitlines()[-1])
+    res["wall_s"] = time.perf_counter() - t0
+    return res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-s", type=float, default=BUDGET_S,
+                    help="teto da mediana do tempo até o 1º render (sem o streamlit)")
+    ap.add_argument("--forbid", nargs="*", default=PESADOS,
+                    help="pacotes proibidos antes do 1º render (vazio desliga)")
+    ap.add_argument("--eager", action="store_true", help="desliga os imports adiados")
+    ap.add_argument("--app", action="store_true", help="roda a página pelo AppTest do Streamlit")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(_filho(args.app)))
+        return
+
+    print(f"{'rodada':<8}{'processo s':>12}{'streamlit s':>13}{'imports s':>11}{'1º render s':>13}")
+    rodadas = []
+    for i in range(args.runs):
+        r = _roda(args)
+        rodadas.append(r)
+        imp = f"{r['imports_s']:.3f}" if r["imports_s"] is not None else "-"
+        print(f"{i + 1:<8}{r['wall_s']:>12.3f}{r['streamlit_s']:>13.3f}{imp:>11}{r['render_s']:>13.3f}")
+
+    mediana = statistics.median(r["render_s"] for r in rodadas)
+    ultima = rodadas[-1]
+    print(f"\nmediana até o 1º render: {mediana:.3f}s (teto {args.budget_s:.3f}s)\n")
+    print("pacotes mais lentos (tempo próprio, última rodada):")
+    for p in ultima["packages"]:
+        print(f"  {p['package']:<28}{p['self_ms']:>9.1f} ms  {p['modules']:>4} módulos")
+    print("\nmódulos mais lentos (acumulado):")
+    for m in ultima["modules"]:
+        print(f"  {m['module']:<40}{m['cumulative_ms']:>9.1f} ms")
+
+    falhas = []
+    if mediana > args.budget_s:
+        falhas.append(f"1º render em {mediana:.3f}s passou do teto de {args.budget_s:.3f}s")
+    proibidos = sorted(set(args.forbid) & {p for r in rodadas for p in r["new_packages"]})
+    if proibidos:
+        falhas.append(f"pacotes pesados carregados antes do 1º render: {', '.join(proibidos)}")
+    if falhas:
+        print("\nFALHOU:\n  " + "\n  ".join(falhas))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark: Chroma (``persist_directory``) × índice NumPy por mmap.
+
+Cada backend roda num subprocesso novo, para medir sem interferência:
+
+- **abertura a frio**: import + abertura da coleção/índice;
+- **RSS** do processo depois de abrir e depois das consultas;
+- **latência** da busca por vetor (``similarity_search_by_vector``),
+  consulta a consulta (p50/p95), e do lote inteiro de uma vez
+  (:meth:`NumpyVectorIndex.search` é exato e aceita lotes);
+- **recall@k** dos dois em relação à busca exata com os vetores float32
+  originais da coleção (o HNSW do Chroma é aproximado; o NumPy perde só
+  o arredondamento do dtype exportado).
+
+Consultas: vetores da própria coleção com ruído gaussiano — sem carregar
+o modelo de embeddings, que dominaria o RSS nos dois casos. O Chroma é
+aberto como em :func:`core.rag_engine.get_vector_db`, só que sem
+``embedding_function``.
+
+Uso (na raiz do projeto)::
+
+    python -m benchmarks.bench_vector_index [--queries 200] [--k 3 10]
+        [--index-dir data/data-rag/vector_index]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_router import _percentil
+from core.rag_engine import PERSIST_DIR
+from core.vector_index import INDEX_DIR
+from scripts.ingest_mcr import COLLECTION
+
+
+# -------- Subprocesso --------
+def _filho(backend: str, persist_dir: str, index_dir: str, consultas: str, ks: list[int]) -> dict:
+    from core.resources import current_rss_mb
+
+    q = np.load(consultas)
+    rss0 = current_rss_mb()
+    t0 = time.perf_counter()
+    if backend == "chroma":
+        from utils.sqlite_patch import patch_sqlite
+        patch_sqlite()
+        from langchain_community.vectorstores import Chroma
+        db = Chroma(persist_directory=persist_dir)
+        db.similarity_search_by_vector(q[0].tolist(), k=1)     # força a carga do HNSW
+    else:
+        from core.vector_index import NumpyVectorIndex
+        db = NumpyVectorIndex(index_dir)
+    t_abre = time.perf_counter() - t0
+    rss_aberto = current_rss_mb()
+
+    saida = {"backend": backend, "open_s": t_abre, "rss_base_mb": rss0,
+             "rss_open_mb": rss_aberto, "latency": {}, "batch_ms": {}, "top": {}}
+    for k in ks:
+        lat, tops = [], []
+        for v in q:
+            t = time.perf_counter()
+            docs = db.similarity_search_by_vector(v.tolist(), k=k)
+            lat.append((time.perf_counter() - t) * 1000)
+            tops.append([d.page_content for d in docs])
+        saida["latency"][k] = lat
+        saida["top"][k] = tops
+        if backend == "numpy":
+            t = time.perf_counter()
+            db.search(q, k)
+            saida["batch_ms"][k] = (time.perf_counter() - t) * 1000
+    saida["rss_after_mb"] = current_rss_mb()
+    return saida
+
+
+def _roda(backend: str, args: argparse.Namespace, consultas: str) -> dict | None:
+    cmd = [sys.executable, "-m", "benchmarks.bench_vector_index", "--child", backend,
+           "--persist-dir", args.persist_dir, "--index-dir", args.index_dir,
+           "--queries-file", consultas, "--k", *map(str, args.k)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(f"[{backend}] falhou:\n{proc.stderr.strip()[-800:]}\n")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--persist-dir", default=PERSIST_DIR)
+    ap.add_argument("--index-dir", default=INDEX_DIR)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--noise", type=float, default=0.02, help="desvio do ruído nas consultas")
+    ap.add_argument("--k", type=int, nargs="+", default=[3, 10])
+    ap.add_argument("--child", choices=["chroma", "numpy"], help=argparse.SUPPRESS)
+    ap.add_argument("--queries-file", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        res = _filho(args.child, args.persist_dir, args.index_dir, args.queries_file, args.k)
+        print(json.dumps(res, ensure_ascii=False))
+        return
+
+    from utils.sqlite_patch import patch_sqlite
+    patch_sqlite()
+    import chromadb
+
+    from core.vector_index import NumpyVectorIndex
+
+    # vetores originais (float32) da coleção: consultas e gabarito exato
+    dados = chromadb.PersistentClient(path=args.persist_dir).get_collection(COLLECTION).get(
+        include=["embeddings", "documents"])
+    base = np.asarray(dados["embeddings"], dtype=np.float32)
+    base /= np.clip(np.linalg.norm(base, axis=1, keepdims=True), 1e-12, None)
+    rng = np.random.default_rng(0)
+    q = base[rng.choice(len(base), size=min(args.queries, len(base)), replace=False)]
+    q = q + rng.normal(0, args.noise, q.shape).astype(np.float32)
+    sims = q @ base.T
+    exato = {k: [[dados["documents"][i] for i in np.argsort(-linha)[:k]] for linha in sims]
+             for k in args.k}
+
+    meta = NumpyVectorIndex(args.index_dir).meta
+    print(f"coleção: {len(base)} chunks × {base.shape[1]} · índice NumPy: {meta['dtype']} · "
+          f"consultas: {len(q)}\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        consultas = os.path.join(tmp, "consultas.npy")
+        np.save(consultas, q)
+        res = {b: _roda(b, args, consultas) for b in ("chroma", "numpy")}
+
+    print(f"{'':<10}{'abertura s':>12}{'RSS aberto':>12}{'RSS final':>12}   (MB acima do processo vazio)")
+    for b, r in res.items():
+        if r:
+            print(f"{b:<10}{r['open_s']:>12.2f}{r['rss_open_mb'] - r['rss_base_mb']:>12.1f}"
+                  f"{r['rss_after_mb'] - r['rss_base_mb']:>12.1f}")
+    print()
+    for k in args.k:
+        for b, r in res.items():
+            if not r:
+                continue
+            lat = r["latency"][str(k)]
+            lote = (f" · lote inteiro {r['batch_ms'][str(k)]:.1f} ms "
+                    f"({r['batch_ms'][str(k)] / len(lat):.3f} ms/consulta)" if r["batch_ms"] else "")
+            print(f"k={k:<3}{b:<8} p50 {np.median(lat):.3f} ms · p95 {_percentil(lat, 0.95):.3f} ms{lote}")
+        for b, r in res.items():
+            if r:
+                recall = np.mean([len(set(x) & set(y)) / max(len(y), 1)
+                                  for x, y in zip(r["top"][str(k)], exato[k])])
+                print(f"k={k:<3}{b:<8} recall@{k} em relação à busca exata: {recall:.3f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
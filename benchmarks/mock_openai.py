@@ -0,0 +1,211 @@
+"""
+Substituto local de ``openai.chat.completions`` para benchmarks offline.
+
+:class:`MockOpenAI` expõe ``chat.completions.create(**params)`` como o módulo
+``openai`` e é injetado em :class:`core.chat_pipeline.ChatPipeline`
+(``client=``). Nada sai da máquina:
+
+- **latência** configurável: tempo até o 1º token (com *jitter*) e tokens/s;
+- **streaming** (``stream=True``): chunks com ``delta.content`` /
+  ``delta.tool_calls`` e, com ``stream_options.include_usage``, o chunk
+  final de ``usage`` — o mesmo formato que :class:`core.streaming.ChatStream`
+  remonta;
+- **tool calls roteirizadas**: ``tool_script(messages)`` decide as chamadas
+  quando há ``tools`` e a última mensagem é do usuário. O roteiro padrão usa
+  o roteador local (:func:`core.intent_router.route`), então perguntas de
+  dados viram ``consulta_pronaf`` mesmo com ``CHAT_PRONAF_ROUTER=0``;
+- **limite de taxa**: com ``rate_limit`` > 0, essa fração das chamadas
+  falha com :class:`MockRateLimitError` (429 + ``Retry-After``), para
+  exercitar as novas tentativas de :class:`core.llm_gateway.LLMGateway`.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from types import SimpleNamespace as NS
+from typing import Any
+
+from core.intent_router import route
+
+ToolScript = Callable[[list[dict[str, Any]]], list[dict[str, str]] | None]
+
+_PALAVRAS = (
+    "o", "PRONAF", "financiou", "agricultores", "familiares", "com", "crédito",
+    "rural", "em", "condições", "diferenciadas", "segundo", "os", "dados",
+    "consultados", "no", "período", "informado", ".",
+)
+
+
+def router_script(messages: list[dict[str, Any]]) -> list[dict[str, str]] | None:
+    """Roteiro padrão: a mesma decisão do roteador local para a última pergunta."""
+    texto = messages[-1].get("content") or ""
+    m = re.search(r"^Pergunta: (.*)$", texto, re.MULTILINE)  # prompt de build_prompt()
+    rota = route(m.group(1) if m else texto)
+    if rota is None:
+        return None
+    call = rota.tool_call()["function"]
+    return [{"name": call["name"], "arguments": call["arguments"]}]
+
+
+class MockRateLimitError(Exception):
+    """429 como o da OpenAI: ``status_code`` e ``response.headers``."""
+
+    def __init__(self, retry_after_s: float) -> None:
+        super().__init__("429 Too Many Requests (simulado)")
+        self.status_code = 429
+        self.response = NS(headers={"retry-after-ms": str(int(retry_after_s * 1000))})
+
+
+@dataclass
+class _Function:
+    name: str
+    arguments: str
+
+
+@dataclass
+class _ToolCall:
+    id: str
+    function: _Function
+    type: str = "function"
+
+
+@dataclass
+class _Message:
+    content: str | None
+    tool_calls: list[_ToolCall] | None = None
+    role: str = "assistant"
+
+    def model_dump(self) -> dict[str, Any]:
+        msg: dict[str, Any] = {"role": self.role, "content": self.content}
+        if self.tool_calls:
+            msg["tool_calls"] = [
+                {"id": c.id, "type": c.type,
+                 "function": {"name": c.function.name, "arguments": c.function.arguments}}
+                for c in self.tool_calls
+            ]
+        return msg
+
+
+@dataclass
+class MockOpenAI:
+    """
+    Parameters
+    ----------
+    ttft_ms :
+        Tempo médio até o 1º chunk (ms).
+    tokens_per_s :
+        Velocidade de geração depois do 1º chunk.
+    answer_tokens :
+        Tokens de cada resposta em texto.
+    jitter :
+        Variação relativa (uniforme, ±) aplicada ao ``ttft_ms``.
+    tool_script :
+        ``fn(messages) -> [{"name", "arguments"}] | None``; ``None`` nunca chama tools.
+    seed :
+        Semente do *jitter*.
+    rate_limit :
+        Fração das chamadas que falham com 429.
+    retry_after_s :
+        ``Retry-After`` devolvido nos 429.
+    """
+
+    ttft_ms: float = 400.0
+    tokens_per_s: float = 80.0
+    answer_tokens: int = 120
+    jitter: float = 0.2
+    tool_script: ToolScript | None = router_script
+    seed: int = 0
+    rate_limit: float = 0.0
+    retry_after_s: float = 0.2
+    calls: int = field(default=0, init=False)
+    tool_responses: int = field(default=0, init=False)
+    rate_limited: int = field(default=0, init=False)
+    _rng: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+        self.chat = NS(completions=NS(create=self.create))
+
+    # -------- Apoio --------
+    def _ttft(self) -> float:
+        with self._lock:
+            fator = 1 + self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.ttft_ms * fator / 1000)
+
+    def _tool_calls(self, messages: list[dict[str, Any]], tools: Any) -> list[_ToolCall]:
+        if not isinstance(tools, list) or not tools or self.tool_script is None:
+            return []
+        if messages[-1].get("role") != "user":
+            return []
+        with self._lock:
+            base = self.calls
+        return [
+            _ToolCall(f"call_{base}_{i}", _Function(c["name"], c["arguments"]))
+            for i, c in enumerate(self.tool_script(messages) or [])
+        ]
+
+    def _texto(self) -> list[str]:
+        return [_PALAVRAS[i % len(_PALAVRAS)] + " " for i in range(self.answer_tokens)]
+
+    @staticmethod
+    def _usage(messages: list[dict[str, Any]], completion: int) -> NS:
+        prompt = len(json.dumps(messages, ensure_ascii=False, default=str)) // 4
+        return NS(prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion)
+
+    # -------- API --------
+    def create(self, *, model: str, messages: list[dict[str, Any]], stream: bool = False,
+               tools: Any = None, stream_options: dict[str, Any] | None = None, **_: Any):
+        with self._lock:
+            self.calls += 1
+            limitado = self.rate_limit > 0 and self._rng.random() < self.rate_limit
+            self.rate_limited += limitado
+        if limitado:
+            time.sleep(0.01)
+            raise MockRateLimitError(self.retry_after_s)
+        calls = self._tool_calls(messages, tools)
+        if calls:
+            with self._lock:
+                self.tool_responses += 1
+        if stream:
+            return self._stream(model, messages, calls, bool((stream_options or {}).get("include_usage")))
+
+        time.sleep(self._ttft())
+        if calls:
+            msg = _Message(None, calls)
+            completion = sum(len(c.function.arguments) // 4 for c in calls)
+        else:
+            tokens = self._texto()
+            time.sleep(len(tokens) / self.tokens_per_s)
+            msg = _Message("".join(tokens).strip())
+            completion = len(tokens)
+        return NS(model=model, choices=[NS(index=0, message=msg, finish_reason="stop")],
+                  usage=self._usage(messages, completion))
+
+    def _stream(self, model: str, messages: list[dict[str, Any]], calls: list[_ToolCall],
+                include_usage: bool) -> Iterator[NS]:
+        time.sleep(self._ttft())
+        completion = 0
+        if calls:
+            for i, c in enumerate(calls):
+                # como a API: 1º delta com id + nome, depois os argumentos
+                yield NS(choices=[NS(delta=NS(content=None, tool_calls=[
+                    NS(index=i, id=c.id, function=NS(name=c.function.name, arguments=""))]))], usage=None)
+                yield NS(choices=[NS(delta=NS(content=None, tool_calls=[
+                    NS(index=i, id=None, function=NS(name=None, arguments=c.function.arguments))]))], usage=None)
+                completion += len(c.function.arguments) // 4
+        else:
+            intervalo = 1 / self.tokens_per_s
+            for i, tok in enumerate(self._texto()):
+                if i:
+                    time.sleep(intervalo)
+                yield NS(choices=[NS(delta=NS(content=tok, tool_calls=None))], usage=None)
+                completion += 1
+        if include_usage:
+            yield NS(choices=[], usage=self._usage(messages, completion))
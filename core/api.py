@@ -0,0 +1,297 @@
+"""
+Serviço HTTP do chat (FastAPI), sem Streamlit.
+
+Expõe :class:`core.chat_pipeline.ChatPipeline` para qualquer cliente — a
+página ``0_🤖 Início.py`` vira um cliente fino quando
+``CHAT_PRONAF_API_URL`` está definido (``core/api_client.py``):
+
+- ``POST /v1/chat``: um turno, resposta JSON completa;
+- ``POST /v1/chat/stream``: o mesmo turno em *Server-Sent Events*
+  (``token`` a cada pedaço de texto, ``done`` com o resultado, ``error``);
+- ``GET /v1/pronaf/rows.csv``: tabela detalhada do Painel PRONAF para os
+  filtros dados, em CSV gerado e enviado em pedaços (``core/painel.py``);
+- ``GET /health``: recursos carregados (``core/resources.py``), fila e
+  espera da LLM (``core/llm_gateway.py``) e marcos da inicialização do
+  worker (``core/startup.py``), versão dos dados e trocas a quente
+  (``core/hot_swap.py``).
+
+O serviço não guarda conversas: o cliente envia o estado da sessão
+(:meth:`ChatSession.to_state`) e recebe o estado atualizado. O estado vem
+de fora e é validado (:class:`SessionState`): só mensagens ``user`` /
+``assistant`` / ``tool`` no formato que o pipeline gera, com teto de
+quantidade e de tamanho; a mensagem de sistema é sempre a do servidor. Assim qualquer
+worker atende qualquer turno e dá para escalar horizontalmente sem sessões
+"grudadas". Modelo de embeddings, Chroma, BM25 e caches são únicos por
+processo e compartilhados por todos os clientes do worker; o cache de
+tools em SQLite é compartilhado entre os workers.
+
+Rodar (ver ``Procfile``)::
+
+    uvicorn core.api:app --host 0.0.0.0 --port 8000 --workers 4
+
+A chave da OpenAI vem de ``OPENAI_API_KEY``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from typing import Any, Literal
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from core import painel
+from core.chat_pipeline import ChatPipeline, TurnResult
+from core.data_versions import active_version
+from core.hot_swap import start_watcher, swap_history
+from core.llm_gateway import LLMOverloaded, get_llm_gateway
+from core.rag_engine import N_DOCS
+from core.resources import resource_stats, warm_up
+from core.startup import mark, startup_report
+from core.tools import TOOL_REGISTRY, prewarm_tools
+
+# recursos carregados no boot de cada worker (em background)
+WARM_RESOURCES = ["embeddings", "vector_db", "retriever", "semantic_cache"]
+
+# teto do estado de sessão enviado pelo cliente (mensagens e caracteres somados)
+SESSION_MAX_MSGS  = int(os.getenv("CHAT_PRONAF_SESSION_MAX_MSGS", "400"))
+SESSION_MAX_CHARS = int(os.getenv("CHAT_PRONAF_SESSION_MAX_CHARS", "400000"))
+MSG_MAX_CHARS     = 60_000           # um resultado de tool grande cabe; um livro, não
+
+
+# -------- Esquemas --------
+class ToolFunction(BaseModel):
+    name: str
+    arguments: str = Field(max_length=8000)
+
+    @field_validator("name")
+    @classmethod
+    def _tool_conhecida(cls, v: str) -> str:
+        if v not in TOOL_REGISTRY:
+            raise ValueError(f"tool desconhecida: {v!r}")
+        return v
+
+
+class ToolCall(BaseModel):
+    id: str = Field(min_length=1, max_length=64)
+    type: Literal["function"] = "function"
+    function: ToolFunction
+
+
+class SessionMessage(BaseModel):
+    """Uma mensagem do log, no formato gerado por :class:`~core.chat_pipeline.ChatPipeline`."""
+    # model_dump() das mensagens da OpenAI traz campos extras (refusal, audio…)
+    model_config = ConfigDict(extra="ignore")
+
+    role: Literal["user", "assistant", "tool"]
+    content: str | None = Field(None, max_length=MSG_MAX_CHARS)
+    tool_calls: list[ToolCall] | None = Field(None, max_length=8)
+    tool_call_id: str | None = Field(None, max_length=64)
+
+    @model_validator(mode="after")
+    def _formato(self) -> SessionMessage:
+        if self.role == "tool":
+            ok = self.tool_call_id is not None and self.content is not None and not self.tool_calls
+        elif self.role == "assistant":
+            ok = self.tool_call_id is None and (self.content is not None or bool(self.tool_calls))
+        else:
+            ok = self.content is not None and self.tool_call_id is None and not self.tool_calls
+        if not ok:
+            raise ValueError(f"mensagem '{self.role}' fora do formato do pipeline")
+        return self
+
+    def to_message(self) -> dict[str, Any]:
+        msg: dict[str, Any] = {"role": self.role, "content": self.content}
+        if self.tool_calls:
+            msg["tool_calls"] = [c.model_dump() for c in self.tool_calls]
+        if self.tool_call_id is not None:
+            msg["tool_call_id"] = self.tool_call_id
+        return msg
+
+
+class SessionState(BaseModel):
+    """Estado de :meth:`ChatSession.to_state`, como chega do cliente."""
+    msgs: list[SessionMessage] = Field(default_factory=list, max_length=SESSION_MAX_MSGS)
+    summary: str = Field("", max_length=8000)
+    summarized_turns: int = Field(0, ge=0)
+    prompt_tokens: list[int] = Field(default_factory=list, max_length=SESSION_MAX_MSGS)
+    ttft: list[float | None] = Field(default_factory=list, max_length=SESSION_MAX_MSGS)
+
+    @model_validator(mode="after")
+    def _coerente(self) -> SessionState:
+        total = len(self.summary) + sum(
+            len(m.content or "") + sum(len(c.function.arguments) for c in m.tool_calls or [])
+            for m in self.msgs
+        )
+        if total > SESSION_MAX_CHARS:
+            raise ValueError(f"sessão grande demais: {total} caracteres (máx. {SESSION_MAX_CHARS})")
+        if self.msgs and self.msgs[0].role != "user":
+            raise ValueError("a conversa deve começar por uma mensagem 'user'")
+        # cada resultado de tool responde a uma chamada anterior, uma única vez
+        abertas: set[str] = set()
+        for m in self.msgs:
+            if m.role == "assistant":
+                abertas = {c.id for c in m.tool_calls or []}
+            elif m.role == "tool":
+                if m.tool_call_id not in abertas:
+                    raise ValueError(f"resultado de tool sem chamada: {m.tool_call_id!r}")
+                abertas.discard(m.tool_call_id)
+            else:
+                abertas = set()
+        if self.summarized_turns > sum(m.role == "user" for m in self.msgs):
+            raise ValueError("summarized_turns maior que o nº de turnos")
+        return self
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "msgs": [m.to_message() for m in self.msgs],
+            "summary": self.summary,
+            "summarized_turns": self.summarized_turns,
+            "prompt_tokens": list(self.prompt_tokens),
+            "ttft": list(self.ttft),
+        }
+
+
+class TurnRequest(BaseModel):
+    pergunta: str = Field(min_length=1, max_length=4000)
+    k: int = Field(N_DOCS, ge=1, le=10, description="documentos do RAG")
+    streaming: bool = Field(True, description="LLM em streaming (mede o 1º token)")
+    session: SessionState | None = Field(None, description="estado devolvido no turno anterior")
+
+    def state(self) -> dict[str, Any] | None:
+        return self.session.to_state() if self.session is not None else None
+
+
+class TurnResponse(BaseModel):
+    answer: str
+    ttft: float | None
+    total: float
+    cache_hit: bool
+    similarity: float
+    route: dict[str, Any] | None
+    session: dict[str, Any]
+
+
+def _resposta(r: TurnResult, session: dict[str, Any]) -> TurnResponse:
+    return TurnResponse(
+        answer=r.answer,
+        ttft=r.ttft,
+        total=r.total,
+        cache_hit=r.cache_hit,
+        similarity=r.similarity,
+        route={"tool": r.route.tool, "args": r.route.args} if r.route is not None else None,
+        session=session,
+    )
+
+
+# -------- App --------
+pipeline = ChatPipeline()
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    warm_up(WARM_RESOURCES, background=True)
+    prewarm_tools()                      # CHAT_PRONAF_PREWARM_TOOLS: resumos das 27 UFs
+    start_watcher()                      # CHAT_PRONAF_DATA_POLL_S > 0: troca de versão a quente
+    mark("app pronta")
+    yield
+
+
+app = FastAPI(title="Chat-PRONAF", lifespan=_lifespan)
+
+
+@app.exception_handler(LLMOverloaded)
+async def _sobrecarga(request: Request, exc: LLMOverloaded) -> JSONResponse:
+    # fila da LLM cheia até o prazo: o cliente (ou o balanceador) tenta outro worker
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "5"})
+
+
+@app.get("/health")
+def health() -> dict[str, Any]:
+    return {
+        "status": "ok",
+        "resources": resource_stats(),
+        "llm": get_llm_gateway().stats(),
+        "startup": startup_report(top=0)["marks"],
+        "data": {"version": active_version().name, "swaps": swap_history()[-5:]},
+    }
+
+
+@app.post("/v1/chat", response_model=TurnResponse)
+def chat(req: TurnRequest) -> TurnResponse:
+    # `def` (não `async def`): o FastAPI roda o turno no pool de threads
+    sessao = pipeline.new_session(req.state())
+    r = pipeline.run_turn(sessao, req.pergunta, k=req.k, streaming=req.streaming)
+    return _resposta(r, sessao.to_state())
+
+
+def _sse(evento: str, dados: dict[str, Any]) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+@app.post("/v1/chat/stream")
+async def chat_stream(req: TurnRequest) -> StreamingResponse:
+    loop = asyncio.get_running_loop()
+    fila: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue()
+
+    def emitir(evento: str, dados: dict[str, Any]) -> None:
+        loop.call_soon_threadsafe(fila.put_nowait, (evento, dados))
+
+    def repassar(stream: Iterator[str]) -> None:
+        for pedaco in stream:
+            emitir("token", {"text": pedaco})
+
+    def turno() -> None:
+        # roda numa thread; os pedaços de texto saem pela fila à medida que chegam
+        try:
+            sessao = pipeline.new_session(req.state())
+            r = pipeline.run_turn(sessao, req.pergunta, k=req.k, streaming=True, write_stream=repassar)
+            emitir("done", _resposta(r, sessao.to_state()).model_dump())
+        except Exception as exc:
+            emitir("error", {"detail": f"{type(exc).__name__}: {exc}"})
+
+    async def eventos() -> AsyncIterator[str]:
+        tarefa = asyncio.create_task(asyncio.to_thread(turno))
+        while True:
+            evento, dados = await fila.get()
+            yield _sse(evento, dados)
+            if evento != "token":
+                break
+        await tarefa
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/v1/pronaf/rows.csv")
+def pronaf_rows_csv(
+    uf: str | None = None,
+    ano_min: int | None = None,
+    ano_max: int | None = None,
+    sexo: list[str] | None = Query(None),
+    sort_by: str | None = None,
+    descending: bool = False,
+) -> StreamingResponse:
+    # filtros omitidos = todos; `sexo=` (vazio) = nenhum; o corpo sai em
+    # pedaços, sem montar o recorte inteiro
+    _, anos, sexos = painel.options()
+    try:
+        pedacos = painel.detail_csv(
+            uf, anos[0] if ano_min is None else ano_min, anos[-1] if ano_max is None else ano_max,
+            sexos if sexo is None else [s for s in sexo if s], sort_by=sort_by, descending=descending,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return StreamingResponse(
+        pedacos,
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="pronaf_filtrado.csv"'},
+    )
@@ -0,0 +1,127 @@
+"""
+Cliente do serviço HTTP do chat (``core/api.py``).
+
+:class:`RemotePipeline` tem a mesma interface de
+:class:`core.chat_pipeline.ChatPipeline` (``new_session`` / ``run_turn``),
+então a página troca um pelo outro sem mudar o desenho: com
+``CHAT_PRONAF_API_URL`` definido o Streamlit só guarda a sessão e
+renderiza; RAG, tools e LLM rodam no serviço.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from core.chat_pipeline import ChatSession, TurnResult, _consume
+from core.history import ConversationMemory
+from core.intent_router import Route
+from core.lazy import lazy_import
+from core.prompt_template import SYSTEM_MSG
+from core.rag_engine import N_DOCS
+
+httpx = lazy_import("httpx")         # só usado com CHAT_PRONAF_API_URL
+
+API_URL     = os.getenv("CHAT_PRONAF_API_URL", "")        # vazio = pipeline no processo
+# endereço do serviço visto pelo navegador (links de download); API_URL é o
+# do Streamlit → serviço e costuma ser interno. Vazio = CSV gerado na página
+PUBLIC_API_URL = os.getenv("CHAT_PRONAF_PUBLIC_API_URL", "")
+API_TIMEOUT = float(os.getenv("CHAT_PRONAF_API_TIMEOUT", "120"))
+
+
+def _eventos(resp: httpx.Response) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Eventos ``(nome, dados)`` de uma resposta ``text/event-stream``."""
+    evento, dados = "message", []
+    for linha in resp.iter_lines():
+        if not linha:
+            if dados:
+                yield evento, json.loads("\n".join(dados))
+            evento, dados = "message", []
+        elif linha.startswith("event:"):
+            evento = linha[6:].strip()
+        elif linha.startswith("data:"):
+            dados.append(linha[5:].strip())
+
+
+class RemotePipeline:
+    """
+    Parameters
+    ----------
+    base_url :
+        Endereço do serviço (ex.: ``http://localhost:8000``).
+    timeout :
+        Tempo máximo (s) de cada turno.
+    """
+
+    def __init__(self, base_url: str = API_URL, *, timeout: float = API_TIMEOUT) -> None:
+        self._http = httpx.Client(base_url=base_url, timeout=timeout)
+
+    def new_session(self, state: dict[str, Any] | None = None) -> ChatSession:
+        # o resumo do histórico é feito no serviço; aqui a memória só guarda estado
+        sessao = ChatSession(
+            msgs=[{"role": "system", "content": SYSTEM_MSG}],
+            memoria=ConversationMemory(summarizer=lambda resumo, turnos: resumo),
+        )
+        if state is not None:
+            sessao.load_state(state)
+        return sessao
+
+    def run_turn(
+        self,
+        session: ChatSession,
+        pergunta: str,
+        *,
+        k: int = N_DOCS,
+        streaming: bool = True,
+        write_stream: Callable[[Iterator[str]], Any] = _consume,
+    ) -> TurnResult:
+        """Um turno no serviço; ``session`` recebe o estado atualizado."""
+        t0 = time.perf_counter()
+        corpo = {"pergunta": pergunta, "k": k, "streaming": streaming, "session": session.to_state()}
+        ttft = None
+
+        if streaming:
+            final: dict[str, Any] = {}
+
+            def pedacos() -> Iterator[str]:
+                nonlocal ttft
+                with self._http.stream("POST", "/v1/chat/stream", json=corpo) as resp:
+                    resp.raise_for_status()
+                    for evento, dados in _eventos(resp):
+                        if evento == "token":
+                            if ttft is None:
+                                ttft = time.perf_counter() - t0
+                            yield dados["text"]
+                        elif evento == "done":
+                            final.update(dados)
+                        elif evento == "error":
+                            raise RuntimeError(f"Erro no serviço do chat: {dados['detail']}")
+
+            write_stream(pedacos())
+            if not final:
+                # conexão caiu (worker reiniciado, proxy com timeout…) antes
+                # do resultado: erro de transporte, como no POST sem streaming
+                raise httpx.RemoteProtocolError(
+                    "O serviço do chat encerrou o stream sem o evento 'done' "
+                    "(resposta incompleta; tente de novo)."
+                )
+            dados = final
+        else:
+            resp = self._http.post("/v1/chat", json=corpo)
+            resp.raise_for_status()
+            dados = resp.json()
+
+        session.load_state(dados["session"])
+        total = time.perf_counter() - t0
+        rota = dados["route"]
+        return TurnResult(
+            dados["answer"],
+            ttft if ttft is not None else total,        # 1º token visto pelo cliente
+            total,
+            cache_hit=dados["cache_hit"],
+            similarity=dados["similarity"],
+            route=Route(rota["tool"], rota["args"]) if rota else None,
+        )
@@ -0,0 +1,334 @@
+"""
+Pipeline de um turno do chat, independente do Streamlit.
+
+É o mesmo fluxo que a página ``0_🤖 Início.py`` executava inline: cache
+semântico → RAG híbrido → empacotamento do contexto → prompt → janela de
+histórico → roteador local → LLM (streaming ou não) com tool calls → grava
+no cache (só turnos sem histórico nem tools). A página só desenha; benchmarks e testes de carga chamam
+:meth:`ChatPipeline.run_turn` com um cliente OpenAI falso
+(``benchmarks/mock_openai.py``).
+
+Estado por conversa fica em :class:`ChatSession` (log completo + memória
+limitada); os recursos pesados (modelo, Chroma, caches) continuam únicos
+por processo (``core/resources.py``).
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from core.history import ConversationMemory, llm_summary
+from core.intent_router import ROUTER_ENABLED, Route, route
+from core.lazy import lazy_import
+from core.llm_gateway import get_llm_gateway
+from core.prompt_template import SYSTEM_MSG, build_prompt
+from core.rag_engine import CONTEXT_TOKENS, N_DOCS, get_retriever, get_semantic_cache
+from core.rag_utils import count_tokens, pack_context
+from core.semantic_cache import question_scope
+from core.streaming import ChatStream
+from core.tool_dispatcher import dispatch_tool_calls
+from core.tools import TOOLS_SPEC
+from core.tracing import span
+
+openai = lazy_import("openai")       # carregado no 1º turno, não na abertura da página
+
+CHAT_MODEL = "gpt-4o-mini"
+
+Message = dict[str, Any]
+
+
+@dataclass
+class ChatSession:
+    """Estado de uma conversa (o que antes vivia em ``st.session_state``)."""
+    msgs: list[Message]
+    memoria: ConversationMemory
+    ttft: list[float | None] = field(default_factory=list)
+
+    # -------- Serialização (API sem estado: o cliente guarda a conversa) --------
+    def to_state(self) -> dict[str, Any]:
+        """Estado em JSON: log (sem a mensagem de sistema), resumo do histórico e métricas por turno."""
+        self.memoria.flush()                         # resumo em fundo: espera com prazo
+        return {
+            "msgs": [m for m in self.msgs if m["role"] != "system"],
+            "summary": self.memoria.summary,
+            "summarized_turns": self.memoria.summarized_turns,
+            "prompt_tokens": self.memoria.prompt_tokens,
+            "ttft": self.ttft,
+        }
+
+    def load_state(self, state: dict[str, Any]) -> None:
+        """
+        Substitui o estado (no lugar) pelo de :meth:`to_state`. A mensagem de
+        sistema é sempre a deste processo — o estado vem do cliente.
+        """
+        self.msgs[:] = [
+            {"role": "system", "content": SYSTEM_MSG},
+            *(m for m in state["msgs"] if m["role"] != "system"),
+        ]
+        self.memoria.summary = state.get("summary", "")
+        self.memoria.summarized_turns = state.get("summarized_turns", 0)
+        self.memoria.prompt_tokens[:] = state.get("prompt_tokens", [])
+        self.ttft[:] = state.get("ttft", [])
+
+
+@dataclass
+class TurnResult:
+    answer: str
+    ttft: float | None              # s até o 1º token (sem streaming: resposta inteira)
+    total: float                    # s do turno completo
+    cache_hit: bool = False
+    similarity: float = 0.0
+    route: Route | None = None
+    context: str = ""               # contexto do RAG enviado à LLM
+
+
+def _usage(resp: Any) -> dict[str, Any]:
+    """Atributos de span de uma resposta não-streaming (tokens + tool calls)."""
+    u = getattr(resp, "usage", None)
+    return {
+        "model": resp.model,
+        "prompt_tokens": u.prompt_tokens if u else 0,
+        "completion_tokens": u.completion_tokens if u else 0,
+        "tool_calls": len(resp.choices[0].message.tool_calls or []),
+    }
+
+
+def _consume(stream: Iterator[str]) -> str:
+    return "".join(stream)
+
+
+class ChatPipeline:
+    """
+    Parameters
+    ----------
+    client :
+        Objeto com ``chat.completions.create``: por padrão o gateway do
+        processo (:func:`core.llm_gateway.get_llm_gateway` — pool, fila,
+        prazos e retry); nos benchmarks, o falso de ``benchmarks/mock_openai.py``.
+    model :
+        Modelo das respostas e do resumo do histórico.
+    retriever :
+        Objeto com ``invoke(pergunta, k=, query_vector=)``; padrão
+        :func:`core.rag_engine.get_retriever` (resolvido a cada turno).
+    use_semantic_cache :
+        ``False`` ignora o cache semântico (nem consulta nem grava).
+    router :
+        Liga o roteador local de intenções (``CHAT_PRONAF_ROUTER``).
+    tools :
+        Especificação das funções oferecidas à LLM.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: Any = None,
+        model: str = CHAT_MODEL,
+        retriever: Any = None,
+        use_semantic_cache: bool = True,
+        router: bool = ROUTER_ENABLED,
+        tools: list[dict[str, Any]] = TOOLS_SPEC,
+    ) -> None:
+        self.client = client if client is not None else get_llm_gateway()
+        self.model = model
+        self._retriever = retriever
+        self.use_semantic_cache = use_semantic_cache
+        self.router = router
+        self.tools = tools
+
+    def new_session(self, state: dict[str, Any] | None = None) -> ChatSession:
+        """Conversa nova (ou restaurada de ``state``); o resumo usa o mesmo cliente/modelo."""
+        resumidor = functools.partial(llm_summary, model=self.model, client=self.client)
+        sessao = ChatSession(
+            msgs=[{"role": "system", "content": SYSTEM_MSG}],
+            memoria=ConversationMemory(summarizer=resumidor, model=self.model),
+        )
+        if state is not None:
+            sessao.load_state(state)
+        return sessao
+
+    # -------- Turno --------
+    def run_turn(
+        self,
+        session: ChatSession,
+        pergunta: str,
+        *,
+        k: int = N_DOCS,
+        streaming: bool = True,
+        write_stream: Callable[[Iterator[str]], Any] = _consume,
+    ) -> TurnResult:
+        """
+        Executa um turno e atualiza ``session``.
+
+        Parameters
+        ----------
+        session :
+            Conversa (log + memória) — recebe a pergunta, as tool calls e a resposta.
+        pergunta :
+            Texto do usuário.
+        k :
+            Documentos recuperados pelo RAG.
+        streaming :
+            Respostas em streaming (:class:`~core.streaming.ChatStream`).
+        write_stream :
+            Consome cada stream de texto (ex.: ``st.write_stream``); por
+            padrão só concatena. Sem streaming e em acertos do cache, quem
+            chama exibe ``TurnResult.answer``.
+        """
+        t0 = time.perf_counter()
+        session.msgs.append({"role": "user", "content": pergunta})
+
+        # cada etapa do turno vira um span (core/tracing.py → data/traces/);
+        # a página "⏱️ Latência" mostra p50/p95/p99 por etapa
+        with span("turn", streaming=streaming, k=k) as turno:
+            # Cache semântico: pergunta parecida já respondida → devolve direto
+            cache = get_semantic_cache() if self.use_semantic_cache else None
+            achado = None
+            escopo = question_scope(pergunta)           # UFs e anos: precisam bater exatamente
+            if cache is not None:
+                with span("semantic_cache") as sp:
+                    achado = cache.lookup(pergunta, escopo)
+                    sp.set(hit=achado.hit, similarity=round(float(achado.similarity), 4))
+
+            if achado is not None and achado.hit:
+                resultado = TurnResult(
+                    achado.entry.answer, time.perf_counter() - t0, 0.0,
+                    cache_hit=True, similarity=achado.similarity,
+                )
+            else:
+                n_antes = len(session.msgs)
+                resultado = self._responder(session, pergunta, k, streaming, write_stream, t0, achado)
+                # só grava o que vale para qualquer conversa: sem turnos
+                # anteriores na janela e sem dados vindos de tools
+                usou_tools = resultado.route is not None or any(
+                    m["role"] == "tool" for m in session.msgs[n_antes:]
+                )
+                com_historico = sum(m["role"] == "user" for m in session.msgs) > 1
+                if cache is not None and not (usou_tools or com_historico):
+                    with span("cache_store"):
+                        cache.store(pergunta, resultado.answer, resultado.context,
+                                    vector=achado.vector, scope=escopo)
+
+            session.msgs.append({"role": "assistant", "content": resultado.answer})
+            session.ttft.append(resultado.ttft)
+
+            # Turnos que saíram da janela entram no resumo (em fundo, após a resposta)
+            session.memoria.compact(session.msgs)
+
+            turno.set(
+                cache_hit=resultado.cache_hit,
+                routed=resultado.route is not None,
+                ttft_ms=round(resultado.ttft * 1000, 1) if resultado.ttft is not None else -1.0,
+            )
+        resultado.total = time.perf_counter() - t0
+        return resultado
+
+    def _responder(
+        self,
+        session: ChatSession,
+        pergunta: str,
+        k: int,
+        streaming: bool,
+        write_stream: Callable[[Iterator[str]], Any],
+        t0: float,
+        achado: Any,
+    ) -> TurnResult:
+        # Recupera contexto via RAG: híbrido BM25 + vetor (core/hybrid_retriever.py);
+        # reaproveita o vetor da pergunta já calculado pelo cache semântico
+        retriever = self._retriever if self._retriever is not None else get_retriever()
+        with span("retrieval", k=k) as sp:
+            docs = retriever.invoke(pergunta, k=k, query_vector=achado.vector if achado else None)
+            sp.set(docs=len(docs))
+
+        # Funde chunks da mesma página, remove quase-duplicatas e respeita o
+        # teto de tokens (CHAT_PRONAF_CONTEXT_TOKENS)
+        with span("pack_context", budget_tokens=CONTEXT_TOKENS) as sp:
+            contexto = pack_context(docs, budget_tokens=CONTEXT_TOKENS)
+            sp.set(context_tokens=count_tokens(contexto))
+
+        # O prompt vai só na requisição deste turno; o histórico guarda a
+        # pergunta original (sem o contexto) para não inflar os turnos seguintes.
+        prompt = build_prompt(contexto, pergunta)
+
+        # Janela limitada: últimos N turnos + resumo dos anteriores, tools
+        # antigas como digest e teto de tokens por requisição
+        with span("history") as sp:
+            mensagens = session.memoria.build(session.msgs, prompt)
+            sp.set(prompt_tokens=session.memoria.prompt_tokens[-1])
+
+        # Roteador local (core/intent_router.py): pergunta de dado com UF +
+        # medida → a tool roda já, sem a chamada à LLM que só a escolheria
+        with span("router", enabled=self.router) as sp:
+            rota = route(pergunta) if self.router else None
+            sp.set(routed=rota is not None, tool=rota.tool if rota is not None else "")
+        if rota is not None:
+            chamada = rota.assistant_message()
+            novas = [chamada, *dispatch_tool_calls(chamada["tool_calls"])]
+            session.msgs.extend(novas)
+            mensagens += novas
+        ferramentas = self.tools if rota is None else None
+
+        if streaming:
+            resposta, ttft = self._streaming(session, mensagens, ferramentas, write_stream, t0)
+        else:
+            resposta = self._completo(session, mensagens, ferramentas)
+            ttft = time.perf_counter() - t0            # sem streaming: resposta inteira
+
+        return TurnResult(
+            resposta, ttft, 0.0,
+            similarity=achado.similarity if achado else 0.0, route=rota, context=contexto,
+        )
+
+    def _streaming(
+        self,
+        session: ChatSession,
+        mensagens: list[Message],
+        ferramentas: list[dict[str, Any]] | None,
+        write_stream: Callable[[Iterator[str]], Any],
+        t0: float,
+    ) -> tuple[str, float | None]:
+        # 1ª chamada: texto sai token a token e tool calls disparam assim que
+        # seus argumentos ficam completos (core/tool_dispatcher)
+        s1 = ChatStream(mensagens, model=self.model, tools=ferramentas, started_at=t0, client=self.client)
+        with span("llm.1", stream=True):
+            write_stream(s1)
+        if not s1.tool_calls:
+            return s1.content, s1.ttft
+
+        # registra a chamada + resultados (na ordem das calls) e faz a 2ª chamada
+        novas = [s1.assistant_message(), *s1.tool_messages()]
+        session.msgs.extend(novas)
+        mensagens += novas
+        s2 = ChatStream(mensagens, model=self.model, started_at=t0, client=self.client)
+        with span("llm.2", stream=True):
+            write_stream(s2)
+        return s2.content, s1.ttft if s1.ttft is not None else s2.ttft
+
+    def _completo(
+        self,
+        session: ChatSession,
+        mensagens: list[Message],
+        ferramentas: list[dict[str, Any]] | None,
+    ) -> str:
+        with span("llm.1", stream=False) as sp:
+            resp = self.client.chat.completions.create(
+                model=self.model,
+                messages=mensagens,
+                tools=ferramentas or openai.NOT_GIVEN,       # descreve as funções
+            )
+            sp.set(**_usage(resp))
+        msg = resp.choices[0].message
+        if not msg.tool_calls:
+            return msg.content                           # respondeu sem precisar de tools
+
+        # executa as chamadas pedidas em paralelo (ex.: "SP vs RS vs MG")
+        novas = [msg.model_dump(), *dispatch_tool_calls(msg.tool_calls)]
+        session.msgs.extend(novas)
+        mensagens += novas
+        with span("llm.2", stream=False) as sp:
+            final = self.client.chat.completions.create(model=self.model, messages=mensagens)
+            sp.set(**_usage(final))
+        return final.choices[0].message.content
@@ -1,7 +1,250 @@
-import pandas as pd
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
 import streamlit as st
 
-@st.cache_data
-def load_pronaf(path: str = "data/pronaf.parquet") -> pd.DataFrame:
-    """Lê o Parquet do PRONAF com cache de Streamlit."""
-    return pd.read_parquet(path)
\ No newline at end of file
+from core.data_versions import on_swap, pronaf_path
+from core.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# layout antigo, sem versões; o arquivo servido vem de core.data_versions
+PRONAF_PATH = "data/pronaf.parquet"
+
+# "pandas" (frame em memória + cubo) ou "duckdb" (consulta o Parquet no lugar)
+PRONAF_BACKEND = os.getenv("CHAT_PRONAF_BACKEND", "pandas").lower()
+
+# colunas de baixa cardinalidade → dicionário (category)
+CATEGORICAL_COLS = ("CD_ESTADO", "SEXO_BIOLOGICO", "SAFRA")
+BENEF_COL  = "CD_CPF_CNPJ"
+BENEF_NULO = -1            # chave substituta usada para CPF/CNPJ ausente
+
+# colunas de particionamento do arquivo gerado por ``scripts.prepare_pronaf``
+PARTITION_COLS = ("CD_ESTADO", "ANO")
+
+
+# -------- Manifesto de partições --------
+def manifest_path(path: str | None = None) -> str:
+    return os.path.splitext(path or pronaf_path())[0] + ".manifest.json"
+
+@lru_cache(maxsize=4)
+def _manifest_for_version(path: str, fingerprint: str) -> dict | None:
+    try:
+        with open(manifest_path(path), encoding="utf-8") as fh:
+            man = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return man if man.get("fingerprint") == fingerprint else None
+
+def load_manifest(path: str | None = None) -> dict | None:
+    """
+    Manifesto gravado por ``scripts.prepare_pronaf``, ou ``None`` se não
+    existir ou não corresponder à versão atual do Parquet.
+    """
+    path = path or pronaf_path()
+    return _manifest_for_version(path, parquet_fingerprint(path))
+
+def row_groups_for(
+    manifest: dict,
+    ufs: Sequence[str] | None = None,
+    ano_min: int | None = None,
+    ano_max: int | None = None,
+) -> list[int]:
+    """Row groups das partições (CD_ESTADO, ANO) que atendem aos filtros."""
+    grupos: list[int] = []
+    for part in manifest["partitions"]:
+        uf, ano = part["CD_ESTADO"], part["ANO"]
+        if ufs is not None and uf not in ufs:
+            continue
+        if ano_min is not None and (ano is None or ano < ano_min):
+            continue
+        if ano_max is not None and (ano is None or ano > ano_max):
+            continue
+        grupos.extend(part["row_groups"])
+    return sorted(grupos)
+
+
+# -------- Leitura (sem cache) --------
+def read_pronaf(
+    path: str | None = None,
+    columns: Sequence[str] | None = None,
+    *,
+    ufs: Sequence[str] | None = None,
+    ano_min: int | None = None,
+    ano_max: int | None = None,
+) -> pd.DataFrame:
+    """
+    Leitura direta do Parquet, com os tipos gravados no arquivo.
+
+    Com filtros por UF/ano só as partições necessárias são lidas: pelo
+    manifesto (row groups exatos) quando ele existe; senão pelos filtros do
+    pyarrow, que pulam row groups pelas estatísticas gravadas.
+    ``path=None`` lê o Parquet da versão ativa.
+    """
+    path = path or pronaf_path()
+    cols = list(columns) if columns else None
+    if ufs is None and ano_min is None and ano_max is None:
+        return pd.read_parquet(path, columns=cols)
+
+    man = load_manifest(path)
+    if man is not None:
+        import pyarrow.parquet as pq
+
+        grupos = row_groups_for(man, ufs, ano_min, ano_max)
+        return pq.ParquetFile(path).read_row_groups(grupos, columns=cols).to_pandas()
+
+    filtros = []
+    if ufs is not None:
+        filtros.append(("CD_ESTADO", "in", list(ufs)))
+    if ano_min is not None:
+        filtros.append(("ANO", ">=", int(ano_min)))
+    if ano_max is not None:
+        filtros.append(("ANO", "<=", int(ano_max)))
+    df = pd.read_parquet(path, columns=cols, filters=filtros)
+    return df.reset_index(drop=True)
+
+
+def _narrow_float(s: pd.Series) -> pd.Series:
+    """``float32`` se a conversão preservar os centavos; senão mantém ``float64``."""
+    s = pd.to_numeric(s, errors="coerce")
+    s32 = s.astype(np.float32)
+    erro = np.nanmax(np.abs(s32.to_numpy(np.float64) - s.to_numpy(np.float64)), initial=0.0)
+    return s32 if erro < 0.005 else s.astype(np.float64)
+
+
+def read_pronaf_compact(
+    path: str | None = None,
+    columns: Sequence[str] | None = None,
+    **filtros,
+) -> pd.DataFrame:
+    """
+    Leitura do Parquet em layout compacto.
+
+    - ``CD_ESTADO``, ``SEXO_BIOLOGICO`` e ``SAFRA`` viram ``category``;
+    - ``CD_CPF_CNPJ`` vira chave substituta ``int32`` (``BENEF_NULO`` p/ nulos),
+      válida dentro desta carga — serve para contar, não para identificar;
+    - ``ANO`` usa o menor inteiro que comporta os valores (``int16``);
+    - ``VL_PARC_CREDITO`` usa ``float32`` quando não há perda de centavos.
+
+    Parameters
+    ----------
+    path :
+        Caminho do Parquet (``None`` = versão ativa).
+    columns :
+        Colunas a ler (projeção feita pelo próprio leitor Parquet).
+        ``None`` lê todas.
+    **filtros :
+        ``ufs``, ``ano_min``, ``ano_max`` — repassados a :func:`read_pronaf`.
+    """
+    df = read_pronaf(path, columns, **filtros)
+
+    for col in CATEGORICAL_COLS:
+        if col in df:
+            df[col] = df[col].astype("category")
+
+    if BENEF_COL in df:
+        codes, _ = pd.factorize(df[BENEF_COL])
+        df[BENEF_COL] = codes.astype(np.int32)
+
+    if "ANO" in df:
+        df["ANO"] = pd.to_numeric(df["ANO"], downcast="integer")
+
+    if "VL_PARC_CREDITO" in df:
+        df["VL_PARC_CREDITO"] = _narrow_float(df["VL_PARC_CREDITO"])
+
+    return df
+
+
+# -------- Carga com cache de Streamlit --------
+# chave = (arquivo, colunas, partições); o teto evita acumular recortes —
+# a consulta colunar recorta o frame do índice de filtros, não passa por aqui
+_Particoes = tuple[tuple[str, ...] | None, int | None, int | None]
+
+@st.cache_data(max_entries=4)
+def _load_raw(path: str, columns: tuple[str, ...] | None, parts: _Particoes) -> pd.DataFrame:
+    ufs, ano_min, ano_max = parts
+    return read_pronaf(path, columns, ufs=ufs, ano_min=ano_min, ano_max=ano_max)
+
+@st.cache_resource(max_entries=4)
+def _load_compact(path: str, columns: tuple[str, ...] | None, parts: _Particoes) -> pd.DataFrame:
+    # cache_resource: uma única instância por processo, sem cópia por rerun
+    ufs, ano_min, ano_max = parts
+    return read_pronaf_compact(path, columns, ufs=ufs, ano_min=ano_min, ano_max=ano_max)
+
+def load_pronaf(
+    path: str | None = None,
+    columns: Sequence[str] | None = None,
+    compact: bool = False,
+    *,
+    ufs: Sequence[str] | None = None,
+    ano_min: int | None = None,
+    ano_max: int | None = None,
+) -> pd.DataFrame:
+    """
+    Lê o Parquet do PRONAF com cache de Streamlit.
+
+    Com ``compact=True`` devolve o layout de :func:`read_pronaf_compact`,
+    compartilhado entre sessões — trate-o como somente leitura.
+    ``ufs``/``ano_min``/``ano_max`` restringem a leitura às partições
+    necessárias (ver :func:`read_pronaf`).
+    """
+    path = path or pronaf_path()
+    cols = tuple(columns) if columns else None
+    parts = (
+        tuple(sorted(ufs)) if ufs is not None else None,
+        int(ano_min) if ano_min is not None else None,
+        int(ano_max) if ano_max is not None else None,
+    )
+    if compact:
+        return _load_compact(path, cols, parts)
+    return _load_raw(path, cols, parts)
+
+
+def _clear_caches() -> None:
+    # recortes da versão anterior; os da nova seguem vivos nos objetos
+    # derivados (índice, cubo) que já os referenciam
+    _load_raw.clear()
+    _load_compact.clear()
+    _manifest_for_version.cache_clear()
+
+on_swap("data_loader", _clear_caches)
+
+
+# -------- Versão do arquivo --------
+@lru_cache(maxsize=16)
+def _hash_file(path: str, size: int, mtime_ns: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for bloco in iter(lambda: fh.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()[:16]
+
+def parquet_fingerprint(path: str | None = None) -> str:
+    """
+    Identificador da versão do arquivo: ``<mtime_ns>-<sha256[:16]>``.
+
+    O hash do conteúdo só é recalculado quando tamanho ou mtime mudam.
+    """
+    path = path or pronaf_path()
+    st_ = os.stat(path)
+    return f"{st_.st_mtime_ns}-{_hash_file(path, st_.st_size, st_.st_mtime_ns)}"
+
+def dir_fingerprint(path: str) -> str:
+    """
+    Identificador barato da versão de um diretório (ex.: ``persist_directory``
+    do Chroma): maior mtime, soma dos tamanhos e nº de arquivos.
+    """
+    mtime, total, n = 0, 0, 0
+    for raiz, _, arquivos in os.walk(path):
+        for nome in arquivos:
+            st_ = os.stat(os.path.join(raiz, nome))
+            mtime = max(mtime, st_.st_mtime_ns)
+            total += st_.st_size
+            n += 1
+    return f"{mtime}-{total}-{n}"
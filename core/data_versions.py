@@ -0,0 +1,219 @@
+"""
+Versões publicadas dos dados: Parquet do PRONAF + base vetorial do MCR.
+
+Cada extração do BCB / edição do MCR vira um diretório imutável, publicado
+por ``python -m scripts.publish_data_version``::
+
+    data/versions/
+        CURRENT                  nome da versão ativa (trocado com os.replace)
+        2026-10/
+            manifest.json        versão, origem, criação, fingerprints, caminhos
+            pronaf.parquet       (+ pronaf.manifest.json / pronaf.cube.npz)
+            persist_directory/   coleção do Chroma
+            vector_index/        índice NumPy (opcional)
+            bm25_index.pkl       criado na 1ª carga
+
+Sem ``data/versions/CURRENT`` vale o layout antigo, de caminhos fixos
+(:data:`core.data_loader.PRONAF_PATH`, :data:`core.rag_engine.PERSIST_DIR`).
+
+Este módulo só guarda **qual** versão está ativa (:func:`active_version`,
+:func:`pronaf_path`…); quem carrega a nova em background e a troca sem
+derrubar o serviço é :mod:`core.hot_swap`. Os caches derivados dos dados se
+inscrevem aqui: :func:`version_cache` para objetos grandes por arquivo
+(índice de filtros, cubo) e :func:`on_swap` para os demais.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+DATA_DIR     = os.getenv("CHAT_PRONAF_DATA_DIR", "data")
+VERSIONS_DIR = os.path.join(DATA_DIR, "versions")
+CURRENT_FILE = os.path.join(VERSIONS_DIR, "CURRENT")
+MANIFEST     = "manifest.json"
+LEGACY       = "(fixo)"          # nome da "versão" do layout sem diretórios
+
+T = TypeVar("T")
+
+
+# -------- Versão --------
+@dataclass(frozen=True)
+class DataVersion:
+    """Caminhos de uma versão dos dados (``manifest`` como gravado no disco)."""
+
+    name: str
+    parquet_path: str
+    persist_dir: str
+    vector_index_dir: str
+    bm25_path: str
+    manifest: dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def legacy(cls) -> DataVersion:
+        # importados aqui: esses módulos dependem deste
+        from core.data_loader import PRONAF_PATH
+        from core.rag_engine import BM25_PATH, PERSIST_DIR
+        from core.vector_index import INDEX_DIR
+
+        return cls(LEGACY, PRONAF_PATH, PERSIST_DIR, INDEX_DIR, BM25_PATH)
+
+    @classmethod
+    def load(cls, name: str) -> DataVersion:
+        """Lê ``data/versions/<name>/manifest.json``; ``ValueError`` se incompleta."""
+        raiz = os.path.join(VERSIONS_DIR, name)
+        try:
+            with open(os.path.join(raiz, MANIFEST), encoding="utf-8") as fh:
+                man = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise ValueError(f"Versão {name!r} sem manifesto válido: {exc}") from exc
+
+        v = cls(
+            name,
+            os.path.join(raiz, man["parquet"]),
+            os.path.join(raiz, man["persist_dir"]),
+            os.path.join(raiz, man.get("vector_index") or "vector_index"),
+            os.path.join(raiz, "bm25_index.pkl"),
+            man,
+        )
+        faltando = [p for p in (v.parquet_path, v.persist_dir) if not os.path.exists(p)]
+        if faltando:
+            raise ValueError(f"Versão {name!r} incompleta: falta {', '.join(faltando)}")
+        return v
+
+
+def list_versions() -> list[str]:
+    """Versões publicadas (diretórios com manifesto), em ordem de nome."""
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    return sorted(
+        d for d in os.listdir(VERSIONS_DIR)
+        if os.path.isfile(os.path.join(VERSIONS_DIR, d, MANIFEST))
+    )
+
+
+def read_current() -> str | None:
+    """Nome gravado em ``CURRENT`` (``None`` = layout antigo)."""
+    try:
+        with open(CURRENT_FILE, encoding="utf-8") as fh:
+            return fh.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_current(name: str) -> None:
+    """Aponta ``CURRENT`` para ``name`` de forma atômica (tmp + ``os.replace``)."""
+    DataVersion.load(name)                           # não aponta para versão quebrada
+    tmp = f"{CURRENT_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(name + "\n")
+    os.replace(tmp, CURRENT_FILE)
+
+
+def resolve(name: str | None) -> DataVersion:
+    return DataVersion.legacy() if name in (None, LEGACY) else DataVersion.load(name)
+
+
+# -------- Versão ativa do processo --------
+_ACTIVE: DataVersion | None = None
+_ACTIVE_LOCK = threading.Lock()
+
+
+def active_version() -> DataVersion:
+    """
+    Versão servida por este processo. Na 1ª chamada vem de ``CURRENT``
+    (ou do layout antigo); depois só muda por :func:`set_active`.
+    """
+    global _ACTIVE
+    v = _ACTIVE
+    if v is not None:
+        return v
+    with _ACTIVE_LOCK:
+        if _ACTIVE is None:
+            _ACTIVE = resolve(read_current())
+        return _ACTIVE
+
+
+def set_active(version: DataVersion) -> DataVersion:
+    """Troca a versão ativa (uma atribuição) e devolve a anterior."""
+    global _ACTIVE
+    with _ACTIVE_LOCK:
+        anterior = _ACTIVE if _ACTIVE is not None else resolve(read_current())
+        _ACTIVE = version
+    return anterior
+
+
+def pronaf_path() -> str:
+    return active_version().parquet_path
+
+
+def persist_dir() -> str:
+    return active_version().persist_dir
+
+
+# -------- Caches derivados --------
+_VERSION_CACHES: list[Any] = []
+_HOOKS: dict[str, Callable[[], None]] = {}
+
+
+def version_cache(fn: Callable[[str, str], T]) -> Callable[[str, str], T]:
+    """
+    Memoiza ``fn(path, fingerprint)`` com **uma entrada por arquivo**: versão
+    nova do mesmo arquivo substitui a antiga, e :func:`release_stale` solta
+    a de arquivos que deixaram de ser o ativo. Troca o ``lru_cache(maxsize=2)``
+    dos objetos grandes, que seguraria a versão velha até a próxima troca.
+    """
+    cache: dict[str, tuple[str, T]] = {}
+    lock = threading.Lock()
+
+    @functools.wraps(fn)
+    def wrapper(path: str, fingerprint: str) -> T:
+        atual = cache.get(path)
+        if atual is not None and atual[0] == fingerprint:
+            return atual[1]
+        valor = fn(path, fingerprint)                # fora do lock, como o lru_cache
+        with lock:
+            cache[path] = (fingerprint, valor)
+        return valor
+
+    def has(path: str) -> bool:
+        return path in cache
+
+    def retain(paths: set[str]) -> int:
+        with lock:
+            velhos = [p for p in cache if p not in paths]
+            for p in velhos:
+                del cache[p]
+        return len(velhos)
+
+    wrapper.has = has                                # type: ignore[attr-defined]
+    wrapper.retain = retain                          # type: ignore[attr-defined]
+    wrapper.cache_clear = cache.clear                # type: ignore[attr-defined]
+    _VERSION_CACHES.append(wrapper)
+    return wrapper
+
+
+def on_swap(name: str, fn: Callable[[], None]) -> None:
+    """Registra ``fn`` para rodar logo após cada troca de versão."""
+    _HOOKS[name] = fn
+
+
+def release_stale() -> list[str]:
+    """
+    Solta tudo o que foi derivado de versões inativas: entradas de
+    :func:`version_cache` de outros arquivos e os caches de :func:`on_swap`.
+    Devolve os nomes do que foi invalidado.
+    """
+    ativo = {active_version().parquet_path}
+    feitos = [
+        f"{c.__module__}.{c.__name__}" for c in _VERSION_CACHES if c.retain(ativo)
+    ]
+    for nome, fn in _HOOKS.items():
+        fn()
+        feitos.append(nome)
+    return feitos
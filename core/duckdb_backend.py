@@ -0,0 +1,260 @@
+"""
+Backend DuckDB: consultas direto sobre ``data/pronaf.parquet``.
+
+Com ``CHAT_PRONAF_BACKEND=duckdb`` as tools e o Painel deixam de carregar o
+Parquet inteiro no pandas de cada processo. O DuckDB lê o arquivo no lugar:
+
+- projeções e filtros são empurrados para o leitor Parquet, que pula
+  *row groups* pelas estatísticas (min/max) das colunas;
+- a execução é vetorizada e multi-thread (``CHAT_PRONAF_DUCKDB_THREADS``);
+- uma única conexão por processo (registro de recursos) — o buffer do
+  DuckDB é compartilhado por todas as sessões; cada chamada usa seu próprio
+  cursor, então threads diferentes podem consultar ao mesmo tempo.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from functools import lru_cache
+from typing import Any
+
+from core.data_loader import parquet_fingerprint
+from core.data_versions import on_swap, pronaf_path
+from core.filter_index import FilterResult, PronafFilterIndex
+from core.lazy import lazy_import
+from core.resources import get_resource, register_resource
+
+pd = lazy_import("pandas")
+
+DUCKDB_THREADS = int(os.getenv("CHAT_PRONAF_DUCKDB_THREADS", str(os.cpu_count() or 2)))
+DUCKDB_MEMORY  = os.getenv("CHAT_PRONAF_DUCKDB_MEMORY", "")      # ex.: "1GB"
+
+
+def _connect():
+    import duckdb
+
+    con = duckdb.connect(database=":memory:")
+    con.execute(f"SET threads TO {DUCKDB_THREADS}")
+    if DUCKDB_MEMORY:
+        con.execute(f"SET memory_limit = '{DUCKDB_MEMORY}'")
+    return con
+
+register_resource("duckdb", _connect)
+
+
+def _source(path: str | None, row_numbers: bool = False) -> str:
+    extra = ", file_row_number = true" if row_numbers else ""
+    return "read_parquet('{}'{})".format((path or pronaf_path()).replace("'", "''"), extra)
+
+
+def query_df(sql: str, params: Sequence[Any] = ()) -> pd.DataFrame:
+    """Executa ``sql`` num cursor próprio da conexão compartilhada."""
+    cur = get_resource("duckdb").cursor()
+    try:
+        return cur.execute(sql, list(params)).df()
+    finally:
+        cur.close()
+
+
+def _where(
+    ufs: Iterable[str] | None = None,
+    ano_min: int | None = None,
+    ano_max: int | None = None,
+    sexos: Iterable[str] | None = None,
+    safras: Iterable[str] | None = None,
+) -> tuple[str, list[Any]]:
+    conds: list[str] = []
+    params: list[Any] = []
+
+    def _in(col: str, valores: Iterable[Any] | None) -> None:
+        if valores is None:
+            return
+        valores = list(valores)
+        if not valores:
+            conds.append("FALSE")
+            return
+        conds.append(f"{col} IN ({', '.join('?' * len(valores))})")
+        params.extend(valores)
+
+    _in("CD_ESTADO", ufs)
+    if ano_min is not None:
+        conds.append("ANO >= ?")
+        params.append(int(ano_min))
+    if ano_max is not None:
+        conds.append("ANO <= ?")
+        params.append(int(ano_max))
+    _in("SEXO_BIOLOGICO", sexos)
+    _in("SAFRA", safras)
+    return ("WHERE " + " AND ".join(conds)) if conds else "", params
+
+
+def aggregate(
+    dims: Sequence[str] = (),
+    *,
+    path: str | None = None,
+    **filtros: Any,
+) -> pd.DataFrame:
+    """
+    Soma, contagem e contagem distinta agrupadas por ``dims``.
+
+    ``dims`` deve vir de uma lista fechada (ex.: ``query_engine.DIMENSOES``);
+    valores de filtro sempre vão como parâmetros.
+    """
+    where, params = _where(**filtros)
+    cols = ", ".join(dims)
+    select_dims = f"{cols}, " if dims else ""
+    group = f"GROUP BY {cols} ORDER BY {cols}" if dims else ""
+    sql = f"""
+        SELECT {select_dims}
+               SUM(VL_PARC_CREDITO)::DOUBLE      AS credito_total,
+               COUNT(CD_CPF_CNPJ)                AS operacoes,
+               COUNT(DISTINCT CD_CPF_CNPJ)       AS beneficiarios
+        FROM {_source(path)}
+        {where}
+        {group}
+    """
+    res = query_df(sql, params)
+    if not dims:                                     # SUM de conjunto vazio = NULL
+        res["credito_total"] = res["credito_total"].fillna(0.0)
+    return res
+
+
+def resumo_estado(cd_estado: str, path: str | None = None) -> pd.DataFrame:
+    """Mesmo formato de ``PronafCube.resumo_estado``."""
+    res = aggregate(["ANO", "SEXO_BIOLOGICO"], path=path, ufs=[cd_estado.upper()])
+    return res.rename(columns={
+        "credito_total": "Soma_VL_PARC_CREDITO",
+        "operacoes": "Quantidade_Operacoes",
+        "beneficiarios": "Quantidade_Beneficiarios",
+    })
+
+
+@lru_cache(maxsize=32)
+def _distintos(col: str, path: str, fingerprint: str) -> tuple[Any, ...]:
+    res = query_df(
+        f"SELECT DISTINCT {col} AS v FROM {_source(path)} WHERE {col} IS NOT NULL ORDER BY 1"
+    )
+    return tuple(res["v"].tolist())
+
+def distinct_values(col: str, path: str | None = None) -> list[Any]:
+    """Valores distintos de uma coluna (opções dos filtros do Painel), memorizados."""
+    path = path or pronaf_path()
+    return list(_distintos(col, path, parquet_fingerprint(path)))
+
+
+def _select_rows(
+    columns: Sequence[str],
+    path: str,
+    order_by: str | None,
+    descending: bool,
+    filtros: dict[str, Any],
+) -> tuple[str, list[Any]]:
+    if order_by is not None and order_by not in columns:
+        raise ValueError(f"Ordenação por coluna fora da seleção: {order_by!r}")
+    where, params = _where(**filtros)
+    # posição no arquivo desempata (e ordena sem order_by): páginas estáveis
+    # entre consultas e a mesma ordem do backend pandas (argsort estável;
+    # decrescente = inverso do crescente)
+    sentido = "DESC" if descending else "ASC"
+    chaves = [f"{order_by} {sentido}"] if order_by else []
+    ordem = "ORDER BY " + ", ".join([*chaves, f"file_row_number {sentido}"])
+    return f"SELECT {', '.join(columns)} FROM {_source(path, row_numbers=True)} {where} {ordem}", params
+
+
+def rows(
+    columns: Sequence[str],
+    *,
+    path: str | None = None,
+    limit: int = 1000,
+    offset: int = 0,
+    order_by: str | None = None,
+    descending: bool = False,
+    **filtros: Any,
+) -> pd.DataFrame:
+    """
+    Linhas brutas filtradas, ordenadas e paginadas no próprio DuckDB.
+
+    ``columns`` e ``order_by`` devem vir de uma lista fechada; ``order_by``
+    precisa estar entre as ``columns``.
+    """
+    sql, params = _select_rows(columns, path, order_by, descending, filtros)
+    return query_df(f"{sql} LIMIT {int(limit)} OFFSET {int(offset)}", params)
+
+
+def iter_csv(
+    columns: Sequence[str],
+    *,
+    path: str | None = None,
+    order_by: str | None = None,
+    descending: bool = False,
+    chunk_rows: int = 100_000,
+    **filtros: Any,
+) -> Iterator[str]:
+    """CSV do filtro inteiro, lido em lotes Arrow de ``chunk_rows`` linhas."""
+    sql, params = _select_rows(columns, path, order_by, descending, filtros)
+    cur = get_resource("duckdb").cursor()
+    try:
+        leitor = cur.execute(sql, params).fetch_record_batch(chunk_rows)
+        yield ",".join(columns) + "\n"
+        for lote in leitor:
+            yield lote.to_pandas().to_csv(index=False, header=False)
+    finally:
+        cur.close()
+
+
+@lru_cache(maxsize=128)
+def _contagem(key: tuple, path: str, fingerprint: str) -> int:
+    uf, ano_min, ano_max, sexos = key
+    where, params = _where(ufs=None if uf is None else [uf], ano_min=ano_min,
+                           ano_max=ano_max, sexos=sexos)
+    return int(query_df(f"SELECT COUNT(*) AS n FROM {_source(path)} {where}", params)["n"].iloc[0])
+
+def count_rows(
+    cd_estado: str | None,
+    ano_min: int,
+    ano_max: int,
+    sexos: Iterable[str],
+    path: str | None = None,
+) -> int:
+    """Nº de linhas do filtro do Painel (memorizado, como :func:`painel`)."""
+    key = PronafFilterIndex.key(cd_estado, ano_min, ano_max, sexos)
+    path = path or pronaf_path()
+    return _contagem(key, path, parquet_fingerprint(path))
+
+
+@lru_cache(maxsize=128)
+def _painel(key: tuple, path: str, fingerprint: str) -> FilterResult:
+    uf, ano_min, ano_max, sexos = key
+    filtros = dict(ufs=None if uf is None else [uf], ano_min=ano_min, ano_max=ano_max, sexos=sexos)
+    tot = aggregate(path=path, **filtros).iloc[0]
+    por_ano = aggregate(["ANO"], path=path, **filtros)
+    por_sexo = aggregate(["SEXO_BIOLOGICO"], path=path, **filtros)
+    return FilterResult(
+        rows=None,
+        credito=float(tot["credito_total"]),
+        operacoes=int(tot["operacoes"]),
+        beneficiarios=int(tot["beneficiarios"]),
+        por_ano=por_ano[["ANO", "credito_total"]].rename(columns={"credito_total": "Crédito"}),
+        por_sexo=por_sexo[["SEXO_BIOLOGICO", "credito_total"]].rename(columns={"credito_total": "Crédito"}),
+    )
+
+def painel(
+    cd_estado: str | None,
+    ano_min: int,
+    ano_max: int,
+    sexos: Iterable[str],
+    path: str | None = None,
+) -> FilterResult:
+    """KPIs + séries do Painel via DuckDB (``rows`` fica ``None``), memorizados."""
+    key = PronafFilterIndex.key(cd_estado, ano_min, ano_max, sexos)
+    path = path or pronaf_path()
+    return _painel(key, path, parquet_fingerprint(path))
+
+
+def _clear_caches() -> None:
+    _distintos.cache_clear()
+    _contagem.cache_clear()
+    _painel.cache_clear()
+
+on_swap("duckdb_backend", _clear_caches)
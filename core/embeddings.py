@@ -0,0 +1,211 @@
+"""
+Backends de embedding do RAG, plugáveis por ``CHAT_PRONAF_EMBED_BACKEND``.
+
+- ``torch`` (padrão): ``HuggingFaceEmbeddings`` — PyTorch FP32 em CPU;
+- ``onnx``: o mesmo modelo exportado para ONNX e quantizado em int8
+  (``python -m scripts.export_onnx``), rodando no ONNX Runtime — sem
+  importar o PyTorch, carga e codificação bem mais rápidas em CPU.
+
+Os dois produzem vetores normalizados no mesmo espaço (mean pooling +
+L2), então a coleção do Chroma não precisa ser reembedada; a diferença de
+recall@k é medida por ``python -m benchmarks.bench_embeddings``.
+
+Em qualquer backend, :class:`BatchedEmbeddings` junta as ``embed_query``
+concorrentes de várias sessões num único lote (*micro-batching*).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBED_BACKEND     = os.getenv("CHAT_PRONAF_EMBED_BACKEND", "torch").lower()
+ONNX_DIR          = os.getenv("CHAT_PRONAF_ONNX_DIR", "data/models/all-mpnet-base-v2-int8")
+ONNX_THREADS      = int(os.getenv("CHAT_PRONAF_ONNX_THREADS", "0"))       # 0 = automático
+EMBED_MICROBATCH  = os.getenv("CHAT_PRONAF_EMBED_MICROBATCH", "1") == "1"
+EMBED_MAX_BATCH   = int(os.getenv("CHAT_PRONAF_EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("CHAT_PRONAF_EMBED_MAX_WAIT_MS", "0"))
+
+
+# -------- ONNX --------
+class OnnxEmbeddings(Embeddings):
+    """
+    Embeddings de um *sentence-transformer* exportado para ONNX.
+
+    Parameters
+    ----------
+    model_dir :
+        Diretório gerado por ``scripts.export_onnx`` (``embed_config.json``,
+        ``tokenizer.json`` e o ``.onnx``).
+    batch_size :
+        Textos por execução em ``embed_documents``.
+    threads :
+        ``intra_op_num_threads`` do ONNX Runtime (0 = automático).
+    """
+
+    def __init__(self, model_dir: str = ONNX_DIR, *, batch_size: int = 32, threads: int = ONNX_THREADS) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, "embed_config.json"), encoding="utf-8") as fh:
+            self.config = json.load(fh)
+        self.batch_size = batch_size
+
+        self._tok = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tok.enable_truncation(max_length=self.config["max_length"])
+        pad = self.config.get("pad_token", "<pad>")
+        self._tok.enable_padding(pad_id=self._tok.token_to_id(pad) or 0, pad_token=pad)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+        self._session = ort.InferenceSession(
+            os.path.join(model_dir, self.config["onnx_file"]),
+            sess_options=opts,
+            providers=["CPUExecutionProvider"],
+        )
+        self._inputs = {i.name for i in self._session.get_inputs()}
+
+    def _encode(self, textos: Sequence[str]) -> np.ndarray:
+        encs = self._tok.encode_batch(list(textos))
+        ids = np.asarray([e.ids for e in encs], dtype=np.int64)
+        mask = np.asarray([e.attention_mask for e in encs], dtype=np.int64)
+        feed = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feed["token_type_ids"] = np.zeros_like(ids)
+        hidden = self._session.run(None, feed)[0]                  # [lote, seq, dim]
+
+        m = mask[..., None].astype(np.float32)
+        vec = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+        if self.config.get("normalize", True):
+            vec /= np.clip(np.linalg.norm(vec, axis=1, keepdims=True), 1e-12, None)
+        return vec
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        # lotes por comprimento parecido → menos padding
+        ordem = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        partes = []
+        for i in range(0, len(ordem), self.batch_size):
+            idx = ordem[i:i + self.batch_size]
+            partes.append((idx, self._encode([texts[j] for j in idx])))
+        saida = np.empty((len(texts), partes[0][1].shape[1]), dtype=np.float32)
+        for idx, vec in partes:
+            saida[idx] = vec
+        return saida.tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._encode([text])[0].tolist()
+
+
+# -------- Micro-batching --------
+class MicroBatcher:
+    """
+    Agrupa chamadas concorrentes de ``encode_batch`` numa thread dedicada.
+
+    Enquanto um lote está sendo codificado, os pedidos que chegam esperam na
+    fila e saem juntos no próximo. Com ``max_wait_ms=0`` um pedido sozinho
+    não espera nada; valores > 0 seguram o 1º pedido para formar lotes maiores.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[list[str]], list[list[float]]],
+        *,
+        max_batch: int = EMBED_MAX_BATCH,
+        max_wait_ms: float = EMBED_MAX_WAIT_MS,
+    ) -> None:
+        self._encode_batch = encode_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._fila: queue.Queue[tuple[str, Future]] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.batches = self.items = 0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="chat-pronaf-embed-batcher", daemon=True,
+                )
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            lote = [self._fila.get()]
+            limite = time.monotonic() + self.max_wait
+            while len(lote) < self.max_batch:
+                try:
+                    espera = limite - time.monotonic()
+                    lote.append(self._fila.get(timeout=espera) if espera > 0 else self._fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            self.batches += 1
+            self.items += len(lote)
+            try:
+                vetores = self._encode_batch([t for t, _ in lote])
+            except Exception as exc:
+                for _, fut in lote:
+                    fut.set_exception(exc)
+                continue
+            for (_, fut), vec in zip(lote, vetores):
+                fut.set_result(vec)
+
+    def submit(self, text: str) -> Future:
+        if self._thread is None:
+            self._start()
+        fut: Future = Future()
+        self._fila.put((text, fut))
+        return fut
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": self.items / self.batches if self.batches else 0.0,
+        }
+
+
+class BatchedEmbeddings(Embeddings):
+    """``embed_query`` via :class:`MicroBatcher`; ``embed_documents`` direto."""
+
+    def __init__(self, base: Embeddings, **kwargs) -> None:
+        self.base = base
+        self.batcher = MicroBatcher(base.embed_documents, **kwargs)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.batcher.submit(text).result()
+
+
+# -------- Fábrica --------
+def load_embeddings(
+    model_name: str,
+    backend: str = EMBED_BACKEND,
+    *,
+    onnx_dir: str = ONNX_DIR,
+    microbatch: bool = EMBED_MICROBATCH,
+) -> Embeddings:
+    """Backend escolhido (``torch`` | ``onnx``), com micro-batching opcional."""
+    if backend == "onnx":
+        emb: Embeddings = OnnxEmbeddings(onnx_dir)
+    elif backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        emb = HuggingFaceEmbeddings(model_name=model_name)
+    else:
+        raise ValueError(f"CHAT_PRONAF_EMBED_BACKEND inválido: {backend!r} (use 'torch' ou 'onnx')")
+    return BatchedEmbeddings(emb) if microbatch else emb
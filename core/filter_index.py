@@ -0,0 +1,307 @@
+"""
+Motor de filtros do Painel PRONAF sem cópia do DataFrame.
+
+No lugar de ``df.copy()`` + máscaras encadeadas a cada rerun, o índice é
+montado uma vez por versão do Parquet sobre o layout compacto
+(:func:`core.data_loader.load_pronaf` com ``compact=True``):
+
+- **UF** → vetor ordenado com as posições das linhas de cada estado;
+- **ANO** e **SEXO** → bitmaps (vetores booleanos) por valor.
+
+Um filtro devolve apenas o conjunto de posições (``np.ndarray``); KPIs e
+séries dos gráficos saem de ``bincount`` sobre essas posições. KPIs e
+séries são memorizados por tupla de filtros (poucos KB cada); as posições,
+até ~10 MB para "todas as UFs e anos", ficam num LRU à parte limitado em
+bytes (``CHAT_PRONAF_ROWS_CACHE_MB``) e são refeitas quando despejadas.
+
+A tabela detalhada também trabalha sobre as posições: a ordenação pedida
+vira uma permutação memorizada por (filtro, coluna, sentido), no mesmo LRU
+em bytes, e cada página é só uma fatia dela — nunca se monta o recorte
+inteiro num DataFrame.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.data_loader import (
+    BENEF_COL, BENEF_NULO, load_pronaf, parquet_fingerprint,
+)
+from core.data_versions import pronaf_path, version_cache
+from core.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# SAFRA entra para servir também a consulta colunar (core/query_engine.py)
+INDEX_COLS = ["CD_ESTADO", "ANO", "SEXO_BIOLOGICO", "SAFRA", BENEF_COL, "VL_PARC_CREDITO"]
+CSV_CHUNK_ROWS = 100_000   # linhas por pedaço na exportação CSV
+ROWS_CACHE_MB  = float(os.getenv("CHAT_PRONAF_ROWS_CACHE_MB", "64"))   # posições + permutações
+
+FilterKey = tuple[str | None, int, int, tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class FilterResult:
+    """Resultado de um filtro: agregados prontos (as posições saem de :meth:`PronafFilterIndex.rows`)."""
+    rows: np.ndarray | None      # sempre None no memo; posições só sob demanda
+    credito: float
+    operacoes: int
+    beneficiarios: int
+    por_ano: pd.DataFrame        # colunas ANO, Crédito
+    por_sexo: pd.DataFrame       # colunas SEXO_BIOLOGICO, Crédito
+    n_rows: int = 0              # nº de linhas do filtro
+
+
+class _ArrayLRU:
+    """LRU de vetores NumPy limitado pela soma de ``nbytes`` (chamar com lock)."""
+
+    def __init__(self, max_bytes: float) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._itens: OrderedDict[tuple, np.ndarray] = OrderedDict()
+
+    def get(self, key: tuple) -> np.ndarray | None:
+        arr = self._itens.get(key)
+        if arr is not None:
+            self._itens.move_to_end(key)
+        return arr
+
+    def put(self, key: tuple, arr: np.ndarray) -> None:
+        if arr.nbytes > self.max_bytes or key in self._itens:
+            return                                   # grande demais: refaz a cada uso
+        self._itens[key] = arr
+        self.nbytes += arr.nbytes
+        while self.nbytes > self.max_bytes:
+            _, velho = self._itens.popitem(last=False)
+            self.nbytes -= velho.nbytes
+
+
+class PronafFilterIndex:
+    """Índices por UF/ANO/SEXO sobre as colunas do DataFrame compacto."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        cache_size: int = 128,
+        rows_cache_mb: float = ROWS_CACHE_MB,
+    ) -> None:
+        self.df = df
+        n = len(df)
+
+        # --- UF: posições ordenadas por estado ---------------------------
+        uf = df["CD_ESTADO"].cat
+        self.ufs: list[str] = [str(c) for c in uf.categories]
+        uf_codes = uf.codes.to_numpy()
+        ordem = np.argsort(uf_codes, kind="stable").astype(np.int32)
+        limites = np.searchsorted(uf_codes[ordem], np.arange(len(self.ufs) + 1))
+        self._uf_rows = {
+            self.ufs[i]: ordem[limites[i]:limites[i + 1]]
+            for i in range(len(self.ufs))
+        }
+
+        # --- ANO e SEXO: códigos compactos + bitmaps por valor -----------
+        ano = df["ANO"].to_numpy()
+        self.anos: list[int] = sorted(int(a) for a in np.unique(ano))
+        self._ano_code = np.searchsorted(self.anos, ano).astype(np.int16)
+        self._ano_bits = {a: self._ano_code == i for i, a in enumerate(self.anos)}
+
+        sexo = df["SEXO_BIOLOGICO"].cat
+        self.sexos: list[str] = [str(c) for c in sexo.categories]
+        self._sexo_code = sexo.codes.to_numpy()
+        self._sexo_bits = {s: self._sexo_code == i for i, s in enumerate(self.sexos)}
+
+        # --- medidas (views sobre as colunas, sem cópia) ------------------
+        self._vl = df["VL_PARC_CREDITO"].to_numpy()
+        self._benef = df[BENEF_COL].to_numpy()
+        self._n_benef = int(self._benef.max()) + 1 if n else 0
+
+        self._cache: OrderedDict[FilterKey, FilterResult] = OrderedDict()
+        self._cache_size = cache_size
+        # posições por filtro e permutações por (filtro, coluna, sentido)
+        self._arrays = _ArrayLRU(rows_cache_mb * 2**20)
+        self._lock = threading.Lock()
+
+    # -------- Filtro --------
+    @staticmethod
+    def key(
+        cd_estado: str | None,
+        ano_min: int,
+        ano_max: int,
+        sexos: Iterable[str],
+    ) -> FilterKey:
+        uf = None if cd_estado in (None, "TODOS") else cd_estado.upper()
+        return (uf, int(ano_min), int(ano_max), tuple(sorted(sexos)))
+
+    def _bits(self, bitmaps: dict, valores: Iterable) -> np.ndarray:
+        acc = np.zeros(len(self.df), dtype=bool)
+        for v in valores:
+            if v in bitmaps:
+                acc |= bitmaps[v]
+        return acc
+
+    def rows(self, key: FilterKey) -> np.ndarray:
+        """Posições (ordenadas) das linhas que atendem ao filtro ``key`` (LRU em bytes)."""
+        with self._lock:
+            res = self._arrays.get(("rows", key))
+        if res is None:
+            res = self._rows(key)
+            with self._lock:
+                self._arrays.put(("rows", key), res)
+        return res
+
+    def _rows(self, key: FilterKey) -> np.ndarray:
+        uf, ano_min, ano_max, sexos = key
+        anos = [a for a in self.anos if ano_min <= a <= ano_max]
+        ok = self._bits(self._ano_bits, anos) & self._bits(self._sexo_bits, sexos)
+
+        if uf is None:
+            return np.flatnonzero(ok).astype(np.int32)
+        cand = self._uf_rows.get(uf, np.empty(0, dtype=np.int32))
+        return cand[ok[cand]]
+
+    def select(
+        self,
+        ufs: Iterable[str] | None = None,
+        ano_min: int | None = None,
+        ano_max: int | None = None,
+    ) -> np.ndarray:
+        """
+        Posições (ordenadas) das partições UF × ANO pedidas — o recorte que
+        ``load_pronaf(ufs=, ano_min=, ano_max=)`` leria, sem nova cópia do Parquet.
+        """
+        vazio = np.empty(0, dtype=np.int32)
+        if ufs is None:
+            pos = np.arange(len(self.df), dtype=np.int32)
+        else:
+            pos = np.sort(np.concatenate([self._uf_rows.get(u.upper(), vazio) for u in ufs] or [vazio]))
+        if ano_min is not None or ano_max is not None:
+            lo = np.searchsorted(self.anos, ano_min, "left") if ano_min is not None else 0
+            hi = np.searchsorted(self.anos, ano_max, "right") if ano_max is not None else len(self.anos)
+            cod = self._ano_code[pos]
+            pos = pos[(cod >= lo) & (cod < hi)]
+        return pos
+
+    # -------- Agregados --------
+    def _aggregate(self, rows: np.ndarray) -> FilterResult:
+        vl = self._vl[rows].astype(np.float64)
+        benef = self._benef[rows]
+        validos = benef[benef != BENEF_NULO]
+
+        vistos = np.zeros(self._n_benef, dtype=bool)
+        vistos[validos] = True
+
+        por_ano = np.bincount(self._ano_code[rows], weights=vl, minlength=len(self.anos))
+        por_sexo = np.bincount(self._sexo_code[rows], weights=vl, minlength=len(self.sexos))
+        presentes_ano = np.bincount(self._ano_code[rows], minlength=len(self.anos)) > 0
+        presentes_sexo = np.bincount(self._sexo_code[rows], minlength=len(self.sexos)) > 0
+
+        return FilterResult(
+            rows=None,
+            credito=float(vl.sum()),
+            operacoes=int(validos.size),
+            beneficiarios=int(vistos.sum()),
+            por_ano=pd.DataFrame({
+                "ANO": np.asarray(self.anos)[presentes_ano],
+                "Crédito": por_ano[presentes_ano],
+            }),
+            por_sexo=pd.DataFrame({
+                "SEXO_BIOLOGICO": np.asarray(self.sexos, dtype=object)[presentes_sexo],
+                "Crédito": por_sexo[presentes_sexo],
+            }),
+            n_rows=int(rows.size),
+        )
+
+    def query(
+        self,
+        cd_estado: str | None,
+        ano_min: int,
+        ano_max: int,
+        sexos: Iterable[str],
+    ) -> FilterResult:
+        """Filtra e agrega, memorizando o resultado por tupla de filtros (LRU)."""
+        return self.result(self.key(cd_estado, ano_min, ano_max, sexos))
+
+    def result(self, key: FilterKey) -> FilterResult:
+        """Como :meth:`query`, a partir da chave de :meth:`key`."""
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        res = self._aggregate(self.rows(key))
+
+        with self._lock:
+            self._cache[key] = res
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return res
+
+    # -------- Tabela detalhada --------
+    def _sort_values(self, col: str) -> np.ndarray:
+        s = self.df[col]
+        # categorias já vêm em ordem alfabética: ordenar pelos códigos basta
+        return s.cat.codes.to_numpy() if isinstance(s.dtype, pd.CategoricalDtype) else s.to_numpy()
+
+    def sorted_rows(self, key: FilterKey, sort_by: str | None = None, descending: bool = False) -> np.ndarray:
+        """Posições do filtro na ordem pedida (memorizadas: paginar é fatiar)."""
+        rows = self.rows(key)
+        if sort_by is None:
+            return rows[::-1] if descending else rows
+        ck = ("sorted", key, sort_by, descending)
+        with self._lock:
+            res = self._arrays.get(ck)
+        if res is not None:
+            return res
+
+        ordem = np.argsort(self._sort_values(sort_by)[rows], kind="stable")
+        res = rows[ordem[::-1] if descending else ordem]
+
+        with self._lock:
+            self._arrays.put(ck, res)
+        return res
+
+    def page(
+        self,
+        key: FilterKey,
+        columns: Sequence[str],
+        *,
+        offset: int = 0,
+        limit: int = 100,
+        sort_by: str | None = None,
+        descending: bool = False,
+    ) -> pd.DataFrame:
+        """Só as linhas ``[offset, offset + limit)`` do filtro, já ordenadas."""
+        pos = self.sorted_rows(key, sort_by, descending)[offset:offset + limit]
+        return self.df.iloc[pos][list(columns)].reset_index(drop=True)
+
+    def iter_csv(
+        self,
+        key: FilterKey,
+        columns: Sequence[str],
+        *,
+        sort_by: str | None = None,
+        descending: bool = False,
+        chunk_rows: int = CSV_CHUNK_ROWS,
+    ) -> Iterator[str]:
+        """CSV do filtro inteiro em pedaços de ``chunk_rows`` linhas (cabeçalho no 1º)."""
+        pos = self.sorted_rows(key, sort_by, descending)
+        yield ",".join(columns) + "\n"
+        for i in range(0, len(pos), chunk_rows):
+            yield self.df.iloc[pos[i:i + chunk_rows]][list(columns)].to_csv(index=False, header=False)
+
+
+@version_cache
+def _index_for_version(path: str, fingerprint: str) -> PronafFilterIndex:
+    return PronafFilterIndex(load_pronaf(path, columns=INDEX_COLS, compact=True))
+
+
+def load_filter_index(path: str | None = None) -> PronafFilterIndex:
+    """Índice da versão atual do Parquet (um por processo)."""
+    path = path or pronaf_path()
+    return _index_for_version(path, parquet_fingerprint(path))
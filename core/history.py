@@ -0,0 +1,266 @@
+"""
+Memória de conversa com tamanho limitado.
+
+``ChatSession.msgs`` (``core/chat_pipeline.py``) continua sendo o log
+completo (é ele que a página desenha), mas o que vai para a LLM é montado
+por :class:`ConversationMemory`:
+
+- os últimos ``keep_turns`` turnos seguem na íntegra;
+- turnos mais antigos viram um resumo corrido (mensagem ``system``),
+  atualizado depois de cada resposta numa *thread* de fundo — o resumo
+  novo entra no ``build`` seguinte e, até lá, os turnos pendentes seguem
+  na íntegra;
+- resultados de tools de turnos anteriores são trocados por digests curtos;
+- um teto de tokens por requisição é respeitado descartando os turnos
+  verbatim mais antigos;
+- o nº de tokens de cada requisição é registrado para acompanhar o
+  crescimento por sessão.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from core.rag_utils import count_tokens
+
+HISTORY_TURNS      = int(os.getenv("CHAT_PRONAF_HISTORY_TURNS", "3"))
+HISTORY_MAX_TOKENS = int(os.getenv("CHAT_PRONAF_HISTORY_MAX_TOKENS", "6000"))
+TOOL_DIGEST_CHARS  = 400
+SUMMARY_WORKERS    = int(os.getenv("CHAT_PRONAF_SUMMARY_WORKERS", "4"))
+SUMMARY_TIMEOUT_S  = float(os.getenv("CHAT_PRONAF_SUMMARY_TIMEOUT_S", "10"))   # espera no flush()
+
+Message = dict[str, Any]
+Turn = list[Message]
+Summarizer = Callable[[str, Sequence[Turn]], str]
+
+
+# -------- Apoio --------
+def split_turns(msgs: Sequence[Message]) -> tuple[list[Message], list[Turn]]:
+    """Separa as mensagens ``system`` iniciais e agrupa o resto por turno."""
+    i = 0
+    while i < len(msgs) and msgs[i]["role"] == "system":
+        i += 1
+    turns: list[Turn] = []
+    for m in msgs[i:]:
+        if m["role"] == "user" or not turns:
+            turns.append([])
+        turns[-1].append(m)
+    return list(msgs[:i]), turns
+
+
+def tool_digest(content: str, max_chars: int = TOOL_DIGEST_CHARS) -> str:
+    """Versão curta de um resultado de tool (1ª linha + início da tabela)."""
+    if len(content) <= max_chars:
+        return content
+    linhas = content.splitlines()
+    corte = content[:max_chars].rsplit("\n", 1)[0]
+    return (
+        f"{corte}\n… [resultado resumido: {len(linhas)} linhas, "
+        f"{len(content)} caracteres no original]"
+    )
+
+
+def messages_tokens(msgs: Sequence[Message], model: str = "gpt-4o-mini") -> int:
+    """Tokens aproximados de uma lista de mensagens (conteúdo + ~4 por msg)."""
+    total = 0
+    for m in msgs:
+        total += 4 + count_tokens(m.get("content") or "", model)
+        for call in m.get("tool_calls") or []:
+            total += count_tokens(call["function"]["arguments"], model)
+    return total
+
+
+def _render_turns(turns: Sequence[Turn]) -> str:
+    partes = []
+    for turn in turns:
+        for m in turn:
+            if m["role"] == "user":
+                partes.append(f"Usuário: {m['content']}")
+            elif m["role"] == "assistant" and m.get("content"):
+                partes.append(f"Assistente: {m['content']}")
+            elif m["role"] == "tool":
+                partes.append(f"Dados consultados: {tool_digest(m['content'], 200)}")
+    return "\n".join(partes)
+
+
+# -------- Resumidores --------
+def extractive_summary(resumo: str, turns: Sequence[Turn]) -> str:
+    """Resumo sem LLM: pergunta + 1ª frase da resposta de cada turno."""
+    linhas = [resumo] if resumo else []
+    for turn in turns:
+        pergunta = next((m["content"] for m in turn if m["role"] == "user"), "")
+        resposta = next(
+            (m["content"] for m in reversed(turn) if m["role"] == "assistant" and m.get("content")),
+            "",
+        )
+        primeira = resposta.split(". ")[0][:200]
+        linhas.append(f"- {pergunta} → {primeira}")
+    return "\n".join("\n".join(linhas).splitlines()[-20:])   # resumo não cresce sem fim
+
+
+def llm_summary(
+    resumo: str,
+    turns: Sequence[Turn],
+    *,
+    model: str = "gpt-4o-mini",
+    client: Any = None,
+) -> str:
+    """Resumo corrido via LLM; cai para :func:`extractive_summary` se falhar."""
+    if client is None:
+        import openai as client
+    try:
+        resp = client.chat.completions.create(
+            model=model,
+            temperature=0,
+            max_tokens=300,
+            messages=[
+                {"role": "system", "content": (
+                    "Atualize o resumo de uma conversa sobre o PRONAF. Mantenha "
+                    "fatos, números, UFs e anos citados. Responda só com o "
+                    "resumo, em até 8 frases."
+                )},
+                {"role": "user", "content": (
+                    f"Resumo atual:\n{resumo or '(vazio)'}\n\n"
+                    f"Novos trechos:\n{_render_turns(turns)}"
+                )},
+            ],
+        )
+        return resp.choices[0].message.content or extractive_summary(resumo, turns)
+    except Exception:
+        return extractive_summary(resumo, turns)
+
+
+# -------- Execução em fundo --------
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    """Pool único do processo para os resumos (criado no 1º uso)."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(SUMMARY_WORKERS, thread_name_prefix="chat-pronaf-summary")
+        return _EXECUTOR
+
+
+# -------- Memória --------
+class ConversationMemory:
+    """
+    Parameters
+    ----------
+    keep_turns :
+        Turnos anteriores enviados na íntegra.
+    max_tokens :
+        Teto de tokens por requisição (histórico + pergunta atual).
+    summarizer :
+        ``fn(resumo_atual, turnos) -> novo_resumo``; padrão :func:`llm_summary`.
+    """
+
+    def __init__(
+        self,
+        *,
+        keep_turns: int = HISTORY_TURNS,
+        max_tokens: int = HISTORY_MAX_TOKENS,
+        summarizer: Summarizer | None = None,
+        model: str = "gpt-4o-mini",
+    ) -> None:
+        self.keep_turns = keep_turns
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer or llm_summary
+        self.model = model
+
+        self.summary = ""
+        self.summarized_turns = 0        # turnos já incorporados ao resumo
+        self.prompt_tokens: list[int] = []
+        self._pending: tuple[Future[str], int] | None = None   # (resumo em curso, turnos)
+
+    def _collect(self, timeout: float | None = 0) -> None:
+        """Aplica o resumo de fundo se já saiu; erro → fica o resumo anterior."""
+        if self._pending is None:
+            return
+        fut, limite = self._pending
+        if not fut.done() and timeout == 0:
+            return
+        try:
+            self.summary = fut.result(timeout=timeout)
+            self.summarized_turns = limite
+        except Exception:
+            pass                                     # turnos seguem na íntegra; refeito no próximo compact
+        self._pending = None
+
+    def flush(self, timeout: float = SUMMARY_TIMEOUT_S) -> None:
+        """Espera até ``timeout`` s pelo resumo em curso (antes de serializar a conversa)."""
+        self._collect(timeout)
+
+    def build(self, msgs: Sequence[Message], prompt: str) -> list[Message]:
+        """
+        Mensagens da requisição: system + resumo + janela recente + ``prompt``.
+
+        ``msgs`` é o log completo, já com a pergunta atual como último item.
+        Turnos ainda fora do resumo (pendente ou com erro) vão na íntegra,
+        sujeitos ao teto de tokens.
+        """
+        self._collect()
+        system, turns = split_turns(msgs)
+        anteriores = turns[:-1]
+        inicio = min(self.summarized_turns, len(anteriores))
+        janela = [
+            [
+                {**m, "content": tool_digest(m["content"])} if m["role"] == "tool" else m
+                for m in turn
+            ]
+            for turn in anteriores[inicio:]
+        ]
+
+        cabeca = list(system)
+        if self.summary:
+            cabeca.append({
+                "role": "system",
+                "content": f"Resumo da conversa anterior:\n{self.summary}",
+            })
+        atual = [{"role": "user", "content": prompt}]
+
+        while True:
+            req = cabeca + [m for t in janela for m in t] + atual
+            tokens = messages_tokens(req, self.model)
+            if tokens <= self.max_tokens or not janela:
+                break
+            janela.pop(0)                            # sai o turno mais antigo
+
+        self.prompt_tokens.append(tokens)
+        return req
+
+    def compact(self, msgs: Sequence[Message]) -> None:
+        """
+        Leva ao resumo, em fundo, os turnos que saíram da janela (chamar após
+        a resposta). Com um resumo ainda em curso, fica para o próximo turno.
+        """
+        self._collect()
+        if self._pending is not None:
+            return
+        _, turns = split_turns(msgs)
+        limite = len(turns) - self.keep_turns
+        if limite <= self.summarized_turns:
+            return
+        fut = _executor().submit(self.summarizer, self.summary, turns[self.summarized_turns:limite])
+        self._pending = (fut, limite)
+
+    def growth(self) -> dict[str, float]:
+        """Tokens por requisição: último, média e inclinação (tokens/turno)."""
+        t = self.prompt_tokens
+        if not t:
+            return {"requests": 0, "last": 0, "mean": 0.0, "slope": 0.0}
+        n = len(t)
+        media_x = (n - 1) / 2
+        media_y = sum(t) / n
+        den = sum((i - media_x) ** 2 for i in range(n))
+        slope = (
+            sum((i - media_x) * (y - media_y) for i, y in enumerate(t)) / den
+            if den else 0.0
+        )
+        return {"requests": n, "last": t[-1], "mean": media_y, "slope": slope}
@@ -0,0 +1,218 @@
+"""
+Troca a quente da versão dos dados (Parquet + base vetorial), sem reinício.
+
+Publicar uma extração nova do BCB ou uma edição do MCR
+(``python -m scripts.publish_data_version``) grava um diretório novo em
+``data/versions/`` e aponta ``CURRENT`` para ele. Cada processo (servidor
+Streamlit, worker da API) percebe a mudança — :func:`start_watcher`, a cada
+``CHAT_PRONAF_DATA_POLL_S`` segundos — e chama :func:`swap_to`:
+
+1. **prepara** a versão nova com a antiga servindo: confere o hash do
+   Parquet com o manifesto e carrega o que este processo já tinha em
+   memória (índice de filtros, cubo, base vetorial, retriever + BM25);
+2. **troca** atomicamente: versão ativa (:func:`core.data_versions.set_active`)
+   e recursos (:func:`core.resources.swap_resources`) são atribuições sob
+   lock — nenhuma requisição espera a carga;
+3. **invalida** o que veio da versão anterior
+   (:func:`core.data_versions.release_stale`): índice e cubo velhos,
+   recortes do ``load_pronaf``, agregados do DuckDB e cache semântico. O
+   cache das tools muda de chave sozinho junto com o fingerprint do Parquet.
+
+Se o preparo falhar, a versão antiga continua ativa e o erro fica no
+relatório. Requisições em andamento terminam com os objetos antigos, que
+são liberados quando elas acabam.
+
+Cada troca gera um :class:`SwapReport` — preparo, duração da troca e RSS
+antes / com as duas versões vivas / depois — exposto em ``/health`` e na
+página ``3_⏱️ Latência.py``.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import gc
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from core import duckdb_backend
+from core.data_loader import PRONAF_BACKEND, parquet_fingerprint
+from core.data_versions import (
+    LEGACY, DataVersion, active_version, read_current, release_stale, resolve, set_active,
+)
+from core.filter_index import _index_for_version, load_filter_index
+from core.pronaf_cube import _cube_for_version, load_cube
+from core.rag_engine import build_retriever, build_vector_db
+from core.resources import current_rss_mb, peek_resource, swap_resources
+
+DATA_POLL_S = float(os.getenv("CHAT_PRONAF_DATA_POLL_S", "0"))     # 0 = sem watcher
+
+
+# -------- Relatório --------
+@dataclass
+class SwapReport:
+    old: str
+    new: str
+    ok: bool = False
+    error: str | None = None
+    prepared: list[str] = field(default_factory=list)
+    invalidated: list[str] = field(default_factory=list)
+    prepare_s: float = 0.0          # carga da nova versão (em background)
+    swap_ms: float = 0.0            # janela da troca: versão + recursos
+    invalidate_ms: float = 0.0
+    rss_before_mb: float = 0.0
+    rss_prepared_mb: float = 0.0    # as duas versões vivas
+    rss_after_mb: float = 0.0       # depois de soltar a antiga (gc + malloc_trim)
+    at: float = field(default_factory=time.time)
+
+    @property
+    def overlap_mb(self) -> float:
+        """Memória a mais enquanto as duas versões convivem."""
+        return self.rss_prepared_mb - self.rss_before_mb
+
+    @property
+    def released_mb(self) -> float:
+        """Quanto o RSS caiu depois da troca (o alocador pode reter parte)."""
+        return self.rss_prepared_mb - self.rss_after_mb
+
+    def as_dict(self) -> dict[str, Any]:
+        d = asdict(self)
+        d.update(overlap_mb=self.overlap_mb, released_mb=self.released_mb)
+        return {k: round(v, 3) if isinstance(v, float) else v for k, v in d.items()}
+
+
+_HISTORY: deque[SwapReport] = deque(maxlen=20)
+_SWAP_LOCK = threading.Lock()
+
+
+def swap_history() -> list[dict[str, Any]]:
+    """Trocas feitas por este processo, da mais antiga à mais recente."""
+    return [r.as_dict() for r in _HISTORY]
+
+
+# -------- Preparo --------
+def _check_integrity(version: DataVersion) -> None:
+    # o manifesto grava só o hash do conteúdo: cópias mudam o mtime
+    esperado = version.manifest.get("parquet_sha256")
+    if esperado and parquet_fingerprint(version.parquet_path).split("-", 1)[1] != esperado:
+        raise ValueError(f"Parquet de {version.name!r} não confere com o manifesto")
+
+
+def _prepare(new: DataVersion, old: DataVersion) -> tuple[dict[str, Any], list[str]]:
+    """Carrega de ``new`` o que este processo já servia de ``old``."""
+    prontos: list[str] = []
+    if PRONAF_BACKEND == "duckdb":
+        # lido no lugar a cada consulta; basta conferir que abre
+        duckdb_backend.distinct_values("ANO", path=new.parquet_path)
+        prontos.append("duckdb")
+    else:
+        if _index_for_version.has(old.parquet_path):
+            load_filter_index(new.parquet_path)
+            prontos.append("filter_index")
+        if _cube_for_version.has(old.parquet_path):
+            load_cube(new.parquet_path)
+            prontos.append("cube")
+
+    recursos: dict[str, Any] = {}
+    if peek_resource("vector_db") is not None:
+        recursos["vector_db"] = build_vector_db(new)
+        prontos.append("vector_db")
+        if peek_resource("retriever") is not None:
+            recursos["retriever"] = build_retriever(recursos["vector_db"], new)
+            prontos.append("retriever")
+    return recursos, prontos
+
+
+# -------- Troca --------
+def _trim_heap() -> None:
+    # o glibc guarda no heap o que o Python/NumPy liberou; devolve ao SO
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):                # pragma: no cover (não-glibc)
+        pass
+
+
+def swap_to(name: str | None = None) -> SwapReport | None:
+    """
+    Prepara e ativa a versão ``name`` (padrão: a de ``CURRENT``).
+
+    Bloqueia quem chamou até o fim do preparo — as demais threads seguem
+    servindo a versão antiga. Devolve ``None`` se ``name`` já está ativa.
+    """
+    with _SWAP_LOCK:
+        old = active_version()
+        alvo = (read_current() if name is None else name) or LEGACY
+        if alvo == old.name:
+            return None
+
+        rep = SwapReport(old.name, alvo, rss_before_mb=current_rss_mb())
+        _HISTORY.append(rep)
+        t0 = time.perf_counter()
+        try:
+            new = resolve(alvo)
+            _check_integrity(new)
+            recursos, rep.prepared = _prepare(new, old)
+        except Exception as exc:
+            rep.error = f"{type(exc).__name__}: {exc}"       # a antiga segue ativa
+            return rep
+        rep.prepare_s = time.perf_counter() - t0
+        rep.rss_prepared_mb = current_rss_mb()
+
+        t1 = time.perf_counter()
+        set_active(new)
+        antigos = swap_resources(recursos)
+        rep.swap_ms = (time.perf_counter() - t1) * 1000
+
+        t2 = time.perf_counter()
+        try:
+            rep.invalidated = release_stale()
+        except Exception as exc:                     # a troca já valeu; só registra
+            rep.error = f"invalidação: {type(exc).__name__}: {exc}"
+        rep.invalidate_ms = (time.perf_counter() - t2) * 1000
+
+        del antigos, recursos
+        gc.collect()
+        _trim_heap()
+        rep.rss_after_mb = current_rss_mb()
+        rep.ok = True
+        return rep
+
+
+def swap_in_background(name: str | None = None) -> threading.Thread:
+    """:func:`swap_to` numa *thread* daemon; o resultado vai para :func:`swap_history`."""
+    th = threading.Thread(target=swap_to, args=(name,), name="chat-pronaf-data-swap", daemon=True)
+    th.start()
+    return th
+
+
+_WATCHER: threading.Thread | None = None
+_WATCHER_LOCK = threading.Lock()
+
+
+def start_watcher(interval: float = DATA_POLL_S) -> threading.Thread | None:
+    """
+    Confere ``CURRENT`` a cada ``interval`` segundos e troca de versão quando
+    ele muda. Idempotente (um por processo); ``interval <= 0`` desliga.
+    """
+    global _WATCHER
+    if interval <= 0:
+        return None
+
+    def _run() -> None:
+        falhou: str | None = None               # não insiste numa versão quebrada
+        while True:
+            time.sleep(interval)
+            alvo = read_current() or LEGACY
+            if alvo in (active_version().name, falhou):
+                continue
+            rep = swap_to(alvo)
+            falhou = alvo if rep is not None and not rep.ok else None
+
+    with _WATCHER_LOCK:
+        if _WATCHER is None or not _WATCHER.is_alive():
+            _WATCHER = threading.Thread(target=_run, name="chat-pronaf-data-watcher", daemon=True)
+            _WATCHER.start()
+    return _WATCHER
@@ -0,0 +1,214 @@
+"""
+Recuperação híbrida para o RAG: BM25 (léxico) + Chroma (denso).
+
+A busca densa sozinha erra consultas exatas como "MCR 6-2", "DAP" ou
+números de resolução. Aqui os dois rankings são combinados por
+*Reciprocal Rank Fusion* (RRF) e, opcionalmente, reordenados por um
+cross-encoder local pequeno.
+
+O índice invertido BM25 cobre os mesmos chunks da coleção do Chroma e é
+persistido em ``data/data-rag/bm25_index.pkl``; ele é refeito sozinho
+quando o ``persist_directory`` muda.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import pickle
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from core.data_loader import dir_fingerprint
+
+BM25_K1 = 1.5
+BM25_B  = 0.75
+RRF_K   = 60
+
+STOPWORDS = frozenset(
+    "a ao aos as com da das de do dos e em na nas no nos o os ou para pela "
+    "pelas pelo pelos por que se sem sua suas seu seus um uma umas uns qual "
+    "quais como é ser são foi".split()
+)
+
+# mantém juntos códigos como "6-2", "4.870", "mcr 6-2-1"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+
+
+def tokenize(texto: str) -> list[str]:
+    """Minúsculas, sem acentos; códigos compostos geram o token inteiro + partes."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    tokens: list[str] = []
+    for tok in _TOKEN_RE.findall(texto):
+        if tok in STOPWORDS:
+            continue
+        tokens.append(tok)
+        partes = re.split(r"[-./]", tok)
+        if len(partes) > 1:
+            tokens.extend(p for p in partes if p and p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Índice invertido BM25 em memória (postings como vetores NumPy)."""
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[dict[str, Any]],
+        version: str = "",
+    ) -> None:
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.metadatas = [m or {} for m in metadatas]
+        self.version = version
+
+        postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        lens = np.zeros(len(self.texts), dtype=np.float32)
+        for d, texto in enumerate(self.texts):
+            tf = Counter(tokenize(texto))
+            lens[d] = sum(tf.values())
+            for termo, n in tf.items():
+                postings[termo].append((d, n))
+
+        n_docs = max(len(self.texts), 1)
+        self.avgdl = float(lens.mean()) if len(lens) else 0.0
+        self._lens = lens
+        self._postings = {
+            t: (np.fromiter((d for d, _ in p), np.int32, len(p)),
+                np.fromiter((n for _, n in p), np.float32, len(p)))
+            for t, p in postings.items()
+        }
+        self._idf = {
+            t: math.log(1 + (n_docs - len(p) + 0.5) / (len(p) + 0.5))
+            for t, p in postings.items()
+        }
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Top-``k`` documentos (posição, score BM25) para a consulta."""
+        scores = np.zeros(len(self.texts), dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lens / (self.avgdl or 1.0))
+        for termo in set(tokenize(query)):
+            if termo not in self._postings:
+                continue
+            docs, tf = self._postings[termo]
+            scores[docs] += self._idf[termo] * tf * (BM25_K1 + 1) / (tf + norm[docs])
+
+        k = min(k, int((scores > 0).sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(d), float(scores[d])) for d in top]
+
+    # -------- Persistência --------
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path: str) -> "BM25Index":
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+
+
+def load_or_build_bm25(vector_db: Any, persist_dir: str, index_path: str) -> BM25Index:
+    """BM25 persistido, refeito se a coleção do Chroma mudou."""
+    versao = dir_fingerprint(persist_dir)
+    if os.path.exists(index_path):
+        try:
+            idx = BM25Index.load(index_path)
+            if idx.version == versao:
+                return idx
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+    dados = vector_db.get(include=["documents", "metadatas"])
+    idx = BM25Index(dados["ids"], dados["documents"], dados["metadatas"], versao)
+    try:
+        idx.save(index_path)
+    except OSError:
+        pass
+    return idx
+
+
+class HybridRetriever:
+    """
+    Parameters
+    ----------
+    vector_db :
+        Instância ``langchain_community.vectorstores.Chroma``.
+    bm25 :
+        Índice BM25 sobre os mesmos chunks.
+    reranker :
+        ``sentence_transformers.CrossEncoder`` opcional.
+    candidates :
+        Quantos resultados cada busca traz antes da fusão/re-rank.
+    """
+
+    def __init__(
+        self,
+        vector_db: Any,
+        bm25: BM25Index,
+        *,
+        reranker: Any = None,
+        candidates: int = 20,
+    ) -> None:
+        self.vector_db = vector_db
+        self.bm25 = bm25
+        self.reranker = reranker
+        self.candidates = candidates
+
+    def invoke(
+        self,
+        query: str,
+        k: int = 3,
+        *,
+        query_vector: Sequence[float] | None = None,
+    ):
+        """Top-``k`` ``Document``s; ``query_vector`` evita recodificar a pergunta."""
+        from langchain_core.documents import Document
+
+        n = max(self.candidates, k)
+        if query_vector is not None:
+            densos = self.vector_db.similarity_search_by_vector_with_relevance_scores(
+                list(query_vector), k=n,
+            )
+        else:
+            densos = self.vector_db.similarity_search_with_score(query, k=n)
+
+        # --- RRF: chave = texto do chunk (ids não voltam na busca densa) ---
+        fusao: dict[str, float] = defaultdict(float)
+        docs: dict[str, Document] = {}
+        for pos, (doc, _) in enumerate(densos):
+            fusao[doc.page_content] += 1.0 / (RRF_K + pos + 1)
+            docs.setdefault(doc.page_content, doc)
+        for pos, (d, _) in enumerate(self.bm25.search(query, n)):
+            texto = self.bm25.texts[d]
+            fusao[texto] += 1.0 / (RRF_K + pos + 1)
+            docs.setdefault(texto, Document(page_content=texto, metadata=dict(self.bm25.metadatas[d])))
+
+        ordem = sorted(fusao, key=fusao.get, reverse=True)[:n]
+
+        if self.reranker is not None and ordem:
+            notas = self.reranker.predict([(query, t) for t in ordem])
+            pares = sorted(zip(ordem, notas), key=lambda p: float(p[1]), reverse=True)
+            escolhidos = [(t, float(s)) for t, s in pares[:k]]
+        else:
+            escolhidos = [(t, fusao[t]) for t in ordem[:k]]
+
+        saida = []
+        for texto, score in escolhidos:
+            d = docs[texto]
+            saida.append(Document(page_content=d.page_content,
+                                  metadata={**d.metadata, "score": score}))
+        return saida
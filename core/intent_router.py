@@ -0,0 +1,258 @@
+"""
+Roteador local de intenções: chama a tool certa antes da LLM.
+
+Perguntas como "Quantas operações no RS em 2024?" obrigam a 1ª chamada à
+LLM só para ela decidir chamar ``consulta_pronaf``. O roteador resolve esses
+casos em microssegundos, sem modelo:
+
+1. extrai UFs (siglas e nomes), anos/intervalos, sexo e safra;
+2. classifica a medida por palavras-chave (crédito, operações,
+   beneficiários, ticket médio) e a forma (total, por ano, comparação,
+   ranking, resumo da UF);
+3. abstém-se (``None``) diante de perguntas conceituais ("o que é",
+   "requisitos", "juros"…), de qualificadores que a rota não representa
+   (custeio/investimento, máximo, município, banco, seguro, mês, anos
+   relativos como "ano passado") ou quando falta UF/escopo — esses casos
+   seguem pelo fluxo normal com tools. Na dúvida, abster-se custa uma
+   chamada à LLM; rotear errado responde com o dado errado.
+
+A rota vira uma tool call sintética; a LLM faz uma única chamada, só para
+redigir a resposta a partir do resultado.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import unicodedata
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from core.query_engine import LIMITE_MAX, UFS, QueryError, parse_query
+
+# "0" → desliga o roteador (toda pergunta passa pela LLM com tools)
+ROUTER_ENABLED = os.getenv("CHAT_PRONAF_ROUTER", "1") == "1"
+
+# nomes sem acento, do mais longo para o mais curto ("mato grosso do sul"
+# antes de "mato grosso"); "para" só com acento — ver extract_ufs()
+UF_NOMES = {
+    "rio grande do norte": "RN", "rio grande do sul": "RS", "mato grosso do sul": "MS",
+    "distrito federal": "DF", "espirito santo": "ES", "rio de janeiro": "RJ",
+    "santa catarina": "SC", "minas gerais": "MG", "mato grosso": "MT",
+    "sao paulo": "SP", "tocantins": "TO", "pernambuco": "PE", "amazonas": "AM",
+    "maranhao": "MA", "rondonia": "RO", "paraiba": "PB", "alagoas": "AL",
+    "sergipe": "SE", "roraima": "RR", "parana": "PR", "bahia": "BA", "ceara": "CE",
+    "goias": "GO", "amapa": "AP", "piaui": "PI", "acre": "AC",
+}
+# siglas que em minúsculas são palavras comuns ("se", "pe", "to"…)
+_SIGLAS_AMBIGUAS = {"se", "pe", "es", "to", "ma", "pa", "al", "go", "am", "ac"}
+
+_CONCEITUAL = re.compile(
+    r"\b(o que (e|sao)|como (funciona|acessar|solicitar|obter|contratar|pedir)|"
+    r"descrev|expliq|explica|defin|requisit|regra|juros|taxa|limite|prazo|"
+    r"carencia|quem pode|document|dap\b|caf\b|mcr\b|manual|resoluc|enquadr|"
+    r"quais (os|as) (programa|linha|grupo|modalidade|condic)|grupo [a-v]\b|"
+    # linhas/grupos do programa não existem na base — a LLM explica o limite
+    r"pronaf (a/c|[bcv]\b|mulher|jovem|mais alimentos|agroecologia|floresta|semiarido|"
+    r"eco\b|bioeconomia|agroindustria|cotas|custeio|investimento))"
+)
+# recortes que a base ou a tool não têm: a rota ignoraria o qualificador
+# e responderia o total — melhor deixar a LLM decidir
+_NAO_SUPORTADO = re.compile(
+    r"\b(custeio|investiment\w*|maxim\w*|minim\w*|municip\w*|cidades?|banco|agencia|seguro|"
+    r"mes|meses|mensa\w*|janeiro|fevereiro|marco|abril|maio|junho|julho|agosto|setembro|"
+    r"outubro|novembro|dezembro|trimestr\w*|semestr\w*|"
+    # anos relativos: o roteador só entende anos escritos
+    r"ano (passado|anterior|atual|corrente)|(este|esse|neste|nesse) ano|"
+    r"ultimos? (\d+ |dois |tres |cinco |dez )?anos|comparad[oa]s? (com|a|ao)|em relacao (a|ao))\b"
+)
+_MEDIDAS = (   # (medida, padrão) — ordem = prioridade
+    ("ticket_medio", re.compile(
+        r"ticket( medio)?|(valor|credito) medio( por (operac|contrato)\w*)?|media por (operac|contrato)\w*"
+    )),
+    ("operacoes", re.compile(r"operac|contrato|financiament")),
+    ("beneficiarios", re.compile(r"beneficiar|agricultor|produtor|familia|pessoas")),
+    ("credito_total", re.compile(r"valor|credito|montante|volume|dinheiro|recurso|r\$|quanto (foi|se|do|de)")),
+)
+# o que pode separar duas medidas pedidas juntas: "valor e número de operações"
+_LIGA_MEDIDAS = re.compile(
+    r"\w*\s*(,|e|ou)\s+((qual|quais)\s+)?((o|a|os|as)\s+)?"
+    r"((numero|quantidade|total)\s+(de|do|da|dos|das)\s+)?$"
+)
+_RANKING = re.compile(
+    r"\b(ranking|top\s*\d*|maiores|menores|lider|\d+ (estados|ufs)|quais (estados|ufs)|"
+    r"qual (estado|uf)|que (estado|uf)|(estado|uf)s? com (maior|menor|mais|menos))\b"
+)
+_RESUMO = re.compile(r"\b(resumo|dados|panorama|estatistic\w*|informac\w*|numeros|situacao)\b")
+_NACIONAL = re.compile(r"\b(brasil|nacional|no pais|todos os estados|total geral)\b")
+_POR = {
+    "ANO": re.compile(r"\b(por ano|ano a ano|anual|evoluc|a cada ano)"),
+    "SEXO_BIOLOGICO": re.compile(r"\bpor (sexo|genero)"),
+    "SAFRA": re.compile(r"\bpor safra"),
+    "CD_ESTADO": re.compile(r"\bpor (estado|uf)"),
+}
+_ANO = r"(199\d|20\d\d)"
+
+
+def _sem_acento(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+# -------- Extração --------
+def extract_ufs(pergunta: str) -> list[str]:
+    """UFs citadas (siglas ou nomes), na ordem em que aparecem."""
+    achadas: list[tuple[int, str]] = []
+    for m in re.finditer(r"\b([A-Za-z]{2})\b", pergunta):
+        sigla = m.group(1)
+        if sigla.upper() in UFS and (sigla.isupper() or sigla.lower() not in _SIGLAS_AMBIGUAS):
+            achadas.append((m.start(), sigla.upper()))
+
+    texto = _sem_acento(pergunta)
+    for nome, uf in UF_NOMES.items():
+        for m in re.finditer(rf"\b{nome}\b", texto):
+            achadas.append((m.start(), uf))
+            texto = texto[:m.start()] + " " * len(nome) + texto[m.end():]
+    for m in re.finditer(r"\bpará\b", pergunta.lower()):
+        achadas.append((m.start(), "PA"))
+
+    vistas: list[str] = []
+    for _, uf in sorted(achadas):
+        if uf not in vistas:
+            vistas.append(uf)
+    return vistas
+
+
+def extract_years(texto: str) -> tuple[int | None, int | None]:
+    """(ano_min, ano_max) a partir de "em 2024", "entre 2015 e 2025", "desde 2020"…"""
+    texto = _sem_acento(texto)
+    m = re.search(rf"(entre|de)\s+{_ANO}\s+(e|a|ate)\s+{_ANO}|{_ANO}\s*(-|a)\s*{_ANO}\b", texto)
+    if m:
+        anos = sorted(int(a) for a in m.groups() if a and a.isdigit())
+        return anos[0], anos[-1]
+    m = re.search(rf"(desde|a partir de)\s+(o ano de\s+)?{_ANO}", texto)
+    if m:
+        return int(m.group(3)), None
+    m = re.search(rf"\bate\s+(o ano de\s+)?{_ANO}", texto)
+    if m:
+        return None, int(m.group(2))
+    anos = [int(a) for a in re.findall(rf"\b{_ANO}\b", texto)]
+    if anos:
+        return min(anos), max(anos)
+    return None, None
+
+
+def extract_measures(texto: str) -> list[str]:
+    """
+    Medidas pedidas, na ordem em que aparecem. Vale a primeira citada; as
+    seguintes só entram se ligadas por "e"/"," ("valor e número de
+    operações") — em "valor das operações" ou "quantos produtores acessaram
+    crédito" o 2º termo só qualifica o 1º.
+    """
+    # "valor médio" não conta como crédito total (mesmas posições, em branco)
+    resto = _MEDIDAS[0][1].sub(lambda m: " " * len(m.group()), texto)
+    achados = []
+    for medida, rx in _MEDIDAS:
+        m = rx.search(texto if medida == "ticket_medio" else resto)
+        if m:
+            achados.append((m.start(), m.end(), medida))
+    achados.sort()
+
+    medidas: list[str] = []
+    fim_anterior = None
+    for inicio, fim, medida in achados:
+        if fim_anterior is None or _LIGA_MEDIDAS.match(texto[fim_anterior:inicio]):
+            medidas.append(medida)
+            fim_anterior = fim
+        else:
+            break
+    return medidas
+
+
+def _sexos(texto: str) -> list[str] | None:
+    sexos = []
+    if re.search(r"\b(mulher|mulheres|feminin|agricultoras)", texto):
+        sexos.append("Feminino")
+    if re.search(r"\b(homem|homens|masculin)", texto):
+        sexos.append("Masculino")
+    return sexos or None
+
+
+# -------- Rota --------
+@dataclass
+class Route:
+    tool: str
+    args: dict[str, Any]
+    features: dict[str, Any] = field(default_factory=dict)
+
+    def tool_call(self, call_id: str | None = None) -> dict[str, Any]:
+        """Tool call sintética no formato da API (entra no histórico); id único por padrão."""
+        return {
+            "id": call_id or f"call_router_{uuid.uuid4().hex[:16]}",
+            "type": "function",
+            "function": {"name": self.tool, "arguments": json.dumps(self.args, ensure_ascii=False)},
+        }
+
+    def assistant_message(self, call_id: str | None = None) -> dict[str, Any]:
+        """Mensagem ``assistant`` com a tool call (os resultados vêm do despachante)."""
+        return {"role": "assistant", "content": None, "tool_calls": [self.tool_call(call_id)]}
+
+
+def route(pergunta: str) -> Route | None:
+    """Rota direta para uma tool, ou ``None`` se a LLM deve decidir."""
+    texto = _sem_acento(pergunta)
+    if _CONCEITUAL.search(texto) or _NAO_SUPORTADO.search(texto.replace("rio de janeiro", "")):
+        return None                                  # ("janeiro" do RJ não é mês)
+
+    ufs = extract_ufs(pergunta)
+    safras = re.findall(r"\b(20\d\d/20\d\d)\b", texto)
+    ano_min, ano_max = extract_years(re.sub(r"\b20\d\d/20\d\d\b", " ", pergunta))
+    medidas = extract_measures(texto)
+    feats = {"ufs": ufs, "ano_min": ano_min, "ano_max": ano_max, "medidas": medidas}
+
+    if not medidas:
+        if len(ufs) == 1 and _RESUMO.search(texto) and ano_min is None:
+            return Route("consulta_pronaf_por_estado", {"cd_estado": ufs[0]}, feats)
+        return None
+
+    ranking = bool(_RANKING.search(texto)) and len(ufs) != 1
+    if not (ufs or ranking or _NACIONAL.search(texto)):
+        return None
+
+    dimensoes = [d for d, rx in _POR.items() if rx.search(texto)]
+    if (ranking or len(ufs) > 1) and "CD_ESTADO" not in dimensoes:
+        dimensoes.insert(0, "CD_ESTADO")
+
+    filtros: dict[str, Any] = {}
+    if ufs:
+        filtros["ufs"] = ufs
+    if ano_min is not None:
+        filtros["ano_min"] = ano_min
+    if ano_max is not None:
+        filtros["ano_max"] = ano_max
+    if (sexos := _sexos(texto)) is not None:
+        filtros["sexos"] = sexos
+    if safras:
+        filtros["safras"] = safras
+
+    args: dict[str, Any] = {"medidas": medidas}
+    if filtros:
+        args["filtros"] = filtros
+    if dimensoes:
+        args["dimensoes"] = dimensoes
+    if ranking:
+        n = re.search(r"\btop\s*(\d+)|\b(\d+)\s+(maiores|menores|estados|ufs)\b", texto)
+        args["ordenar_por"] = medidas[0]
+        args["ordem"] = "asc" if re.search(r"\bmenor", texto) else "desc"
+        args["limite"] = min(int(next(g for g in n.groups() if g and g.isdigit())), LIMITE_MAX) if n else 10
+    elif "ANO" in dimensoes:
+        args["ordenar_por"] = "ANO"
+        args["ordem"] = "asc"
+
+    try:
+        parse_query(args)
+    except QueryError:
+        return None
+    return Route("consulta_pronaf", args, feats)
@@ -0,0 +1,71 @@
+"""
+Imports adiados: o módulo só é carregado no primeiro uso.
+
+``pd = lazy_import("pandas")`` devolve um módulo-procurador; ``pd.DataFrame``
+(ou qualquer outro atributo) dispara o ``import`` de verdade, que daí em
+diante fica em ``sys.modules`` como sempre. Assim a página do chat abre sem
+pagar pandas, openai, plotly etc.: cada dependência pesada entra na primeira
+requisição que precisa dela.
+
+Cuidados ao usar:
+
+- anotações com o procurador (``-> pd.DataFrame``) exigem
+  ``from __future__ import annotations``, senão são avaliadas no ``def``;
+- ``from pandas import X`` no topo do módulo carrega na hora — use ``pd.X``.
+
+``CHAT_PRONAF_EAGER_IMPORTS=1`` desliga o adiamento (importa na hora), útil
+para comparar o tempo de abertura e para depurar erros de import.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import types
+from typing import Any
+
+EAGER_IMPORTS = os.getenv("CHAT_PRONAF_EAGER_IMPORTS", "0") == "1"
+
+
+class _LazyModule(types.ModuleType):
+    """Procurador que importa ``__name__`` no primeiro acesso a atributo."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self) -> types.ModuleType:
+        mod = self.__dict__["_lazy_target"]
+        if mod is None:
+            # o lock de import do Python serializa threads que chegam juntas
+            mod = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_target"] = mod
+        return mod
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._load(), attr, value)
+
+    def __dir__(self) -> list[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        estado = "carregado" if self.__dict__["_lazy_target"] is not None else "adiado"
+        return f"<lazy module {self.__name__!r} ({estado})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Módulo ``name`` carregado sob demanda.
+
+    Se ele já estiver em ``sys.modules`` (ou com ``CHAT_PRONAF_EAGER_IMPORTS=1``)
+    devolve o próprio módulo, sem procurador.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if EAGER_IMPORTS:
+        return importlib.import_module(name)
+    return _LazyModule(name)
@@ -0,0 +1,347 @@
+"""
+Gateway da LLM: um cliente OpenAI por processo, com fila de admissão,
+prazos, novas tentativas e orçamento de tokens por minuto.
+
+:class:`LLMGateway` expõe o mesmo ``chat.completions.create`` do módulo
+``openai`` e é o cliente padrão de :class:`core.chat_pipeline.ChatPipeline`
+(qualquer outro, como o falso dos benchmarks, pode ser embrulhado nele):
+
+- **pool**: um único ``openai.OpenAI`` (recurso ``llm_client``) com
+  ``httpx`` keep-alive, compartilhado por todas as sessões do worker; o
+  retry interno do SDK fica desligado — quem decide é o gateway;
+- **admissão**: no máximo ``CHAT_PRONAF_LLM_CONCURRENCY`` chamadas em voo
+  (um stream conta até ser consumido); as demais esperam em fila FIFO;
+- **prazo** por requisição (``CHAT_PRONAF_LLM_DEADLINE_S``) cobrindo fila,
+  tentativas e esperas; cada tentativa recebe o tempo restante como
+  ``timeout``. Sem vaga dentro do prazo → :class:`LLMOverloaded`;
+- **retry** em 429, 5xx e falhas de conexão, com backoff exponencial e
+  *full jitter*, respeitando ``Retry-After`` / ``retry-after-ms``, até
+  ``CHAT_PRONAF_LLM_MAX_RETRIES`` vezes. A vaga continua ocupada durante a
+  espera: um 429 freia o worker inteiro, não só a sessão;
+- **TPM**: janela deslizante de 60 s com os tokens de cada chamada
+  (estimativa na admissão, corrigida pelo ``usage``); com
+  ``CHAT_PRONAF_LLM_TPM`` > 0 a admissão espera até o pedido caber.
+
+:meth:`LLMGateway.stats` (profundidade da fila, espera p50/p95, em voo,
+tentativas, 429, tokens no último minuto) aparece na barra lateral do chat
+e no ``/health`` da API; a espera e as tentativas de cada chamada vão para
+o span ``llm.*`` (``queue_wait_ms``, ``attempts``).
+"""
+
+from __future__ import annotations
+
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from types import SimpleNamespace
+from typing import Any
+
+from core.lazy import lazy_import
+from core.resources import get_resource, register_resource
+from core.tracing import set_attributes
+
+openai = lazy_import("openai")
+
+LLM_CONCURRENCY = int(os.getenv("CHAT_PRONAF_LLM_CONCURRENCY", "8"))     # chamadas em voo/worker
+LLM_DEADLINE_S  = float(os.getenv("CHAT_PRONAF_LLM_DEADLINE_S", "60"))   # fila + tentativas
+LLM_MAX_RETRIES = int(os.getenv("CHAT_PRONAF_LLM_MAX_RETRIES", "3"))
+LLM_TPM         = int(os.getenv("CHAT_PRONAF_LLM_TPM", "0"))             # 0 = sem orçamento
+BACKOFF_BASE_S  = 0.5
+BACKOFF_MAX_S   = 20.0
+CONNECT_TIMEOUT_S = 5.0
+RETRY_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+COMPLETION_ESTIMATE = 300      # tokens de saída presumidos quando não há max_tokens
+
+
+class LLMOverloaded(RuntimeError):
+    """Prazo esgotado esperando vaga na fila (ou no orçamento de tokens)."""
+
+
+# -------- Classificação de erros --------
+def _status(exc: BaseException) -> int | None:
+    return getattr(exc, "status_code", None)
+
+
+def _retryable(exc: BaseException) -> bool:
+    status = _status(exc)
+    if status is not None:
+        return status in RETRY_STATUS
+    return isinstance(exc, openai.APIConnectionError)         # inclui APITimeoutError
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Segundos pedidos pelo servidor (``retry-after-ms`` ou ``Retry-After``)."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms:
+            return max(0.0, float(ms) / 1000)
+        valor = headers.get("retry-after")
+        if not valor:
+            return None
+        try:
+            return max(0.0, float(valor))
+        except ValueError:                                     # data HTTP
+            return max(0.0, email.utils.parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(tentativa: int, *, base: float = BACKOFF_BASE_S, teto: float = BACKOFF_MAX_S) -> float:
+    """Espera antes da tentativa ``tentativa`` (1, 2…): *full jitter* exponencial."""
+    return random.uniform(0, min(teto, base * 2 ** (tentativa - 1)))
+
+
+# -------- Orçamento de tokens --------
+class _TokenWindow:
+    """Tokens usados nos últimos 60 s (entradas ``(instante, tokens)``)."""
+
+    JANELA_S = 60.0
+
+    def __init__(self) -> None:
+        self._entradas: deque[tuple[float, int]] = deque()
+        self._total = 0
+
+    def _expira(self, agora: float) -> None:
+        while self._entradas and self._entradas[0][0] <= agora - self.JANELA_S:
+            self._total -= self._entradas.popleft()[1]
+
+    def used(self, agora: float) -> int:
+        self._expira(agora)
+        return self._total
+
+    def add(self, agora: float, tokens: int) -> None:
+        self._entradas.append((agora, tokens))
+        self._total += tokens
+
+    def wait_for(self, tokens: int, budget: int, agora: float) -> float:
+        """Segundos até ``tokens`` caberem em ``budget`` (0 = já cabem)."""
+        self._expira(agora)
+        if budget <= 0 or self._total + tokens <= budget or self._total <= 0:
+            return 0.0
+        liberado = 0
+        for instante, n in self._entradas:
+            liberado += n
+            if self._total - liberado + tokens <= budget:
+                return instante + self.JANELA_S - agora
+        return self._entradas[-1][0] + self.JANELA_S - agora
+
+
+def _estimativa(params: dict[str, Any]) -> int:
+    # barata e conservadora (~4 caracteres/token); o usage real corrige depois
+    prompt = len(json.dumps(params.get("messages", []), ensure_ascii=False, default=str)) // 4
+    return prompt + int(params.get("max_tokens") or COMPLETION_ESTIMATE)
+
+
+def _total_tokens(usage: Any) -> int | None:
+    if usage is None:
+        return None
+    total = getattr(usage, "total_tokens", None)
+    if total is None:
+        total = (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+    return int(total)
+
+
+# -------- Gateway --------
+class LLMGateway:
+    """
+    Parameters
+    ----------
+    client :
+        Objeto com ``chat.completions.create``; ``None`` usa o cliente
+        compartilhado do processo (recurso ``llm_client``), criado na 1ª chamada.
+    concurrency :
+        Chamadas simultâneas admitidas.
+    deadline_s :
+        Prazo total de cada requisição (fila + tentativas + esperas).
+    max_retries :
+        Novas tentativas depois da primeira.
+    tpm :
+        Orçamento de tokens por minuto; ``0`` desliga.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        *,
+        concurrency: int = LLM_CONCURRENCY,
+        deadline_s: float = LLM_DEADLINE_S,
+        max_retries: int = LLM_MAX_RETRIES,
+        tpm: int = LLM_TPM,
+    ) -> None:
+        self._client = client
+        self.concurrency = max(1, concurrency)
+        self.deadline_s = deadline_s
+        self.max_retries = max_retries
+        self.tpm = tpm
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+        self._cond = threading.Condition()
+        self._fila: deque[object] = deque()
+        self._em_voo = 0
+        self._tokens = _TokenWindow()
+        self._esperas: deque[float] = deque(maxlen=1000)   # ms, últimas admissões
+        self._n = {"requests": 0, "retries": 0, "rate_limited": 0, "errors": 0,
+                   "rejected": 0, "max_queue_depth": 0}
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            self._client = get_resource("llm_client")
+        return self._client
+
+    # -------- Admissão --------
+    def _admitir(self, estimativa: int, prazo: float) -> float:
+        """Espera vaga (e orçamento) até ``prazo``; devolve a espera em s."""
+        t0 = time.monotonic()
+        ticket = object()
+        with self._cond:
+            self._fila.append(ticket)
+            self._n["max_queue_depth"] = max(self._n["max_queue_depth"], len(self._fila))
+            try:
+                while True:
+                    agora = time.monotonic()
+                    espera = None
+                    if self._fila[0] is ticket and self._em_voo < self.concurrency:
+                        espera = self._tokens.wait_for(estimativa, self.tpm, agora)
+                        if espera <= 0:
+                            break
+                    restante = prazo - agora
+                    if restante <= 0:
+                        self._n["rejected"] += 1          # já sob o lock
+                        raise LLMOverloaded(
+                            f"Sem vaga na LLM em {self.deadline_s:.0f}s "
+                            f"({self._em_voo} em voo, {len(self._fila)} na fila)."
+                        )
+                    self._cond.wait(min(restante, espera) if espera else restante)
+            finally:
+                self._fila.remove(ticket)
+                self._cond.notify_all()
+            self._em_voo += 1
+            self._tokens.add(agora, estimativa)
+        espera_s = time.monotonic() - t0
+        self._esperas.append(espera_s * 1000)
+        return espera_s
+
+    def _conta(self, chave: str) -> None:
+        with self._cond:
+            self._n[chave] += 1
+
+    def _liberar(self, estimativa: int, usage: Any) -> None:
+        with self._cond:
+            self._em_voo -= 1
+            real = _total_tokens(usage)
+            if real is not None:                       # corrige a reserva
+                self._tokens.add(time.monotonic(), real - estimativa)
+            self._cond.notify_all()
+
+    # -------- Chamada --------
+    def create(self, **params: Any) -> Any:
+        """``chat.completions.create`` com fila, prazo e novas tentativas."""
+        limite = params.pop("timeout", None)
+        prazo = time.monotonic() + min(self.deadline_s, limite or self.deadline_s)
+        estimativa = _estimativa(params)
+        espera = self._admitir(estimativa, prazo)
+        self._conta("requests")
+
+        tentativa = 0
+        try:
+            while True:
+                try:
+                    resp = self.client.chat.completions.create(
+                        timeout=max(0.1, prazo - time.monotonic()), **params)
+                    break
+                except Exception as exc:
+                    if _status(exc) == 429:
+                        self._conta("rate_limited")
+                    pausa = retry_after(exc)
+                    pausa = backoff(tentativa + 1) if pausa is None else pausa
+                    if (not _retryable(exc) or tentativa >= self.max_retries
+                            or time.monotonic() + pausa >= prazo):
+                        raise
+                    tentativa += 1
+                    self._conta("retries")
+                    time.sleep(pausa)
+        except Exception:
+            self._conta("errors")
+            self._liberar(estimativa, None)
+            raise
+
+        set_attributes(queue_wait_ms=round(espera * 1000, 1), attempts=tentativa + 1)
+        if params.get("stream"):
+            return _GatewayStream(self, resp, estimativa)
+        self._liberar(estimativa, getattr(resp, "usage", None))
+        return resp
+
+    # -------- Métricas --------
+    def stats(self) -> dict[str, Any]:
+        """Fila, espera (ms), chamadas em voo, tentativas e tokens no último minuto."""
+        with self._cond:
+            esperas = sorted(self._esperas)
+            pct = lambda q: round(esperas[round(q * (len(esperas) - 1))], 1) if esperas else 0.0
+            return {
+                "concurrency": self.concurrency,
+                "in_flight": self._em_voo,
+                "queue_depth": len(self._fila),
+                **self._n,
+                "wait_p50_ms": pct(0.50),
+                "wait_p95_ms": pct(0.95),
+                "tokens_last_min": self._tokens.used(time.monotonic()),
+                "tpm_budget": self.tpm,
+            }
+
+
+class _GatewayStream:
+    """Stream que devolve a vaga ao terminar (ou ao ser fechado/descartado)."""
+
+    def __init__(self, gateway: LLMGateway, stream: Any, estimativa: int) -> None:
+        self._gateway = gateway
+        self._stream = stream
+        self._estimativa = estimativa
+        self._usage: Any = None
+        self._aberto = True
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            for chunk in self._stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self._usage = chunk.usage
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._aberto:
+            self._aberto = False
+            if hasattr(self._stream, "close"):
+                self._stream.close()
+            self._gateway._liberar(self._estimativa, self._usage)
+
+    def __del__(self) -> None:
+        self.close()
+
+
+# -------- Recursos do processo --------
+def _load_client() -> Any:
+    import httpx
+
+    return openai.OpenAI(
+        max_retries=0,                                 # retry fica no gateway
+        timeout=httpx.Timeout(LLM_DEADLINE_S, connect=CONNECT_TIMEOUT_S),
+        http_client=openai.DefaultHttpxClient(
+            limits=httpx.Limits(max_connections=LLM_CONCURRENCY * 2,
+                                max_keepalive_connections=LLM_CONCURRENCY),
+        ),
+    )
+
+register_resource("llm_client", _load_client)
+register_resource("llm_gateway", LLMGateway)
+
+def get_llm_gateway() -> LLMGateway:
+    """Gateway único do processo (o cliente OpenAI só é criado na 1ª chamada)."""
+    return get_resource("llm_gateway")
@@ -0,0 +1,117 @@
+"""
+Dados do Painel PRONAF, independentes do backend.
+
+A página ``pages/1_📊 Painel PRONAF.py`` e a exportação da API
+(``GET /v1/pronaf/rows.csv``) usam estas funções; por baixo fica o índice em
+memória (:mod:`core.filter_index`) ou, com ``CHAT_PRONAF_BACKEND=duckdb``,
+SQL direto sobre o Parquet (:mod:`core.duckdb_backend`).
+
+A tabela detalhada é paginada no servidor: :func:`detail_page` devolve só
+as linhas visíveis, já ordenadas, e :func:`detail_csv` gera o CSV do filtro
+inteiro em pedaços — nenhum dos dois monta o recorte completo de uma vez.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+from core import duckdb_backend
+from core.data_loader import PRONAF_BACKEND, parquet_fingerprint
+from core.filter_index import CSV_CHUNK_ROWS, FilterResult, PronafFilterIndex, load_filter_index
+from core.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+USA_DUCKDB = PRONAF_BACKEND == "duckdb"
+DETAIL_COLUMNS = ["ANO", "CD_ESTADO", "SEXO_BIOLOGICO", "VL_PARC_CREDITO"]
+
+
+def data_version(path: str | None = None) -> str:
+    """Versão do Parquet (chave dos caches de gráficos da página)."""
+    return parquet_fingerprint(path)
+
+
+def options() -> tuple[list[str], list[int], list[str]]:
+    """Opções dos filtros: UFs, anos e sexos."""
+    if USA_DUCKDB:
+        return (
+            duckdb_backend.distinct_values("CD_ESTADO"),
+            [int(a) for a in duckdb_backend.distinct_values("ANO")],
+            duckdb_backend.distinct_values("SEXO_BIOLOGICO"),
+        )
+    idx = load_filter_index()
+    return idx.ufs, idx.anos, idx.sexos
+
+
+def summary(cd_estado: str | None, ano_min: int, ano_max: int, sexos: Iterable[str]) -> FilterResult:
+    """KPIs + séries dos gráficos do filtro (memorizados pelo backend)."""
+    if USA_DUCKDB:
+        return duckdb_backend.painel(cd_estado, ano_min, ano_max, sexos)
+    return load_filter_index().query(cd_estado, ano_min, ano_max, sexos)
+
+
+def _checa_ordem(sort_by: str | None) -> None:
+    if sort_by is not None and sort_by not in DETAIL_COLUMNS:
+        raise ValueError(f"Coluna de ordenação inválida: {sort_by!r} (use {', '.join(DETAIL_COLUMNS)})")
+
+
+def _filtros_sql(key: tuple) -> dict:
+    uf, ano_min, ano_max, sexos = key
+    return dict(ufs=None if uf is None else [uf], ano_min=ano_min, ano_max=ano_max, sexos=sexos)
+
+
+def detail_count(cd_estado: str | None, ano_min: int, ano_max: int, sexos: Iterable[str]) -> int:
+    """Nº de linhas da tabela detalhada do filtro."""
+    if USA_DUCKDB:
+        return duckdb_backend.count_rows(cd_estado, ano_min, ano_max, sexos)
+    return summary(cd_estado, ano_min, ano_max, sexos).n_rows
+
+
+def detail_page(
+    cd_estado: str | None,
+    ano_min: int,
+    ano_max: int,
+    sexos: Iterable[str],
+    *,
+    offset: int = 0,
+    limit: int = 100,
+    sort_by: str | None = None,
+    descending: bool = False,
+) -> pd.DataFrame:
+    """
+    Uma página da tabela detalhada, ordenada no servidor.
+
+    Parameters
+    ----------
+    offset, limit :
+        Fatia ``[offset, offset + limit)`` das linhas do filtro.
+    sort_by :
+        Coluna de :data:`DETAIL_COLUMNS`; ``None`` mantém a ordem do arquivo.
+    """
+    _checa_ordem(sort_by)
+    key = PronafFilterIndex.key(cd_estado, ano_min, ano_max, sexos)
+    if USA_DUCKDB:
+        return duckdb_backend.rows(DETAIL_COLUMNS, limit=limit, offset=offset, order_by=sort_by,
+                                   descending=descending, **_filtros_sql(key))
+    return load_filter_index().page(key, DETAIL_COLUMNS, offset=offset, limit=limit,
+                                    sort_by=sort_by, descending=descending)
+
+
+def detail_csv(
+    cd_estado: str | None,
+    ano_min: int,
+    ano_max: int,
+    sexos: Iterable[str],
+    *,
+    sort_by: str | None = None,
+    descending: bool = False,
+    chunk_rows: int = CSV_CHUNK_ROWS,
+) -> Iterator[str]:
+    """CSV da tabela detalhada do filtro inteiro, em pedaços de ``chunk_rows`` linhas."""
+    _checa_ordem(sort_by)
+    key = PronafFilterIndex.key(cd_estado, ano_min, ano_max, sexos)
+    if USA_DUCKDB:
+        return duckdb_backend.iter_csv(DETAIL_COLUMNS, order_by=sort_by, descending=descending,
+                                       chunk_rows=chunk_rows, **_filtros_sql(key))
+    return load_filter_index().iter_csv(key, DETAIL_COLUMNS, sort_by=sort_by,
+                                        descending=descending, chunk_rows=chunk_rows)
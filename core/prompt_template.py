@@ -16,7 +16,10 @@ RAW_TEMPLATE = (
     "Pergunta: {question}\n\n"
     "Se o contexto não contiver informações suficientes ou a pergunta "
     "requerer dados específicos de um estado (ex.: 'SP', 'RS'), "
-    "invoque a função 'consulta_pronaf_por_estado'.\n"
+    "invoque a função 'consulta_pronaf_por_estado'. Para totais, "
+    "intervalos de anos, filtros por sexo, comparações ou rankings "
+    "(ex.: 'top 5 UFs'), prefira 'consulta_pronaf', que já devolve "
+    "os números agregados.\n"
     "Os dados da função são extraídos do Banco Central do Brasil "
     "(https://www.bcb.gov.br/estabilidadefinanceira/creditorural).\n\n"
     "Com base no contexto e nos dados oficiais, responda em linguagem simples, "
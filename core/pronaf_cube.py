@@ -0,0 +1,210 @@
+"""
+Cubo pré-agregado do PRONAF: CD_ESTADO × ANO × SEXO_BIOLOGICO.
+
+Cada célula guarda soma de crédito, nº de operações e o conjunto *exato* de
+beneficiários (códigos inteiros dos CPF/CNPJ). Como os conjuntos são
+guardados, células podem ser combinadas sem perder a contagem distinta —
+basta unir os códigos.
+
+O cubo é gerado uma vez por versão do Parquet (ver
+:func:`core.data_loader.parquet_fingerprint`) e persistido ao lado dele
+(``data/pronaf.cube.npz``).
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable
+
+import numpy as np
+
+from core.data_loader import load_pronaf, parquet_fingerprint
+from core.data_versions import pronaf_path, version_cache
+from core.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+CUBE_DIMS = ["CD_ESTADO", "ANO", "SEXO_BIOLOGICO"]
+MEASURES = ["Soma_VL_PARC_CREDITO", "Quantidade_Operacoes", "Quantidade_Beneficiarios"]
+
+
+def cube_path(parquet_path: str | None = None) -> str:
+    """Caminho do cubo persistido para um dado Parquet."""
+    return os.path.splitext(parquet_path or pronaf_path())[0] + ".cube.npz"
+
+
+class PronafCube:
+    """
+    Cubo em memória.
+
+    Attributes
+    ----------
+    cells :
+        Uma linha por célula (dimensões + medidas), ordenada por ``CUBE_DIMS``.
+    benef :
+        Códigos dos beneficiários distintos de cada célula, concatenados;
+        a célula ``i`` ocupa ``benef[offsets[i]:offsets[i + 1]]``.
+    n_benef :
+        Total de beneficiários distintos na base (tamanho do dicionário).
+    """
+
+    def __init__(
+        self,
+        cells: pd.DataFrame,
+        benef: np.ndarray,
+        offsets: np.ndarray,
+        n_benef: int,
+        fingerprint: str = "",
+    ) -> None:
+        self.cells = cells
+        self.benef = benef
+        self.offsets = offsets
+        self.n_benef = n_benef
+        self.fingerprint = fingerprint
+
+    # -------- Seleção --------
+    def mask(
+        self,
+        cd_estado: str | None = None,
+        ano_min: int | None = None,
+        ano_max: int | None = None,
+        sexos: Iterable[str] | None = None,
+    ) -> np.ndarray:
+        """Máscara booleana das células que atendem aos filtros."""
+        c = self.cells
+        m = np.ones(len(c), dtype=bool)
+        if cd_estado is not None:
+            m &= (c["CD_ESTADO"] == cd_estado.upper()).to_numpy()
+        if ano_min is not None:
+            m &= (c["ANO"] >= ano_min).to_numpy()
+        if ano_max is not None:
+            m &= (c["ANO"] <= ano_max).to_numpy()
+        if sexos is not None:
+            m &= c["SEXO_BIOLOGICO"].isin(list(sexos)).to_numpy()
+        return m
+
+    def distinct_beneficiarios(self, mask: np.ndarray) -> int:
+        """Nº exato de beneficiários distintos na união das células marcadas."""
+        idx = np.flatnonzero(mask)
+        if idx.size == 0:
+            return 0
+        if idx.size == 1:
+            i = idx[0]
+            return int(self.offsets[i + 1] - self.offsets[i])
+        vistos = np.zeros(self.n_benef, dtype=bool)
+        for i in idx:
+            vistos[self.benef[self.offsets[i]:self.offsets[i + 1]]] = True
+        return int(vistos.sum())
+
+    def totals(self, mask: np.ndarray) -> dict[str, float | int]:
+        """KPIs agregados (soma, operações, beneficiários) das células."""
+        sel = self.cells.loc[mask]
+        return {
+            "Soma_VL_PARC_CREDITO": float(sel["Soma_VL_PARC_CREDITO"].sum()),
+            "Quantidade_Operacoes": int(sel["Quantidade_Operacoes"].sum()),
+            "Quantidade_Beneficiarios": self.distinct_beneficiarios(mask),
+        }
+
+    def resumo_estado(self, cd_estado: str) -> pd.DataFrame:
+        """Tabela ANO × SEXO_BIOLOGICO de uma UF (mesmo formato da tool)."""
+        sel = self.cells.loc[self.mask(cd_estado=cd_estado)]
+        return sel[["ANO", "SEXO_BIOLOGICO", *MEASURES]].reset_index(drop=True)
+
+    # -------- Persistência --------
+    def save(self, path: str) -> None:
+        c = self.cells
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            cd_estado=c["CD_ESTADO"].to_numpy(dtype=str),
+            ano=c["ANO"].to_numpy(),
+            sexo=c["SEXO_BIOLOGICO"].to_numpy(dtype=str),
+            soma=c["Soma_VL_PARC_CREDITO"].to_numpy(),
+            operacoes=c["Quantidade_Operacoes"].to_numpy(),
+            beneficiarios=c["Quantidade_Beneficiarios"].to_numpy(),
+            benef=self.benef,
+            offsets=self.offsets,
+            n_benef=np.int64(self.n_benef),
+            fingerprint=np.str_(self.fingerprint),
+        )
+        os.replace(tmp, path)                        # troca atômica
+
+    @classmethod
+    def load(cls, path: str) -> "PronafCube":
+        with np.load(path, allow_pickle=False) as z:
+            cells = pd.DataFrame({
+                "CD_ESTADO": z["cd_estado"].astype(object),
+                "ANO": z["ano"],
+                "SEXO_BIOLOGICO": z["sexo"].astype(object),
+                "Soma_VL_PARC_CREDITO": z["soma"],
+                "Quantidade_Operacoes": z["operacoes"],
+                "Quantidade_Beneficiarios": z["beneficiarios"],
+            })
+            return cls(
+                cells, z["benef"], z["offsets"],
+                int(z["n_benef"]), str(z["fingerprint"]),
+            )
+
+
+# -------- Construção --------
+def build_cube(df: pd.DataFrame, fingerprint: str = "") -> PronafCube:
+    """Agrega o DataFrame bruto do PRONAF em um :class:`PronafCube`."""
+    codes, uniques = pd.factorize(df["CD_CPF_CNPJ"])  # NaN → -1
+    base = df[CUBE_DIMS].copy()
+    base["VL_PARC_CREDITO"] = df["VL_PARC_CREDITO"]
+    base["_benef"] = codes
+    base["_valido"] = codes >= 0                      # "count" ignora nulos
+    base["_cell"] = base.groupby(CUBE_DIMS, sort=True).ngroup()
+    base = base[base["_cell"] >= 0]                   # chaves nulas ficam fora
+
+    g = base.groupby("_cell", sort=True)
+    cells = g[CUBE_DIMS].first()
+    cells["Soma_VL_PARC_CREDITO"] = g["VL_PARC_CREDITO"].sum()
+    cells["Quantidade_Operacoes"] = g["_valido"].sum()
+
+    # pares (célula, beneficiário) distintos, ordenados por célula
+    pares = (
+        base.loc[base["_benef"] >= 0, ["_cell", "_benef"]]
+        .drop_duplicates()
+        .sort_values(["_cell", "_benef"])
+    )
+    contagem = pares.groupby("_cell").size().reindex(cells.index, fill_value=0)
+    cells["Quantidade_Beneficiarios"] = contagem.to_numpy()
+
+    offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+    np.cumsum(contagem.to_numpy(), out=offsets[1:])
+    benef = pares["_benef"].to_numpy(dtype=np.int32)
+
+    return PronafCube(
+        cells.reset_index(drop=True), benef, offsets, len(uniques), fingerprint,
+    )
+
+
+@version_cache
+def _cube_for_version(path: str, fingerprint: str) -> PronafCube:
+    destino = cube_path(path)
+    if os.path.exists(destino):
+        try:
+            cube = PronafCube.load(destino)
+            if cube.fingerprint == fingerprint:
+                return cube
+        except (OSError, ValueError, KeyError):
+            pass                                     # arquivo corrompido → refaz
+
+    cube = build_cube(load_pronaf(path), fingerprint)
+    try:
+        cube.save(destino)
+    except OSError:
+        pass                                         # FS somente leitura: só memória
+    return cube
+
+
+def load_cube(path: str | None = None) -> PronafCube:
+    """
+    Cubo da versão atual do Parquet.
+
+    Reaproveita o ``.cube.npz`` persistido quando o fingerprint coincide;
+    caso contrário reconstrói a partir de ``load_pronaf`` e grava de novo.
+    """
+    path = path or pronaf_path()
+    return _cube_for_version(path, parquet_fingerprint(path))
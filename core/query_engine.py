@@ -0,0 +1,270 @@
+"""
+Motor de consultas estruturadas sobre o PRONAF (usado pela tool ``consulta_pronaf``).
+
+A LLM descreve a pergunta como JSON — filtros, dimensões, medidas, ordenação
+e limite — e o planejador escolhe a fonte mais barata que responde:
+
+- **cubo** (:mod:`core.pronaf_cube`) quando filtros e dimensões cabem em
+  CD_ESTADO × ANO × SEXO_BIOLOGICO (contagem distinta exata pela união
+  dos conjuntos de beneficiários);
+- **colunar** nos demais casos, sobre o frame compacto único do índice de
+  filtros (:mod:`core.filter_index`): as partições UF × ANO viram posições,
+  sem recortes extras do Parquet em memória;
+- **duckdb** sempre que ``CHAT_PRONAF_BACKEND=duckdb`` — a consulta vira
+  SQL sobre o Parquet, sem carregar o frame.
+
+O resultado já vem agregado, ordenado e cortado em ``limite`` linhas.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from core import duckdb_backend
+from core.data_loader import BENEF_COL, BENEF_NULO, PRONAF_BACKEND
+from core.filter_index import load_filter_index
+from core.lazy import lazy_import
+from core.pronaf_cube import CUBE_DIMS, load_cube
+
+pd = lazy_import("pandas")
+
+UFS = (
+    "AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA",
+    "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO",
+)
+DIMENSOES = ("CD_ESTADO", "ANO", "SEXO_BIOLOGICO", "SAFRA")
+MEDIDAS = ("credito_total", "operacoes", "beneficiarios", "ticket_medio")
+LIMITE_MAX = 50
+
+# também é o "parameters" da tool em TOOLS_SPEC
+CONSULTA_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "filtros": {
+            "type": "object",
+            "description": "Restrições sobre as operações. Omitir = sem filtro.",
+            "properties": {
+                "ufs": {"type": "array", "items": {"type": "string", "enum": list(UFS)},
+                        "description": "Siglas das UFs, ex.: ['RS', 'SC']."},
+                "ano_min": {"type": "integer", "minimum": 1990, "maximum": 2100},
+                "ano_max": {"type": "integer", "minimum": 1990, "maximum": 2100},
+                "sexos": {"type": "array", "items": {"type": "string"},
+                          "description": "Valores de SEXO_BIOLOGICO como na base, ex.: ['Feminino'] "
+                                         "(maiúsculas e acentos são ignorados)."},
+                "safras": {"type": "array", "items": {"type": "string"},
+                           "description": "Safras no formato 'AAAA/AAAA'."},
+            },
+            "additionalProperties": False,
+        },
+        "dimensoes": {
+            "type": "array",
+            "items": {"type": "string", "enum": list(DIMENSOES)},
+            "uniqueItems": True,
+            "description": "Colunas de agrupamento. Vazio = um único total.",
+        },
+        "medidas": {
+            "type": "array",
+            "items": {"type": "string", "enum": list(MEDIDAS)},
+            "minItems": 1,
+            "uniqueItems": True,
+            "description": "credito_total (R$), operacoes, beneficiarios (distintos), ticket_medio (R$/operação).",
+        },
+        "ordenar_por": {"type": "string", "enum": list(MEDIDAS) + list(DIMENSOES)},
+        "ordem": {"type": "string", "enum": ["desc", "asc"]},
+        "limite": {"type": "integer", "minimum": 1, "maximum": LIMITE_MAX},
+    },
+    "required": ["medidas"],
+    "additionalProperties": False,
+}
+
+
+class QueryError(ValueError):
+    """Consulta inválida; a mensagem é devolvida à LLM para correção."""
+
+
+@dataclass
+class QuerySpec:
+    medidas: list[str]
+    dimensoes: list[str] = field(default_factory=list)
+    ufs: list[str] | None = None
+    ano_min: int | None = None
+    ano_max: int | None = None
+    sexos: list[str] | None = None
+    safras: list[str] | None = None
+    ordenar_por: str | None = None
+    ordem: str = "desc"
+    limite: int = 20
+
+
+@lru_cache(maxsize=1)
+def _validator():
+    # validador montado 1x (``jsonschema.validate`` revalida o schema a cada chamada)
+    import jsonschema
+
+    cls = jsonschema.validators.validator_for(CONSULTA_SCHEMA)
+    cls.check_schema(CONSULTA_SCHEMA)
+    return cls(CONSULTA_SCHEMA)
+
+
+def _chave_sexo(valor: str) -> str:
+    texto = unicodedata.normalize("NFKD", str(valor).strip().casefold())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def sexo_values() -> list[str]:
+    """Grafias de ``SEXO_BIOLOGICO`` gravadas na versão ativa dos dados."""
+    if PRONAF_BACKEND == "duckdb":
+        return duckdb_backend.distinct_values("SEXO_BIOLOGICO")
+    return sorted(str(v) for v in load_cube().cells["SEXO_BIOLOGICO"].dropna().unique())
+
+
+def canonical_sexos(valores: list[str]) -> list[str]:
+    """
+    Troca cada valor pela grafia da base ("FEMININO", "feminino" → "Feminino"),
+    comparando sem maiúsculas nem acentos; ``QueryError`` se não existir.
+    """
+    gravados = {_chave_sexo(v): v for v in sexo_values()}
+    saida = []
+    for v in valores:
+        if _chave_sexo(v) not in gravados:
+            raise QueryError(
+                f"Sexo desconhecido: {v!r} (valores: {', '.join(gravados.values())})."
+            )
+        saida.append(gravados[_chave_sexo(v)])
+    return saida
+
+
+def parse_query(args: dict[str, Any]) -> QuerySpec:
+    """Valida ``args`` contra :data:`CONSULTA_SCHEMA` e normaliza valores."""
+    import jsonschema
+
+    if isinstance(args.get("filtros"), dict) and "ufs" in args["filtros"]:
+        args = {**args, "filtros": {**args["filtros"],
+                "ufs": [str(u).strip().upper() for u in args["filtros"]["ufs"]]}}
+    try:
+        _validator().validate(args)
+    except jsonschema.ValidationError as exc:
+        caminho = "/".join(str(p) for p in exc.absolute_path) or "raiz"
+        raise QueryError(f"Parâmetro inválido em '{caminho}': {exc.message}") from None
+
+    f = args.get("filtros") or {}
+    spec = QuerySpec(
+        medidas=list(args["medidas"]),
+        dimensoes=list(args.get("dimensoes") or []),
+        ufs=f.get("ufs") or None,
+        ano_min=f.get("ano_min"),
+        ano_max=f.get("ano_max"),
+        sexos=canonical_sexos(f["sexos"]) if f.get("sexos") else None,
+        safras=f.get("safras") or None,
+        ordenar_por=args.get("ordenar_por"),
+        ordem=args.get("ordem", "desc"),
+        limite=args.get("limite", 20),
+    )
+    if spec.ano_min is not None and spec.ano_max is not None and spec.ano_min > spec.ano_max:
+        raise QueryError("ano_min maior que ano_max.")
+    if spec.ordenar_por in DIMENSOES and spec.ordenar_por not in spec.dimensoes:
+        raise QueryError(f"ordenar_por='{spec.ordenar_por}' precisa estar em dimensoes.")
+    return spec
+
+
+# -------- Planejador --------
+def plan(spec: QuerySpec) -> str:
+    """``"duckdb"`` (se for o backend), ``"cubo"`` se ele responde, ou ``"colunar"``."""
+    if PRONAF_BACKEND == "duckdb":
+        return "duckdb"
+    if spec.safras is None and set(spec.dimensoes) <= set(CUBE_DIMS):
+        return "cubo"
+    return "colunar"
+
+
+def _run_cube(spec: QuerySpec) -> pd.DataFrame:
+    cube = load_cube()
+    c = cube.cells
+    m = cube.mask(ano_min=spec.ano_min, ano_max=spec.ano_max, sexos=spec.sexos)
+    if spec.ufs is not None:
+        m &= c["CD_ESTADO"].isin(spec.ufs).to_numpy()
+
+    sel = c.loc[m]
+    if not spec.dimensoes:
+        grupos = [((), sel.index.to_numpy())]
+    else:
+        grupos = [
+            (k if isinstance(k, tuple) else (k,), idx.to_numpy())
+            for k, idx in sel.groupby(spec.dimensoes, sort=False).groups.items()
+        ]
+
+    linhas = []
+    for chave, posicoes in grupos:
+        mask_g = np.zeros(len(c), dtype=bool)
+        mask_g[posicoes] = True
+        tot = cube.totals(mask_g)
+        linhas.append({
+            **dict(zip(spec.dimensoes, chave)),
+            "credito_total": tot["Soma_VL_PARC_CREDITO"],
+            "operacoes": tot["Quantidade_Operacoes"],
+            "beneficiarios": tot["Quantidade_Beneficiarios"],
+        })
+    return pd.DataFrame(linhas, columns=[*spec.dimensoes, "credito_total", "operacoes", "beneficiarios"])
+
+
+def _run_columnar(spec: QuerySpec) -> pd.DataFrame:
+    # partições UF × ANO do filtro como posições no frame do índice (um
+    # por processo e versão); SEXO e SAFRA filtram só essas linhas
+    idx = load_filter_index()
+    df = idx.df
+    pos = idx.select(spec.ufs, spec.ano_min, spec.ano_max)
+
+    m = np.ones(len(pos), dtype=bool)
+    if spec.sexos is not None:
+        m &= df["SEXO_BIOLOGICO"].iloc[pos].isin(spec.sexos).to_numpy()
+    if spec.safras is not None:
+        m &= df["SAFRA"].iloc[pos].isin(spec.safras).to_numpy()
+
+    colunas = [*spec.dimensoes, "VL_PARC_CREDITO", BENEF_COL]
+    sel = df.iloc[pos[m], [df.columns.get_loc(c) for c in colunas]]
+    benef = sel[BENEF_COL].where(sel[BENEF_COL] != BENEF_NULO)
+    sel = sel.assign(_benef=benef, _vl=sel["VL_PARC_CREDITO"].astype("float64"))
+
+    aggs = dict(
+        credito_total=("_vl", "sum"),
+        operacoes=("_benef", "count"),
+        beneficiarios=("_benef", "nunique"),
+    )
+    if not spec.dimensoes:
+        return pd.DataFrame([{
+            "credito_total": float(sel["_vl"].sum()),
+            "operacoes": int(sel["_benef"].count()),
+            "beneficiarios": int(sel["_benef"].nunique()),
+        }])
+    return sel.groupby(spec.dimensoes, observed=True).agg(**aggs).reset_index()
+
+
+def _run_duckdb(spec: QuerySpec) -> pd.DataFrame:
+    return duckdb_backend.aggregate(
+        spec.dimensoes,
+        ufs=spec.ufs, ano_min=spec.ano_min, ano_max=spec.ano_max,
+        sexos=spec.sexos, safras=spec.safras,
+    )
+
+
+_EXECUTORES = {"cubo": _run_cube, "colunar": _run_columnar, "duckdb": _run_duckdb}
+
+def run_query(spec: QuerySpec) -> tuple[pd.DataFrame, str]:
+    """Executa a consulta; devolve (tabela final, fonte usada)."""
+    fonte = plan(spec)
+    res = _EXECUTORES[fonte](spec)
+
+    res["ticket_medio"] = res["credito_total"] / res["operacoes"].where(res["operacoes"] > 0)
+    chave = spec.ordenar_por or (spec.medidas[0] if spec.dimensoes else None)
+    if chave is not None and not res.empty:
+        res = res.sort_values(chave, ascending=spec.ordem == "asc", kind="stable")
+    res = res[[*spec.dimensoes, *spec.medidas]].head(spec.limite).reset_index(drop=True)
+    for col in spec.dimensoes:
+        if isinstance(res[col].dtype, pd.CategoricalDtype):
+            res[col] = res[col].astype(str)
+    return res, fonte
@@ -1,16 +1,99 @@
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+import os
+
+from core.data_versions import DataVersion, active_version, on_swap, persist_dir, pronaf_path
+from core.resources import get_resource, peek_resource, register_resource, warm_up
+from core.semantic_cache import SemanticCache, data_version
+from core.hybrid_retriever import HybridRetriever, load_or_build_bm25
+from core.vector_index import VECTOR_STORE
 
 EMBED_MODEL = "sentence-transformers/all-mpnet-base-v2"
-PERSIST_DIR = "data/data-rag/persist_directory"
+PERSIST_DIR = "data/data-rag/persist_directory"   # layout sem versões (core/data_versions.py)
 N_DOCS      = 3   # k do retriever
+CONTEXT_TOKENS = int(os.getenv("CHAT_PRONAF_CONTEXT_TOKENS", "1500"))  # teto do contexto
+BM25_PATH   = "data/data-rag/bm25_index.pkl"
 
-def get_embeddings():
-    # pode colocar @st.cache_resource aqui se quiser
-    return HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+# cross-encoder local p/ re-rank (vazio = desligado), ex.:
+# "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1" (multilíngue, ~120 MB)
+RERANK_MODEL = os.getenv("CHAT_PRONAF_RERANKER", "")
 
-def get_vector_db():
+# "1" → carrega modelo + Chroma em background assim que o módulo é importado
+WARM_AT_BOOT = os.getenv("CHAT_PRONAF_WARM_AT_BOOT", "0") == "1"
+
+def _load_embeddings():
+    # backend por CHAT_PRONAF_EMBED_BACKEND (torch | onnx) — core/embeddings.py;
+    # importado aqui para a página abrir sem langchain/torch
+    from core.embeddings import load_embeddings
+    return load_embeddings(EMBED_MODEL)
+
+def build_vector_db(version: DataVersion):
+    """Base vetorial de ``version`` (usada também pela troca a quente)."""
+    # CHAT_PRONAF_VECTOR_STORE=numpy → índice exato via mmap (core/vector_index.py),
+    # exportado por `python -m scripts.export_vector_index`; sem SQLite/HNSW
+    if VECTOR_STORE == "numpy":
+        from core.vector_index import NumpyVectorIndex
+        return NumpyVectorIndex(version.vector_index_dir, embedding=get_embeddings())
+    from langchain_community.vectorstores import Chroma
     return Chroma(
-        persist_directory=PERSIST_DIR,
+        persist_directory=version.persist_dir,
         embedding_function=get_embeddings()
     )
+
+def build_retriever(vector_db, version: DataVersion):
+    """Retriever híbrido sobre ``vector_db``, com o BM25 de ``version``."""
+    reranker = None
+    if RERANK_MODEL:
+        atual = peek_resource("retriever")           # modelo não depende dos dados
+        if atual is not None and atual.reranker is not None:
+            reranker = atual.reranker
+        else:
+            from sentence_transformers import CrossEncoder
+            reranker = CrossEncoder(RERANK_MODEL)
+    return HybridRetriever(
+        vector_db,
+        load_or_build_bm25(vector_db, version.persist_dir, version.bm25_path),
+        reranker=reranker,
+    )
+
+def _load_vector_db():
+    return build_vector_db(active_version())
+
+def _load_semantic_cache():
+    return SemanticCache(
+        lambda texto: get_embeddings().embed_query(texto),
+        version_fn=lambda: data_version(persist_dir(), pronaf_path()),
+    )
+
+def _load_retriever():
+    return build_retriever(get_vector_db(), active_version())
+
+register_resource("embeddings", _load_embeddings)
+register_resource("vector_db", _load_vector_db)
+register_resource("semantic_cache", _load_semantic_cache)
+register_resource("retriever", _load_retriever)
+
+def get_embeddings():
+    """Modelo de embeddings único do processo (compartilhado entre sessões)."""
+    return get_resource("embeddings")
+
+def get_vector_db():
+    """Chroma (ou índice NumPy) único do processo, reaproveitando ``get_embeddings()``."""
+    return get_resource("vector_db")
+
+def get_retriever():
+    """Retriever híbrido (BM25 + Chroma, re-rank opcional), único por processo."""
+    return get_resource("retriever")
+
+def get_semantic_cache():
+    """Cache semântico de respostas, único por processo."""
+    return get_resource("semantic_cache")
+
+def _clear_semantic_cache():
+    # a checagem de versão do cache é espaçada; na troca, esvazia na hora
+    cache = peek_resource("semantic_cache")
+    if cache is not None:
+        cache.invalidate()
+
+on_swap("semantic_cache", _clear_semantic_cache)
+
+if WARM_AT_BOOT:
+    warm_up(["embeddings", "vector_db", "retriever"], background=True)
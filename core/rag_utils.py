@@ -3,6 +3,7 @@ Funções auxiliares para o pipeline RAG.
 """
 
 from collections.abc import Sequence
+from functools import lru_cache
 from typing import Any
 
 def format_docs(
@@ -45,3 +46,139 @@ def format_docs(
         chunks.append(f"{header}{content}")
 
     return sep.join(chunks)
+
+
+# -------- Contagem de tokens --------
+@lru_cache(maxsize=4)
+def _encoder(model: str):
+    try:
+        import tiktoken
+    except ImportError:                              # pragma: no cover
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:                                # BPE baixado na 1ª vez;
+        return None                                  # offline → estimativa
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Nº de tokens de ``text`` para ``model`` (≈ len/4 sem ``tiktoken``)."""
+    enc = _encoder(model)
+    if enc is None:
+        return max(1, len(text) // 4)
+    return len(enc.encode(text))
+
+def _truncate_tokens(text: str, max_tokens: int, model: str) -> str:
+    enc = _encoder(model)
+    if enc is None:
+        return text[: max_tokens * 4]
+    return enc.decode(enc.encode(text)[:max_tokens])
+
+
+# -------- Empacotamento do contexto --------
+def _merge_overlap(a: str, b: str, min_overlap: int) -> str | None:
+    """Junta ``a`` e ``b`` se um contém o outro ou se o fim de ``a`` abre ``b``."""
+    if b in a:
+        return a
+    if a in b:
+        return b
+    for n in range(min(len(a), len(b)) - 1, min_overlap - 1, -1):
+        if a.endswith(b[:n]):
+            return a + b[n:]
+        if b.endswith(a[:n]):
+            return b + a[n:]
+    return None
+
+def _shingles(text: str, n: int = 3) -> set[tuple[str, ...]]:
+    palavras = text.lower().split()
+    return {tuple(palavras[i:i + n]) for i in range(max(1, len(palavras) - n + 1))}
+
+def pack_context(
+    docs: Sequence[Any],
+    *,
+    budget_tokens: int = 1500,
+    model: str = "gpt-4o-mini",
+    sep: str = "\n\n",
+    header_key: str = "page",
+    dedup_threshold: float = 0.8,
+    min_overlap: int = 20,
+    min_fragment_tokens: int = 40,
+) -> str:
+    """
+    Monta o contexto do prompt respeitando um orçamento de tokens.
+
+    1. Chunks da mesma página (``source`` + ``header_key``) são fundidos num
+       único bloco; trechos sobrepostos (overlap do splitter) aparecem uma vez.
+    2. Blocos quase duplicados (Jaccard de trigramas ≥ ``dedup_threshold``)
+       são descartados.
+    3. Os blocos entram por ordem de relevância até esgotar ``budget_tokens``;
+       o último pode ser truncado se ainda couberem ``min_fragment_tokens``.
+
+    Parameters
+    ----------
+    docs :
+        Documentos na ordem do retriever; se houver ``metadata["score"]``
+        ele define a ordem (maior primeiro).
+    budget_tokens :
+        Teto de tokens do contexto (contados para ``model``).
+
+    Returns
+    -------
+    str
+        Texto no mesmo formato de :func:`format_docs`.
+    """
+    # --- 1) agrupa por página preservando a melhor posição do grupo ---------
+    grupos: dict[tuple, dict[str, Any]] = {}
+    for pos, doc in enumerate(docs):
+        content = getattr(doc, "page_content", "").strip()
+        if not content:
+            continue
+        meta = getattr(doc, "metadata", None) or {}
+        score = meta.get("score")
+        rank = -float(score) if score is not None else float(pos)
+        if meta.get(header_key) is not None:
+            chave = (meta.get("source"), meta[header_key])
+        else:
+            chave = ("sem-pagina", pos)             # não funde sem referência
+
+        g = grupos.setdefault(chave, {"rank": rank, "partes": [], "meta": meta})
+        g["rank"] = min(g["rank"], rank)
+        for i, parte in enumerate(g["partes"]):
+            fundido = _merge_overlap(parte, content, min_overlap)
+            if fundido is not None:
+                g["partes"][i] = fundido
+                break
+        else:
+            g["partes"].append(content)
+
+    blocos = sorted(grupos.values(), key=lambda g: g["rank"])
+
+    # --- 2+3) deduplica e preenche o orçamento -------------------------------
+    escolhidos: list[str] = []
+    vistos: list[set] = []
+    restante = budget_tokens
+    sep_tokens = count_tokens(sep, model)
+
+    for g in blocos:
+        texto = " […] ".join(g["partes"])
+        sh = _shingles(texto)
+        if any(len(sh & v) / len(sh | v) >= dedup_threshold for v in vistos):
+            continue
+
+        header = ""
+        if g["meta"].get(header_key):
+            header = f"{header_key.capitalize()}: {g['meta'][header_key]}\n"
+        bloco = f"{header}{texto}"
+
+        custo = count_tokens(bloco, model) + (sep_tokens if escolhidos else 0)
+        if custo > restante:
+            if restante - sep_tokens >= min_fragment_tokens:
+                escolhidos.append(_truncate_tokens(bloco, restante - sep_tokens, model))
+            break
+        escolhidos.append(bloco)
+        vistos.append(sh)
+        restante -= custo
+
+    return sep.join(escolhidos)
@@ -0,0 +1,170 @@
+"""
+Registro de recursos pesados compartilhados por todo o processo.
+
+O Streamlit reexecuta o script da página a cada interação, mas os módulos
+importados ficam em ``sys.modules`` durante toda a vida do servidor. Um
+registro no nível do módulo é, portanto, compartilhado por todas as sessões
+(e também pela API e pelos benchmarks, que não usam Streamlit).
+
+Cada recurso é criado sob demanda (*lazy*) na primeira chamada a
+:func:`get_resource`; ``warm_up`` permite antecipar a carga no boot.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+
+# -------- Medição de memória --------
+def current_rss_mb() -> float:
+    """RSS do processo atual em MB (``psutil`` se disponível)."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss / 2**20
+    except ImportError:                              # pragma: no cover
+        import resource                              # só Unix; pico, não atual
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# -------- Entrada do registro --------
+@dataclass
+class _Entry:
+    factory: Callable[[], Any]
+    value: Any = None
+    loaded: bool = False
+    load_seconds: float = 0.0
+    rss_delta_mb: float = 0.0
+    loads: int = 0
+    hits: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_REGISTRY: dict[str, _Entry] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def register_resource(name: str, factory: Callable[[], Any]) -> None:
+    """Registra (ou substitui) a fábrica de um recurso ainda não carregado."""
+    with _REGISTRY_LOCK:
+        entry = _REGISTRY.get(name)
+        if entry is None or not entry.loaded:
+            _REGISTRY[name] = _Entry(factory=factory)
+
+
+def get_resource(name: str) -> Any:
+    """
+    Devolve a instância única do recurso ``name``, criando-a se preciso.
+
+    A criação é protegida por um lock por recurso: várias sessões que
+    chegam ao mesmo tempo esperam pela mesma carga em vez de duplicá-la.
+    """
+    try:
+        entry = _REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Recurso '{name}' não registrado.") from None
+
+    if entry.loaded:
+        entry.hits += 1
+        return entry.value
+
+    with entry.lock:
+        if not entry.loaded:                         # double-checked locking
+            rss0, t0 = current_rss_mb(), time.perf_counter()
+            entry.value = entry.factory()
+            entry.load_seconds = time.perf_counter() - t0
+            entry.rss_delta_mb = current_rss_mb() - rss0
+            entry.loads += 1
+            entry.loaded = True
+        else:
+            entry.hits += 1
+    return entry.value
+
+
+def reset_resource(name: str) -> None:
+    """Descarta a instância carregada; a próxima chamada recria o recurso."""
+    entry = _REGISTRY.get(name)
+    if entry is None:
+        return
+    with entry.lock:
+        entry.value = None
+        entry.loaded = False
+
+
+def peek_resource(name: str) -> Any | None:
+    """A instância já carregada de ``name``, ou ``None`` (sem disparar a carga)."""
+    entry = _REGISTRY.get(name)
+    return entry.value if entry is not None and entry.loaded else None
+
+
+def swap_resources(values: dict[str, Any]) -> dict[str, Any]:
+    """
+    Troca as instâncias de vários recursos de uma vez e devolve as antigas.
+
+    As novas já vêm prontas (carregadas fora daqui); a troca em si é só
+    atribuição sob os locks — quem já pegou a instância antiga termina com
+    ela, as chamadas seguintes a :func:`get_resource` recebem a nova.
+    """
+    antigos: dict[str, Any] = {}
+    with _REGISTRY_LOCK:
+        for name, value in values.items():
+            entry = _REGISTRY[name]
+            with entry.lock:
+                antigos[name] = entry.value
+                entry.value = value
+                entry.loaded = True
+                entry.loads += 1
+    return antigos
+
+
+def warm_up(
+    names: Iterable[str] | None = None,
+    *,
+    background: bool = False,
+) -> threading.Thread | None:
+    """
+    Carrega antecipadamente os recursos indicados (todos, por padrão).
+
+    Com ``background=True`` a carga roda numa *thread* daemon e a função
+    retorna imediatamente, sem bloquear o primeiro render da página.
+    """
+    alvo = list(names) if names is not None else list(_REGISTRY)
+
+    def _run() -> None:
+        for name in alvo:
+            get_resource(name)
+
+    if not background:
+        _run()
+        return None
+
+    th = threading.Thread(target=_run, name="chat-pronaf-warmup", daemon=True)
+    th.start()
+    return th
+
+
+def resource_stats() -> list[dict[str, Any]]:
+    """
+    Métricas de cada recurso registrado.
+
+    Returns
+    -------
+    list[dict]
+        ``name``, ``loaded``, ``loads`` (1 + trocas de versão dos dados), ``hits``,
+        ``load_seconds`` e ``rss_delta_mb`` (variação de RSS na carga).
+    """
+    return [
+        {
+            "name": name,
+            "loaded": e.loaded,
+            "loads": e.loads,
+            "hits": e.hits,
+            "load_seconds": round(e.load_seconds, 3),
+            "rss_delta_mb": round(e.rss_delta_mb, 1),
+        }
+        for name, e in _REGISTRY.items()
+    ]
@@ -0,0 +1,220 @@
+"""
+Cache semântico de respostas, chaveado pelo embedding da pergunta.
+
+Perguntas parecidas ("O que é o PRONAF?" / "o que é pronaf") caem no mesmo
+registro quando a similaridade de cosseno entre seus vetores passa de
+``threshold``. O vetor vem do mesmo modelo de embeddings do RAG
+(:func:`core.rag_engine.get_embeddings`), então não há modelo extra em memória.
+
+- validade por TTL e despejo LRU (``max_entries``);
+- o cache inteiro é descartado quando a coleção do Chroma ou o Parquet mudam;
+- ``stats()`` expõe acertos, falhas e taxa de acerto.
+
+Perguntas com o mesmo texto-base e filtros diferentes ("crédito em SP em
+2023" / "crédito em RS em 2024") ficam a cosseno > 0,95 uma da outra; por
+isso cada registro leva um ``scope`` (UFs e anos citados, ver
+:func:`question_scope`) que precisa bater exatamente. O cache não vê o
+histórico da conversa: quem chama só grava turnos que não dependem dele.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from core.data_loader import PRONAF_PATH, dir_fingerprint, parquet_fingerprint
+from core.intent_router import extract_ufs, extract_years
+
+SEMCACHE_THRESHOLD = float(os.getenv("CHAT_PRONAF_SEMCACHE_THRESHOLD", "0.95"))
+SEMCACHE_TTL       = float(os.getenv("CHAT_PRONAF_SEMCACHE_TTL", "86400"))
+SEMCACHE_MAX       = int(os.getenv("CHAT_PRONAF_SEMCACHE_MAX", "1024"))
+
+
+Scope = tuple[Any, ...]
+
+
+@dataclass
+class CacheEntry:
+    question: str
+    answer: str
+    context: str
+    created: float
+    scope: Scope = ()
+
+
+@dataclass
+class CacheLookup:
+    """Resultado da consulta; ``vector`` serve para reaproveitar no ``store``."""
+    vector: np.ndarray
+    entry: CacheEntry | None = None
+    similarity: float = 0.0
+
+    @property
+    def hit(self) -> bool:
+        return self.entry is not None
+
+
+def question_scope(question: str) -> Scope:
+    """UFs e (ano_min, ano_max) citados na pergunta — parte exata da chave."""
+    return (tuple(extract_ufs(question)), extract_years(question))
+
+
+def data_version(
+    persist_dir: str | None = None,
+    parquet_path: str | None = PRONAF_PATH,
+) -> str:
+    """Versão combinada da coleção Chroma + Parquet (arquivos ausentes = ``-``)."""
+    partes = []
+    if persist_dir:
+        partes.append(dir_fingerprint(persist_dir) if os.path.isdir(persist_dir) else "-")
+    if parquet_path:
+        partes.append(parquet_fingerprint(parquet_path) if os.path.exists(parquet_path) else "-")
+    return "|".join(partes)
+
+
+class SemanticCache:
+    """
+    Parameters
+    ----------
+    embed_fn :
+        ``fn(texto) -> vetor`` (ex.: ``get_embeddings().embed_query``).
+    threshold :
+        Similaridade de cosseno mínima para considerar acerto.
+    ttl :
+        Tempo de vida de cada registro, em segundos.
+    max_entries :
+        Capacidade; o registro usado há mais tempo é despejado.
+    version_fn :
+        ``fn() -> str`` com a versão dos dados; mudou → cache esvaziado.
+    version_check_every :
+        Intervalo mínimo (s) entre verificações de versão.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], Sequence[float]],
+        *,
+        threshold: float = SEMCACHE_THRESHOLD,
+        ttl: float = SEMCACHE_TTL,
+        max_entries: int = SEMCACHE_MAX,
+        version_fn: Callable[[], str] | None = None,
+        version_check_every: float = 30.0,
+    ) -> None:
+        self._embed = embed_fn
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._version_fn = version_fn
+        self._version_every = version_check_every
+
+        self._entries: OrderedDict[int, CacheEntry] = OrderedDict()
+        self._vectors: dict[int, np.ndarray] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self._version = version_fn() if version_fn else ""
+        self._version_checked = time.monotonic()
+
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self.invalidations = 0
+
+    # -------- Apoio --------
+    def _vector(self, text: str) -> np.ndarray:
+        v = np.asarray(self._embed(text), dtype=np.float32)
+        n = np.linalg.norm(v)
+        return v / n if n else v
+
+    def _check_version(self) -> None:
+        if self._version_fn is None:
+            return
+        agora = time.monotonic()
+        if agora - self._version_checked < self._version_every:
+            return
+        self._version_checked = agora
+        versao = self._version_fn()
+        if versao != self._version:
+            self._version = versao
+            self.clear()
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+
+    def invalidate(self) -> None:
+        """Esvazia já e adota a versão atual dos dados (troca de versão)."""
+        self._version = self._version_fn() if self._version_fn else ""
+        self._version_checked = time.monotonic()
+        self.clear()
+        self.invalidations += 1
+
+    # -------- API --------
+    def lookup(self, question: str, scope: Scope = ()) -> CacheLookup:
+        """Procura uma resposta para pergunta semelhante a ``question`` com o mesmo ``scope``."""
+        self._check_version()
+        vec = self._vector(question)
+        agora = time.time()
+
+        with self._lock:
+            vencidos = [i for i, e in self._entries.items() if agora - e.created > self.ttl]
+            for i in vencidos:
+                del self._entries[i], self._vectors[i]
+            self.expirations += len(vencidos)
+
+            melhor, sim = None, -1.0
+            ids = [i for i, e in self._entries.items() if e.scope == scope]
+            if ids:
+                sims = np.stack([self._vectors[i] for i in ids]) @ vec
+                j = int(np.argmax(sims))
+                melhor, sim = ids[j], float(sims[j])
+
+            if melhor is not None and sim >= self.threshold:
+                self._entries.move_to_end(melhor)
+                self.hits += 1
+                return CacheLookup(vec, self._entries[melhor], sim)
+
+            self.misses += 1
+            return CacheLookup(vec, None, max(sim, 0.0))
+
+    def store(
+        self,
+        question: str,
+        answer: str,
+        context: str = "",
+        *,
+        vector: np.ndarray | None = None,
+        scope: Scope = (),
+    ) -> None:
+        """Guarda resposta + contexto recuperado (reuse ``vector`` do lookup)."""
+        if not answer:
+            return
+        vec = vector if vector is not None else self._vector(question)
+        with self._lock:
+            i = self._next_id
+            self._next_id += 1
+            self._entries[i] = CacheEntry(question, answer, context, time.time(), scope)
+            self._vectors[i] = vec
+            while len(self._entries) > self.max_entries:
+                velho, _ = self._entries.popitem(last=False)
+                del self._vectors[velho]
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
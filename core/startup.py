@@ -0,0 +1,166 @@
+"""
+Perfil da inicialização: tempo de import por módulo e até o 1º render.
+
+- :func:`mark` registra marcos (``"imports"``, ``"primeiro render"``…) em
+  segundos desde o início do processo — só a primeira ocorrência conta, já
+  que o Streamlit reexecuta a página a cada interação;
+- com ``CHAT_PRONAF_STARTUP_PROFILE=1``, :func:`install_import_profiler`
+  (chamado no topo de ``0_🤖 Início.py``) põe um *finder* na frente de
+  ``sys.meta_path`` que cronometra a execução de cada módulo importado
+  dali em diante: tempo acumulado (com os imports que ele dispara, como em
+  ``python -X importtime``) e próprio;
+- :func:`startup_report` resume tudo por pacote de topo (``pandas``,
+  ``openai``…) para a página ``3_⏱️ Latência.py``, o ``/health`` da API e
+  ``benchmarks/bench_startup.py``.
+
+Imports adiados (``core/lazy.py``) aparecem no relatório no instante em que
+de fato acontecem, na thread que os disparou.
+"""
+
+from __future__ import annotations
+
+import importlib.abc
+import importlib.machinery
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+STARTUP_PROFILE = os.getenv("CHAT_PRONAF_STARTUP_PROFILE", "0") == "1"
+
+
+def _process_start() -> float:
+    """
+    Início do processo (epoch). No Linux vem de ``/proc`` (resolução de 10 ms;
+    o ``create_time`` do psutil herda o boot em segundos inteiros); fora dele,
+    o import deste módulo.
+    """
+    try:
+        with open("/proc/self/stat") as fh:
+            inicio = int(fh.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+        return time.time() - (uptime - inicio)
+    except (OSError, ValueError, IndexError):        # pragma: no cover
+        return time.time()
+
+
+_T0 = _process_start()
+_MARKS: dict[str, float] = {}
+
+
+def since_start() -> float:
+    """Segundos desde o início do processo."""
+    return time.time() - _T0
+
+
+def mark(nome: str) -> float:
+    """Registra o marco ``nome`` (só a 1ª vez) e devolve seu instante."""
+    return _MARKS.setdefault(nome, since_start())
+
+
+# -------- Cronômetro de imports --------
+@dataclass
+class _ImportRecord:
+    module: str
+    cumulative_ms: float
+    self_ms: float
+    at_s: float          # instante (desde o início do processo) em que terminou
+    thread: str
+
+
+_IMPORTS: dict[str, _ImportRecord] = {}
+_LOCAL = threading.local()
+_TIMED_LOADERS = (
+    importlib.machinery.SourceFileLoader,
+    importlib.machinery.SourcelessFileLoader,
+    importlib.machinery.ExtensionFileLoader,
+)
+
+
+def _timed(loader: Any, name: str) -> None:
+    original = loader.exec_module
+
+    def exec_module(module: Any) -> None:
+        pilha = _LOCAL.__dict__.setdefault("pilha", [])
+        pilha.append(0.0)                            # tempo dos imports filhos
+        t0 = time.perf_counter()
+        try:
+            original(module)
+        finally:
+            dt = time.perf_counter() - t0
+            filhos = pilha.pop()
+            if pilha:
+                pilha[-1] += dt
+            _IMPORTS[name] = _ImportRecord(
+                name, dt * 1000, (dt - filhos) * 1000, since_start(),
+                threading.current_thread().name,
+            )
+
+    # instância por módulo: o método é trocado só neste loader
+    loader.exec_module = exec_module
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Delega a busca aos demais finders e cronometra o loader encontrado."""
+
+    def find_spec(self, name: str, path: Any, target: Any = None) -> Any:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if isinstance(spec.loader, _TIMED_LOADERS):
+                    _timed(spec.loader, name)
+                return spec
+        return None
+
+
+_TIMER = _ImportTimer()
+
+
+def install_import_profiler() -> None:
+    """Passa a cronometrar os imports seguintes (idempotente)."""
+    if _TIMER not in sys.meta_path:
+        sys.meta_path.insert(0, _TIMER)
+        mark("perfil de imports")
+
+
+def uninstall_import_profiler() -> None:
+    if _TIMER in sys.meta_path:
+        sys.meta_path.remove(_TIMER)
+
+
+# -------- Relatório --------
+def startup_report(top: int = 25) -> dict[str, Any]:
+    """
+    Resumo da inicialização do processo.
+
+    Returns
+    -------
+    dict
+        ``since_start_s``; ``marks`` (nome → s desde o início, em ordem);
+        ``profiling`` (cronômetro instalado?); ``packages`` — por pacote de
+        topo: ``self_ms`` somado, nº de ``modules`` e ``first_at_s`` —; e
+        ``modules``, os ``top`` módulos de maior tempo acumulado.
+    """
+    registros = list(_IMPORTS.values())
+    pacotes: dict[str, dict[str, Any]] = {}
+    for r in registros:
+        p = pacotes.setdefault(r.module.split(".")[0], {"self_ms": 0.0, "modules": 0, "first_at_s": r.at_s})
+        p["self_ms"] += r.self_ms
+        p["modules"] += 1
+        p["first_at_s"] = min(p["first_at_s"], r.at_s)
+    return {
+        "since_start_s": round(since_start(), 3),
+        "marks": {k: round(v, 3) for k, v in sorted(_MARKS.items(), key=lambda kv: kv[1])},
+        "profiling": _TIMER in sys.meta_path,
+        "packages": sorted(
+            ({"package": nome, **p, "self_ms": round(p["self_ms"], 1), "first_at_s": round(p["first_at_s"], 3)}
+             for nome, p in pacotes.items()),
+            key=lambda p: -p["self_ms"],
+        ),
+        "modules": [asdict(r) for r in sorted(registros, key=lambda r: -r.cumulative_ms)[:top]],
+    }
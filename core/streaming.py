@@ -0,0 +1,152 @@
+"""
+Streaming das respostas da LLM (tokens + tool calls).
+
+:class:`ChatStream` envolve ``chat.completions.create(stream=True)``:
+
+- iterar sobre ele produz os pedaços de texto à medida que chegam (pode ser
+  passado direto para ``st.write_stream``);
+- os *deltas* de tool call são remontados por ``index``; assim que os
+  argumentos de uma chamada ficam completos (começou a próxima chamada ou o
+  stream terminou) ela é entregue ao :class:`~core.tool_dispatcher.ToolDispatcher`,
+  que a executa em background sem esperar o fim da resposta;
+- ``ttft`` registra o tempo até o primeiro token de texto;
+- ao terminar, anota o span corrente (:mod:`core.tracing`) com modelo,
+  TTFT, tokens (``usage`` do último chunk) e nº de tool calls.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from core.lazy import lazy_import
+from core.tool_dispatcher import ToolDispatcher
+from core.tracing import set_attributes
+
+openai = lazy_import("openai")       # carregado na 1ª chamada à LLM
+
+
+class ChatStream:
+    """
+    Uma chamada de chat em modo streaming.
+
+    Parameters
+    ----------
+    messages :
+        Histórico no formato da API da OpenAI.
+    model :
+        Nome do modelo.
+    tools :
+        Especificação das funções (``TOOLS_SPEC``); ``None`` desativa tools.
+    dispatcher :
+        Recebe cada tool call assim que seus argumentos terminam de chegar.
+        Se omitido, um :class:`ToolDispatcher` padrão é criado.
+    started_at :
+        Instante (``time.perf_counter()``) a partir do qual o TTFT é medido;
+        por padrão, a criação do objeto.
+    client :
+        Objeto com ``chat.completions.create`` (módulo ``openai`` por padrão).
+    **kwargs :
+        Repassados a ``chat.completions.create`` (ex.: ``temperature``).
+    """
+
+    def __init__(
+        self,
+        messages: list[dict[str, Any]],
+        *,
+        model: str = "gpt-4o-mini",
+        tools: list[dict[str, Any]] | None = None,
+        dispatcher: ToolDispatcher | None = None,
+        started_at: float | None = None,
+        client: Any = openai,
+        **kwargs: Any,
+    ) -> None:
+        self._messages = messages
+        self._model = model
+        self._tools = tools
+        self.dispatcher = dispatcher if dispatcher is not None else ToolDispatcher()
+        self._client = client
+        self._kwargs = kwargs
+
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.ttft: float | None = None
+        self.content = ""
+        self.tool_calls: list[dict[str, Any]] = []
+        self.usage: Any = None
+
+    # -------- Tool calls --------
+    def _tool_call_complete(self, call: dict[str, Any]) -> None:
+        self.dispatcher.submit(call)
+
+    # -------- Iteração --------
+    def __iter__(self) -> Iterator[str]:
+        params: dict[str, Any] = dict(
+            model=self._model, messages=self._messages, stream=True, **self._kwargs,
+        )
+        if self._tools:
+            params["tools"] = self._tools
+        params.setdefault("stream_options", {"include_usage": True})
+
+        atual: dict[str, Any] | None = None          # tool call em montagem
+        for chunk in self._client.chat.completions.create(**params):
+            if getattr(chunk, "usage", None) is not None:
+                self.usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            if delta.content:
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self.started_at
+                self.content += delta.content
+                yield delta.content
+
+            for tc in delta.tool_calls or []:
+                if atual is None or tc.index != atual["_index"]:
+                    if atual is not None:            # anterior está completa
+                        self._tool_call_complete(atual)
+                    atual = {
+                        "_index": tc.index,
+                        "id": tc.id or "",
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""},
+                    }
+                    self.tool_calls.append(atual)
+                if tc.id:
+                    atual["id"] = tc.id
+                if tc.function is not None:
+                    atual["function"]["name"] += tc.function.name or ""
+                    atual["function"]["arguments"] += tc.function.arguments or ""
+
+        if atual is not None:
+            self._tool_call_complete(atual)
+
+        for call in self.tool_calls:
+            call.pop("_index", None)
+
+        set_attributes(
+            model=self._model,
+            ttft_ms=round(self.ttft * 1000, 1) if self.ttft is not None else -1.0,
+            prompt_tokens=getattr(self.usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(self.usage, "completion_tokens", 0) or 0,
+            tool_calls=len(self.tool_calls),
+        )
+
+    def run(self) -> str:
+        """Consome o stream sem renderizar; devolve o texto completo."""
+        for _ in self:
+            pass
+        return self.content
+
+    # -------- Resultado --------
+    def assistant_message(self) -> dict[str, Any]:
+        """Mensagem do assistente pronta para ser anexada ao histórico."""
+        msg: dict[str, Any] = {"role": "assistant", "content": self.content or None}
+        if self.tool_calls:
+            msg["tool_calls"] = self.tool_calls
+        return msg
+
+    def tool_messages(self) -> list[dict[str, Any]]:
+        """Resultados das tools (mensagens ``role="tool"``) na ordem das chamadas."""
+        return self.dispatcher.tool_messages()
@@ -0,0 +1,229 @@
+"""
+Cache de resultados das tools do PRONAF.
+
+``consulta_pronaf_por_estado("SP")`` devolve sempre o mesmo Markdown enquanto
+o Parquet não muda — não há por que refazer o agregado e o ``to_markdown`` a
+cada pergunta sobre SP. O decorador :func:`cached_tool` memoriza o texto
+devolvido pela tool:
+
+- a chave é ``tool + argumentos normalizados`` (ex.: UF em maiúsculas, listas
+  ordenadas), serializada em JSON;
+- a versão dos dados (``<mtime_ns>-<sha256[:16]>`` do Parquet + backend)
+  acompanha cada registro; mudou → cache esvaziado;
+- despejo LRU em memória (``CHAT_PRONAF_TOOL_CACHE_MAX``);
+- persistência opcional em SQLite (``CHAT_PRONAF_TOOL_CACHE_PATH``; vazio
+  desativa), para que os registros sobrevivam a reinícios;
+- :func:`prewarm` preenche o cache em *background* no boot.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from core.data_loader import PRONAF_BACKEND, parquet_fingerprint
+from core.resources import get_resource, register_resource
+from core.tracing import set_attributes
+
+TOOL_CACHE_MAX  = int(os.getenv("CHAT_PRONAF_TOOL_CACHE_MAX", "512"))
+TOOL_CACHE_PATH = os.getenv("CHAT_PRONAF_TOOL_CACHE_PATH", "data/tool_cache.sqlite")
+
+
+def tool_data_version(path: str | None = None) -> str:
+    """Versão dos dados que alimentam as tools (arquivo + backend)."""
+    return f"{parquet_fingerprint(path)}|{PRONAF_BACKEND}"
+
+
+class ToolCache:
+    """
+    Parameters
+    ----------
+    max_entries :
+        Capacidade em memória; o registro usado há mais tempo é despejado.
+        O arquivo em disco guarda no máximo o mesmo número de registros.
+    persist_path :
+        Arquivo SQLite para persistência; ``None`` = só memória.
+    version_fn :
+        ``fn() -> str`` com a versão dos dados; mudou → cache esvaziado.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = TOOL_CACHE_MAX,
+        persist_path: str | None = TOOL_CACHE_PATH or None,
+        version_fn: Callable[[], str] = tool_data_version,
+    ) -> None:
+        self.max_entries = max_entries
+        self._version_fn = version_fn
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: str | None = None
+
+        self._db: sqlite3.Connection | None = None
+        if persist_path:
+            try:
+                self._db = sqlite3.connect(persist_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS tool_cache ("
+                    " version TEXT, key TEXT, value TEXT, created REAL,"
+                    " PRIMARY KEY (version, key))"
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                self._db = None                  # disco indisponível: só memória
+
+        self.hits = self.disk_hits = self.misses = 0
+        self.evictions = self.invalidations = 0
+
+    # -------- Apoio --------
+    @staticmethod
+    def key(tool: str, args: dict[str, Any]) -> str:
+        return f"{tool}:{json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)}"
+
+    def _check_version(self) -> str:
+        versao = self._version_fn()
+        if versao != self._version:
+            with self._lock:
+                if self._version is not None:
+                    self.invalidations += 1
+                self._version = versao
+                self._entries.clear()
+                if self._db is not None:
+                    self._db.execute("DELETE FROM tool_cache WHERE version != ?", (versao,))
+                    self._db.commit()
+        return versao
+
+    def _remember(self, key: str, value: str) -> None:
+        # chamar com o lock
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_cache")
+                self._db.commit()
+
+    # -------- API --------
+    def get(self, tool: str, args: dict[str, Any]) -> str | None:
+        versao = self._check_version()
+        k = self.key(tool, args)
+        with self._lock:
+            if k in self._entries:
+                self._entries.move_to_end(k)
+                self.hits += 1
+                return self._entries[k]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM tool_cache WHERE version = ? AND key = ?", (versao, k),
+                ).fetchone()
+                if row is not None:
+                    self._remember(k, row[0])
+                    self.disk_hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, tool: str, args: dict[str, Any], value: str) -> None:
+        versao = self._check_version()
+        k = self.key(tool, args)
+        with self._lock:
+            self._remember(k, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tool_cache VALUES (?, ?, ?, ?)",
+                    (versao, k, value, time.time()),
+                )
+                self._db.execute(
+                    "DELETE FROM tool_cache WHERE rowid IN ("
+                    " SELECT rowid FROM tool_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def get_or_compute(self, tool: str, args: dict[str, Any], compute: Callable[[], str]) -> str:
+        valor = self.get(tool, args)
+        set_attributes(cache_hit=valor is not None)
+        if valor is None:
+            valor = compute()
+            self.put(tool, args, valor)
+        return valor
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+register_resource("tool_cache", ToolCache)
+
+def get_tool_cache() -> ToolCache:
+    return get_resource("tool_cache")
+
+
+# -------- Decorador --------
+def cached_tool(normalize: Callable[..., dict[str, Any]]):
+    """
+    Memoriza uma tool pelo resultado de ``normalize(*args, **kwargs)``.
+
+    Se ``normalize`` levantar ``ValueError`` (argumentos inválidos), a tool é
+    chamada direto para devolver a própria mensagem de erro, sem cache.
+    A função original fica em ``.uncached``.
+    """
+    def deco(fn: Callable[..., str]) -> Callable[..., str]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> str:
+            try:
+                chave = normalize(*args, **kwargs)
+            except ValueError:
+                return fn(*args, **kwargs)
+            return get_tool_cache().get_or_compute(
+                fn.__name__, chave, lambda: fn(*args, **kwargs),
+            )
+
+        wrapper.uncached = fn
+        return wrapper
+    return deco
+
+
+def prewarm(
+    fn: Callable[..., str],
+    calls: Iterable[dict[str, Any]],
+    *,
+    background: bool = False,
+) -> threading.Thread | None:
+    """Executa ``fn(**kw)`` para cada ``kw`` só para preencher o cache."""
+    calls = list(calls)
+
+    def _run() -> None:
+        for kw in calls:
+            try:
+                fn(**kw)
+            except Exception:
+                return                           # dados indisponíveis: desiste em silêncio
+
+    if not background:
+        _run()
+        return None
+    th = threading.Thread(target=_run, name="chat-pronaf-tool-prewarm", daemon=True)
+    th.start()
+    return th
@@ -0,0 +1,152 @@
+"""
+Execução concorrente das tool calls pedidas pela LLM num mesmo turno.
+
+- roda chamadas independentes em paralelo num pool limitado do processo;
+- chamadas idênticas (mesma função + mesmos argumentos) no turno rodam 1x;
+- cada chamada tem seu próprio timeout;
+- os resultados voltam na ordem original dos ``tool_call_id``;
+- qualquer função de ``core.tools.TOOL_REGISTRY`` pode ser despachada;
+- cada execução vira um span ``tool`` filho do span de quem submeteu
+  (o contexto é copiado para a thread do pool).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import os
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any
+
+from core.tools import TOOL_REGISTRY
+from core.tracing import span
+
+TOOL_WORKERS = int(os.getenv("CHAT_PRONAF_TOOL_WORKERS", "4"))
+TOOL_TIMEOUT = float(os.getenv("CHAT_PRONAF_TOOL_TIMEOUT", "20"))
+
+_POOL = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+
+
+def _as_dict(call: Any) -> dict[str, Any]:
+    """Aceita tanto objetos do SDK da OpenAI quanto dicts já serializados."""
+    if isinstance(call, dict):
+        fn = call["function"]
+        return {"id": call["id"], "name": fn["name"], "arguments": fn["arguments"]}
+    return {
+        "id": call.id,
+        "name": call.function.name,
+        "arguments": call.function.arguments,
+    }
+
+
+def _traced(nome: str, fn: Callable[..., str], args: dict[str, Any]) -> str:
+    with span("tool", tool=nome, args=json.dumps(args, sort_keys=True, ensure_ascii=False)[:500]):
+        return fn(**args)
+
+
+def _done(valor: str) -> Future:
+    fut: Future = Future()
+    fut.set_result(valor)
+    return fut
+
+
+class ToolDispatcher:
+    """
+    Despachante de um turno de conversa.
+
+    Parameters
+    ----------
+    registry :
+        Mapa ``nome → função``; por padrão ``core.tools.TOOL_REGISTRY``.
+    timeout :
+        Tempo máximo (s) de cada chamada, contado a partir da submissão.
+    pool :
+        Executor compartilhado (limita a concorrência no processo).
+    """
+
+    def __init__(
+        self,
+        registry: dict[str, Callable[..., str]] | None = None,
+        *,
+        timeout: float = TOOL_TIMEOUT,
+        pool: ThreadPoolExecutor = _POOL,
+    ) -> None:
+        self.registry = registry if registry is not None else TOOL_REGISTRY
+        self.timeout = timeout
+        self._pool = pool
+        self._por_chave: dict[str, tuple[Future, float]] = {}
+        self._ordem: list[tuple[str, str, str]] = []  # (tool_call_id, nome, chave)
+
+    def submit(self, call: Any) -> None:
+        """Agenda uma tool call (objeto do SDK ou dict) sem bloquear."""
+        c = _as_dict(call)
+        nome = c["name"]
+        try:
+            args = json.loads(c["arguments"] or "{}")
+        except json.JSONDecodeError:
+            args = None
+
+        chave = f"{nome}:{json.dumps(args, sort_keys=True, ensure_ascii=False)}"
+        self._ordem.append((c["id"], nome, chave))
+        if chave in self._por_chave:                 # duplicada no turno
+            return
+
+        if nome not in self.registry:
+            fut = _done(f"Função '{nome}' não disponível.")
+        elif not isinstance(args, dict):
+            fut = _done(f"Argumentos inválidos para '{nome}'.")
+        else:
+            ctx = contextvars.copy_context()
+            fut = self._pool.submit(ctx.run, _traced, nome, self.registry[nome], args)
+        self._por_chave[chave] = (fut, time.monotonic() + self.timeout)
+
+    def _resultado(self, nome: str, chave: str) -> str:
+        fut, prazo = self._por_chave[chave]
+        try:
+            return str(fut.result(timeout=max(0.0, prazo - time.monotonic())))
+        except FutureTimeout:
+            return f"Tempo esgotado ao executar '{nome}' ({self.timeout:g}s)."
+        except Exception as exc:                     # erro da própria função
+            return f"Erro ao executar '{nome}': {exc}"
+
+    def tool_messages(self) -> list[dict[str, Any]]:
+        """Mensagens ``role="tool"`` na ordem original das chamadas."""
+        return [
+            {"role": "tool", "tool_call_id": call_id, "content": self._resultado(nome, chave)}
+            for call_id, nome, chave in self._ordem
+        ]
+
+    @property
+    def unique_calls(self) -> int:
+        """Nº de execuções reais (após deduplicação)."""
+        return len(self._por_chave)
+
+
+def dispatch_tool_calls(
+    calls: Iterable[Any],
+    *,
+    registry: dict[str, Callable[..., str]] | None = None,
+    timeout: float = TOOL_TIMEOUT,
+) -> list[dict[str, Any]]:
+    """Executa um lote de tool calls e devolve as mensagens ``role="tool"``."""
+    d = ToolDispatcher(registry, timeout=timeout)
+    for call in calls:
+        d.submit(call)
+    return d.tool_messages()
+
+
+async def adispatch_tool_calls(
+    calls: Iterable[Any],
+    *,
+    registry: dict[str, Callable[..., str]] | None = None,
+    timeout: float = TOOL_TIMEOUT,
+) -> list[dict[str, Any]]:
+    """Versão ``async`` de :func:`dispatch_tool_calls` (não bloqueia o loop)."""
+    calls = list(calls)
+    return await asyncio.to_thread(
+        dispatch_tool_calls, calls, registry=registry, timeout=timeout,
+    )
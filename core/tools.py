@@ -1,33 +1,68 @@
 # Funções auxiliares para o pipeline para consultas ao PRONAF
 
-from core.data_loader import load_pronaf
-import pandas as pd
+import os
+import threading
+from dataclasses import asdict
+
+from core import duckdb_backend
+from core.data_loader import PRONAF_BACKEND
+from core.pronaf_cube import load_cube
+from core.query_engine import UFS, CONSULTA_SCHEMA, QueryError, parse_query, run_query
+from core.tool_cache import cached_tool, prewarm
+
+# "1" → prewarm_tools() (boot da página e da API) pré-calcula
+# consulta_pronaf_por_estado das 27 UFs em background
+PREWARM_TOOLS = os.getenv("CHAT_PRONAF_PREWARM_TOOLS", "1") == "1"
+
+
+# -------- Normalização dos argumentos (chave do cache) --------
+def _args_estado(cd_estado: str) -> dict:
+    return {"cd_estado": str(cd_estado).strip().upper()}
+
+def _args_consulta(**args) -> dict:
+    spec = asdict(parse_query(args))                 # QueryError → sem cache
+    for campo in ("ufs", "sexos", "safras"):
+        if spec[campo] is not None:
+            spec[campo] = sorted(spec[campo])
+    return spec
+
 
 # -------- Função de negócio --------
+@cached_tool(_args_estado)
 def consulta_pronaf_por_estado(cd_estado: str) -> str:
-    """Resumo do PRONAF por UF em Markdown."""
-    df: pd.DataFrame = load_pronaf()
-    df_estado = df[df["CD_ESTADO"] == cd_estado.upper()]
+    """Resumo do PRONAF por UF em Markdown (cubo pré-agregado ou DuckDB)."""
+    cd_estado = cd_estado.strip().upper()
+    if PRONAF_BACKEND == "duckdb":
+        resumo = duckdb_backend.resumo_estado(cd_estado)
+    else:
+        resumo = load_cube().resumo_estado(cd_estado)
 
-    if df_estado.empty:
+    if resumo.empty:
         return (
             f"Nenhum dado encontrado para o estado '{cd_estado}'. "
             "Verifique o código UF."
         )
 
-    resumo = (
-        df_estado
-        .groupby(["ANO", "SEXO_BIOLOGICO"])
-        .agg(
-            Soma_VL_PARC_CREDITO=("VL_PARC_CREDITO", "sum"),
-            Quantidade_Operacoes=("CD_CPF_CNPJ", "count"),
-            Quantidade_Beneficiarios=("CD_CPF_CNPJ", "nunique"),
-        )
-        .reset_index()
-    )
-
     tabela = resumo.to_markdown(index=False, floatfmt=".2f")
-    return f"Resumo dos dados do PRONAF para o estado {cd_estado.upper()}:\n\n{tabela}"
+    return f"Resumo dos dados do PRONAF para o estado {cd_estado}:\n\n{tabela}"
+
+
+@cached_tool(_args_consulta)
+def consulta_pronaf(**args) -> str:
+    """Consulta estruturada (filtros, dimensões, medidas, top‑N) em Markdown."""
+    try:
+        spec = parse_query(args)
+    except QueryError as exc:
+        return f"Consulta inválida: {exc}"
+
+    tabela, fonte = run_query(spec)
+    if tabela.empty:
+        return "Nenhum dado encontrado para os filtros informados."
+
+    return (
+        f"Resultado da consulta ao PRONAF ({len(tabela)} linhas, fonte: {fonte}):\n\n"
+        f"{tabela.to_markdown(index=False, floatfmt='.2f')}"
+    )
 
 
 # -------- Especificação p/ OpenAI function‑calling --------
@@ -48,5 +83,57 @@ TOOLS_SPEC = [
                 "required": ["cd_estado"]
             },
         },
-    }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "consulta_pronaf",
+            "description": (
+                "Consulta flexível aos dados do PRONAF: filtra por UFs, anos, "
+                "sexo e safra, agrupa por dimensões e devolve medidas "
+                "(crédito total, operações, beneficiários distintos, ticket "
+                "médio) já ordenadas e limitadas. Use para rankings (top N), "
+                "intervalos de anos, comparações entre UFs e totais."
+            ),
+            "parameters": CONSULTA_SCHEMA,
+        },
+    },
 ]
+
+
+# -------- Registro nome → função (usado pelo despachante de tools) --------
+TOOL_REGISTRY = {
+    "consulta_pronaf_por_estado": consulta_pronaf_por_estado,
+    "consulta_pronaf": consulta_pronaf,
+}
+
+def _check_registry() -> None:
+    """Garante que toda função anunciada em TOOLS_SPEC tenha implementação."""
+    anunciadas = {t["function"]["name"] for t in TOOLS_SPEC}
+    if anunciadas != set(TOOL_REGISTRY):
+        raise RuntimeError(
+            "TOOLS_SPEC e TOOL_REGISTRY fora de sincronia: "
+            f"spec={sorted(anunciadas)} registro={sorted(TOOL_REGISTRY)}"
+        )
+
+_check_registry()
+
+
+# -------- Pré-aquecimento (chamado no boot, não no import) --------
+_PREWARM: threading.Thread | None = None
+_PREWARM_LOCK = threading.Lock()
+
+def prewarm_tools(enabled: bool = PREWARM_TOOLS) -> threading.Thread | None:
+    """
+    Preenche o cache de ``consulta_pronaf_por_estado`` para as 27 UFs numa
+    *thread* de fundo. Idempotente (uma vez por processo); ``enabled=False``
+    não faz nada — scripts e benchmarks que só importam as tools não pagam a carga.
+    """
+    global _PREWARM
+    if not enabled:
+        return None
+    with _PREWARM_LOCK:
+        if _PREWARM is None:
+            _PREWARM = prewarm(consulta_pronaf_por_estado, [{"cd_estado": uf} for uf in UFS],
+                               background=True)
+    return _PREWARM
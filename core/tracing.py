@@ -0,0 +1,211 @@
+"""
+Rastreamento (tracing) de cada turno do chat, sem dependências externas.
+
+Cada etapa do pipeline vira um *span* com início, duração e atributos
+(tokens, k, acertos de cache, argumentos de tool…). Os spans de um turno
+formam um *trace*; quando o span raiz termina, o trace inteiro é gravado
+como uma linha JSON no formato OTLP/JSON (``resourceSpans`` →
+``scopeSpans`` → ``spans``) — o mesmo do *file exporter* do OpenTelemetry
+Collector, então o arquivo pode ser reenviado a qualquer backend OTLP.
+
+- ``CHAT_PRONAF_TRACE_PATH``: arquivo JSONL (padrão
+  ``data/traces/spans.jsonl``; vazio desliga a exportação);
+- ``CHAT_PRONAF_TRACE_MAX_MB``: ao passar do limite o arquivo vira ``.1``.
+
+O span corrente vive num ``ContextVar``: ``span()`` aninhados viram filhos,
+e :func:`set_attributes` anota o span corrente de qualquer módulo (no-op
+fora de um trace). Para threads, rode a função com
+``contextvars.copy_context().run`` (como faz o despachante de tools).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+TRACE_PATH   = os.getenv("CHAT_PRONAF_TRACE_PATH", "data/traces/spans.jsonl")
+TRACE_MAX_MB = float(os.getenv("CHAT_PRONAF_TRACE_MAX_MB", "50"))
+SERVICE_NAME = "chat-pronaf"
+
+_current: ContextVar["Span | None"] = ContextVar("chat_pronaf_span", default=None)
+_write_lock = threading.Lock()
+
+
+@dataclass
+class _Trace:
+    trace_id: str
+    spans: list["Span"] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@dataclass
+class Span:
+    name: str
+    trace: _Trace
+    span_id: str
+    parent_id: str = ""
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: bool = False
+
+    def set(self, **attrs: Any) -> "Span":
+        self.attributes.update(attrs)
+        return self
+
+    @property
+    def duration_ms(self) -> float:
+        fim = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (fim - self.start_ns) / 1e6
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        with self.trace.lock:
+            self.trace.spans.append(self)
+        if not self.parent_id:                       # raiz: o trace está completo
+            export_trace(self.trace)
+
+
+# -------- API --------
+def start_span(name: str, *, parent: Span | None = None, **attrs: Any) -> Span:
+    """Abre um span (filho do corrente, ou raiz de um novo trace). Feche com ``end()``."""
+    parent = parent if parent is not None else _current.get()
+    trace = parent.trace if parent is not None else _Trace(secrets.token_hex(16))
+    return Span(
+        name=name,
+        trace=trace,
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent is not None else "",
+        attributes=dict(attrs),
+    )
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Span corrente durante o bloco ``with``; exceções marcam erro e seguem."""
+    s = start_span(name, **attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        s.error = True
+        s.set(error=f"{type(exc).__name__}: {exc}")
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def set_attributes(**attrs: Any) -> None:
+    """Anota o span corrente (não faz nada fora de um trace)."""
+    s = _current.get()
+    if s is not None:
+        s.set(**attrs)
+
+
+# -------- Exportação (OTLP/JSON) --------
+def _otlp_value(v: Any) -> dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    if isinstance(v, str):
+        return {"stringValue": v}
+    return {"stringValue": json.dumps(v, ensure_ascii=False, default=str)}
+
+
+def _otlp_span(s: Span) -> dict[str, Any]:
+    return {
+        "traceId": s.trace.trace_id,
+        "spanId": s.span_id,
+        "parentSpanId": s.parent_id,
+        "name": s.name,
+        "kind": 1,                                   # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+        "status": {"code": 2 if s.error else 1},     # ERROR | OK
+    }
+
+
+def export_trace(trace: _Trace, path: str = TRACE_PATH) -> None:
+    """Grava o trace como uma linha OTLP/JSON (spans ainda abertos ficam de fora)."""
+    if not path:
+        return
+    with trace.lock:
+        spans = [_otlp_span(s) for s in trace.spans]
+    linha = json.dumps({"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "core.tracing"}, "spans": spans}],
+    }]}, ensure_ascii=False)
+
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > TRACE_MAX_MB * 2**20:
+                os.replace(path, path + ".1")
+            with open(path, "a", encoding="utf-8") as fh:
+                fh.write(linha + "\n")
+    except OSError:
+        pass                                         # tracing nunca derruba o chat
+
+
+# -------- Leitura (página de administração) --------
+def _py_value(v: dict[str, Any]) -> Any:
+    if "intValue" in v:
+        return int(v["intValue"])
+    for chave in ("doubleValue", "boolValue", "stringValue"):
+        if chave in v:
+            return v[chave]
+    return None
+
+
+def read_spans(path: str = TRACE_PATH, max_traces: int = 5000) -> list[dict[str, Any]]:
+    """
+    Spans dos últimos ``max_traces`` turnos, achatados: ``trace_id``,
+    ``span_id``, ``parent_id``, ``name``, ``start`` (s, epoch),
+    ``duration_ms``, ``error`` e os atributos como chaves ``attr.<nome>``.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as fh:
+        linhas = deque(fh, maxlen=max_traces)
+
+    saida = []
+    for linha in linhas:
+        try:
+            req = json.loads(linha)
+        except ValueError:
+            continue
+        for rs in req.get("resourceSpans", []):
+            for ss in rs.get("scopeSpans", []):
+                for s in ss.get("spans", []):
+                    inicio, fim = int(s["startTimeUnixNano"]), int(s["endTimeUnixNano"])
+                    saida.append({
+                        "trace_id": s["traceId"],
+                        "span_id": s["spanId"],
+                        "parent_id": s.get("parentSpanId", ""),
+                        "name": s["name"],
+                        "start": inicio / 1e9,
+                        "duration_ms": (fim - inicio) / 1e6,
+                        "error": s.get("status", {}).get("code") == 2,
+                        **{f"attr.{a['key']}": _py_value(a["value"]) for a in s.get("attributes", [])},
+                    })
+    return saida
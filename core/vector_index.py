@@ -0,0 +1,238 @@
+"""
+Índice vetorial exato em NumPy, aberto por ``mmap`` (alternativa ao Chroma).
+
+O corpus do MCR tem poucos milhares de chunks de 768 dimensões: busca exata
+(produto interno com todos os vetores) custa poucos milissegundos e
+dispensa o SQLite/HNSW do Chroma. ``python -m scripts.export_vector_index``
+grava, a partir da coleção do ``persist_directory``::
+
+    vectors.npy      matriz [n, d] int8 + scales.npy (float32 por linha),
+                     ou float16 / float32
+    texts.bin        textos dos chunks (UTF-8 concatenado) + texts.idx.npy (offsets int64)
+    metas.bin        metadados (JSON por chunk), mesmo layout
+    ids.bin          ids da coleção, mesmo layout
+    meta.json        dtype, dimensão, nº de chunks, versão da coleção de origem
+
+Tudo é aberto só para leitura com ``mmap``: vários workers no mesmo host
+compartilham as páginas do cache do sistema operacional em vez de cada um
+manter sua cópia. ``CHAT_PRONAF_VECTOR_STORE=numpy`` faz o
+:func:`core.rag_engine.get_vector_db` usar :class:`NumpyVectorIndex`, que
+expõe os métodos do Chroma usados por ``core/hybrid_retriever.py``.
+
+Os vetores são normalizados (L2); o score devolvido é a similaridade de
+cosseno (maior = melhor) — a fusão RRF só usa a ordem.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+VECTOR_STORE = os.getenv("CHAT_PRONAF_VECTOR_STORE", "chroma").lower()   # chroma | numpy
+INDEX_DIR    = os.getenv("CHAT_PRONAF_VECTOR_INDEX", "data/data-rag/vector_index")
+SEARCH_BLOCK = 4096       # linhas convertidas para float32 por vez na busca
+DTYPES       = ("int8", "float16", "float32")
+
+
+# -------- Strings em disco (UTF-8 + offsets) --------
+def _write_strings(base: str, valores: Sequence[str]) -> None:
+    dados = [v.encode("utf-8") for v in valores]
+    offsets = np.zeros(len(dados) + 1, dtype=np.int64)
+    np.cumsum([len(d) for d in dados], out=offsets[1:])
+    with open(base + ".bin", "wb") as fh:
+        fh.write(b"".join(dados))
+    np.save(base + ".idx.npy", offsets)
+
+
+class _Strings:
+    """Sequência de strings sobre um ``.bin`` mapeado em memória."""
+
+    def __init__(self, base: str) -> None:
+        self._offsets = np.load(base + ".idx.npy", mmap_mode="r")
+        tamanho = int(self._offsets[-1])
+        self._dados = np.memmap(base + ".bin", dtype=np.uint8, mode="r") if tamanho else np.zeros(0, np.uint8)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        a, b = int(self._offsets[i]), int(self._offsets[i + 1])
+        return self._dados[a:b].tobytes().decode("utf-8")
+
+
+# -------- Exportação --------
+def export_index(
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    texts: Sequence[str],
+    metadatas: Sequence[dict[str, Any] | None],
+    out_dir: str = INDEX_DIR,
+    *,
+    dtype: str = "int8",
+    source_version: str = "",
+) -> dict[str, Any]:
+    """
+    Grava o índice em ``out_dir`` (troca atômica do diretório inteiro).
+
+    Parameters
+    ----------
+    dtype :
+        ``int8`` (¼ do float32; escala simétrica por linha — padrão),
+        ``float16`` (metade) ou ``float32`` (sem conversão na busca).
+        A conversão float16→float32 do NumPy não é vetorizada e domina a
+        busca (~10× a de int8); float16 só compensa se o disco apertar.
+    source_version :
+        Impressão digital da coleção de origem (``dir_fingerprint``).
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype inválido: {dtype!r} (use {', '.join(DTYPES)})")
+    vec = np.asarray(vectors, dtype=np.float32)
+    vec = vec / np.clip(np.linalg.norm(vec, axis=1, keepdims=True), 1e-12, None)
+
+    # diretório novo a cada exportação: sobra de uma exportação interrompida
+    # (ex.: scales.npy de um int8 anterior) nunca entra no índice
+    base = out_dir.rstrip("/")
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(base) + ".tmp-", dir=os.path.dirname(base) or ".")
+    try:
+        if dtype == "int8":
+            escalas = np.clip(np.abs(vec).max(axis=1), 1e-12, None) / 127.0
+            np.save(os.path.join(tmp, "vectors.npy"), np.round(vec / escalas[:, None]).astype(np.int8))
+            np.save(os.path.join(tmp, "scales.npy"), escalas.astype(np.float32))
+        else:
+            np.save(os.path.join(tmp, "vectors.npy"), vec.astype(dtype))
+        _write_strings(os.path.join(tmp, "ids"), [str(i) for i in ids])
+        _write_strings(os.path.join(tmp, "texts"), list(texts))
+        _write_strings(os.path.join(tmp, "metas"),
+                       [json.dumps(m or {}, ensure_ascii=False) for m in metadatas])
+
+        meta = {
+            "dtype": dtype,
+            "dim": int(vec.shape[1]) if vec.ndim == 2 else 0,
+            "count": int(vec.shape[0]),
+            "source_version": source_version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, indent=1)
+        os.chmod(tmp, 0o755)                         # mkdtemp cria com 0700
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    if os.path.isdir(out_dir):                       # troca: antigo → .old → removido
+        antigo = base + ".old"
+        shutil.rmtree(antigo, ignore_errors=True)    # sobra de uma troca interrompida
+        os.replace(out_dir, antigo)
+        os.replace(tmp, out_dir)
+        shutil.rmtree(antigo)
+    else:
+        os.replace(tmp, out_dir)
+    return meta
+
+
+# -------- Índice --------
+class NumpyVectorIndex:
+    """
+    Busca exata sobre o índice exportado, com a interface do Chroma usada
+    pelo RAG (``similarity_search*``, ``get``).
+
+    Parameters
+    ----------
+    index_dir :
+        Diretório gerado por :func:`export_index`.
+    embedding :
+        ``Embeddings`` para as buscas por texto (``similarity_search*``);
+        dispensável quando só se busca por vetor.
+    """
+
+    def __init__(self, index_dir: str = INDEX_DIR, embedding: Any = None) -> None:
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as fh:
+            self.meta = json.load(fh)
+        self.embedding = embedding
+        self._vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        escalas = os.path.join(index_dir, "scales.npy")
+        self._scales = np.load(escalas, mmap_mode="r") if os.path.exists(escalas) else None
+        self.ids = _Strings(os.path.join(index_dir, "ids"))
+        self.texts = _Strings(os.path.join(index_dir, "texts"))
+        self._metas = _Strings(os.path.join(index_dir, "metas"))
+
+    def __len__(self) -> int:
+        return self._vectors.shape[0]
+
+    def metadata(self, i: int) -> dict[str, Any]:
+        return json.loads(self._metas[i])
+
+    # -------- Busca --------
+    def search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Top-``k`` exato para um lote de consultas ``[b, d]``.
+
+        Returns
+        -------
+        (posições ``[b, k]``, similaridades ``[b, k]``), em ordem decrescente.
+        """
+        q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        q = q / np.clip(np.linalg.norm(q, axis=1, keepdims=True), 1e-12, None)
+        n = len(self)
+        k = min(k, n)
+        if k == 0:
+            return np.zeros((len(q), 0), np.int64), np.zeros((len(q), 0), np.float32)
+
+        scores = np.empty((len(q), n), dtype=np.float32)
+        for i in range(0, n, SEARCH_BLOCK):          # converte por blocos: memória limitada
+            bloco = np.asarray(self._vectors[i:i + SEARCH_BLOCK], dtype=np.float32)
+            scores[:, i:i + SEARCH_BLOCK] = q @ bloco.T
+        if self._scales is not None:
+            scores *= self._scales
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        ordem = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, ordem, axis=1), np.take_along_axis(top_scores, ordem, axis=1)
+
+    def _documents(self, vector: Sequence[float], k: int) -> list[tuple[Any, float]]:
+        from langchain_core.documents import Document
+
+        pos, sims = self.search(np.asarray(vector, dtype=np.float32), k)
+        return [
+            (Document(page_content=self.texts[int(i)], metadata=self.metadata(int(i))), float(s))
+            for i, s in zip(pos[0], sims[0])
+        ]
+
+    def _embed(self, query: str) -> list[float]:
+        if self.embedding is None:
+            raise ValueError("NumpyVectorIndex sem 'embedding': use as buscas por vetor.")
+        return self.embedding.embed_query(query)
+
+    # -------- Interface do Chroma (langchain) --------
+    def similarity_search_by_vector_with_relevance_scores(self, embedding: Sequence[float], k: int = 4):
+        return self._documents(embedding, k)
+
+    def similarity_search_by_vector(self, embedding: Sequence[float], k: int = 4):
+        return [d for d, _ in self._documents(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4):
+        return self._documents(self._embed(query), k)
+
+    def similarity_search(self, query: str, k: int = 4):
+        return [d for d, _ in self._documents(self._embed(query), k)]
+
+    def get(self, include: Sequence[str] = ("documents", "metadatas")) -> dict[str, Any]:
+        """Mesmo formato de ``Chroma.get`` (usado para montar o BM25)."""
+        n = len(self)
+        saida: dict[str, Any] = {"ids": [self.ids[i] for i in range(n)]}
+        if "documents" in include:
+            saida["documents"] = [self.texts[i] for i in range(n)]
+        if "metadatas" in include:
+            saida["metadatas"] = [self.metadata(i) for i in range(n)]
+        if "embeddings" in include:
+            vec = np.asarray(self._vectors, dtype=np.float32)
+            saida["embeddings"] = vec * self._scales[:, None] if self._scales is not None else vec
+        return saida
@@ -3,8 +3,13 @@
 # pages/1_📊 Painel PRONAF.py                                                 #
 # --------------------------------------------------------------------------- #
 # Painel interativo (dashboard) com estatísticas agregadas da base PRONAF.    #
-# Utiliza a mesma função `load_pronaf()` já cacheada em `core/data_loader.py` #
-# e exibe KPIs, filtros e gráficos simples.                                   #
+# Os filtros usam o índice de `core/filter_index.py` (bitmaps por ANO/SEXO e  #
+# posições ordenadas por UF): nada é copiado a cada rerun e os agregados são  #
+# memorizados por combinação de filtros. Com CHAT_PRONAF_BACKEND=duckdb, os   #
+# agregados e a tabela saem de SQL direto sobre o Parquet (sem DataFrame).    #
+# Gráficos ficam em cache por filtro; a tabela detalhada é paginada e         #
+# ordenada no servidor (`core/painel.py`) e só a página visível vai ao        #
+# navegador.                                                                  #
 ###############################################################################
  
 import streamlit as st
@@ -15,18 +20,53 @@ import streamlit as st
 st.set_page_config(page_title="Painel PRONAF", page_icon="📊", layout="wide")
 st.title("Painel PRONAF")
 
-import os
-import pandas as pd
-import plotly.express as px
 #from backend.utils import render_footer
 
-from core.data_loader import load_pronaf          # lê o Parquet cacheado
+import math
+import os
+from urllib.parse import urlencode
+
+from core import painel           # índice UF/ANO/SEXO (1x/processo) ou DuckDB
+from core.api_client import PUBLIC_API_URL
+from core.filter_index import PronafFilterIndex
+from core.hot_swap import start_watcher
+from core.lazy import lazy_import
+
+px = lazy_import("plotly.express")     # carrega no 1º gráfico, depois dos KPIs
+
+LINHAS_POR_PAGINA = [50, 100, 500, 1000]
+# sem CHAT_PRONAF_PUBLIC_API_URL o CSV é montado na memória do processo do
+# Streamlit (o download_button exige o conteúdo inteiro): acima disto, não há
+# exportação pela página — só pelo endpoint em streaming da API
+CSV_MAX_LINHAS = int(os.getenv("CHAT_PRONAF_CSV_MAX_ROWS", "200000"))
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Carrega dados
+# Carrega dados (opções dos filtros)
 # ─────────────────────────────────────────────────────────────────────────────
-df = load_pronaf()   # DataFrame com ~2,5 mi linhas (cache já cuida do custo)
+start_watcher()       # troca de versão dos dados sem reinício (se configurada)
+opcoes_uf, opcoes_ano, opcoes_sexo = painel.options()
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def _figuras(chave: tuple, versao: str):
+    # um par de figuras por filtro e versão do Parquet: mexer no slider
+    # para um filtro já visto não reagrega nem remonta os gráficos
+    res = painel.summary(*chave)
+    fig1 = px.bar(
+        res.por_ano,
+        x="ANO",
+        y="Crédito",
+        title="Evolução anual do crédito (R$)",
+        labels={"Crédito": "Valor (R$)"},
+    )
+    fig2 = px.pie(
+        res.por_sexo,
+        names="SEXO_BIOLOGICO",
+        values="Crédito",
+        title="Distribuição do crédito por sexo",
+    )
+    return fig1, fig2
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Barra lateral: filtros
@@ -35,11 +75,11 @@ with st.sidebar:
     st.header("Filtros")
 
     # UF
-    ufs = sorted(df["CD_ESTADO"].unique())
+    ufs = sorted(opcoes_uf)
     uf_escolhida = st.selectbox("Estado (UF)", ["TODOS"] + ufs)
 
     # Ano
-    anos = sorted(df["ANO"].unique())
+    anos = opcoes_ano
     ano_min, ano_max = st.select_slider(
         "Intervalo de anos",
         options=anos,
@@ -47,22 +87,15 @@ with st.sidebar:
     )
 
     # Sexo
-    sexos = sorted(df["SEXO_BIOLOGICO"].unique())
+    sexos = sorted(opcoes_sexo)
     sexo_escolhido = st.multiselect("Sexo biológico", sexos, default=sexos)
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Aplica filtros
+# Aplica filtros  (conjunto de linhas + agregados, memorizados por filtro)
 # ─────────────────────────────────────────────────────────────────────────────
-df_filt = df.copy()
-
-if uf_escolhida != "TODOS":
-    df_filt = df_filt[df_filt["CD_ESTADO"] == uf_escolhida]
-
-df_filt = df_filt[
-    (df_filt["ANO"] >= ano_min) &
-    (df_filt["ANO"] <= ano_max) &
-    (df_filt["SEXO_BIOLOGICO"].isin(sexo_escolhido))
-]
+chave = PronafFilterIndex.key(uf_escolhida, ano_min, ano_max, sexo_escolhido)
+res = painel.summary(*chave)
+fig1, fig2 = _figuras(chave, painel.data_version())
 
 # ─────────────────────────────────────────────────────────────────────────────
 # KPIs
@@ -70,15 +103,15 @@ df_filt = df_filt[
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    total_credito = df_filt["VL_PARC_CREDITO"].sum()
+    total_credito = res.credito
     st.metric("💰 Crédito concedido (R$)", f"{total_credito:,.0f}".replace(",", "."))
 
 with col2:
-    total_oper = df_filt["CD_CPF_CNPJ"].count()
+    total_oper = res.operacoes
     st.metric("📄 Nº de operações", f"{total_oper:,}".replace(",", "."))
 
 with col3:
-    total_benef = df_filt["CD_CPF_CNPJ"].nunique()
+    total_benef = res.beneficiarios
     st.metric("👥 Beneficiários únicos", f"{total_benef:,}".replace(",", "."))
 
 st.markdown("---")
@@ -86,44 +119,57 @@ st.markdown("---")
 # ─────────────────────────────────────────────────────────────────────────────
 # Gráfico 1 – Evolução do crédito por ano
 # ─────────────────────────────────────────────────────────────────────────────
-df_ano = (
-    df_filt.groupby("ANO", as_index=False)["VL_PARC_CREDITO"].sum()
-    .rename(columns={"VL_PARC_CREDITO": "Crédito"})
-)
-
-fig1 = px.bar(
-    df_ano,
-    x="ANO",
-    y="Crédito",
-    title="Evolução anual do crédito (R$)",
-    labels={"Crédito": "Valor (R$)"},
-)
 st.plotly_chart(fig1, use_container_width=True)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Gráfico 2 – Distribuição por sexo
 # ─────────────────────────────────────────────────────────────────────────────
-df_sexo = (
-    df_filt.groupby("SEXO_BIOLOGICO", as_index=False)["VL_PARC_CREDITO"].sum()
-    .rename(columns={"VL_PARC_CREDITO": "Crédito"})
-)
-
-fig2 = px.pie(
-    df_sexo,
-    names="SEXO_BIOLOGICO",
-    values="Crédito",
-    title="Distribuição do crédito por sexo",
-)
 st.plotly_chart(fig2, use_container_width=True)
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Tabela detalhada (opcional)
+# Tabela detalhada (opcional) — paginada e ordenada no servidor
 # ─────────────────────────────────────────────────────────────────────────────
 with st.expander("📋 Ver tabela detalhada"):
+    total = painel.detail_count(*chave)
+    c1, c2, c3, c4 = st.columns(4)
+    ordenar = c1.selectbox("Ordenar por", ["(ordem do arquivo)"] + painel.DETAIL_COLUMNS)
+    sort_by = None if ordenar.startswith("(") else ordenar
+    decrescente = c2.toggle("Decrescente")
+    por_pagina = c3.selectbox("Linhas por página", LINHAS_POR_PAGINA, index=1)
+    n_paginas = max(1, math.ceil(total / por_pagina))
+    pagina = c4.number_input(f"Página (de {n_paginas:,})".replace(",", "."),
+                             min_value=1, max_value=n_paginas, value=1)
+
+    inicio = (int(pagina) - 1) * por_pagina
     st.dataframe(
-        df_filt[["ANO", "CD_ESTADO", "SEXO_BIOLOGICO", "VL_PARC_CREDITO"]],
-        use_container_width=True,
+        painel.detail_page(*chave, offset=inicio, limit=por_pagina,
+                           sort_by=sort_by, descending=decrescente),
+        use_container_width=True, hide_index=True,
     )
+    st.caption(f"Linhas {min(inicio + 1, total):,}–{min(inicio + por_pagina, total):,} "
+               f"de {total:,}".replace(",", "."))
+
+    # CSV do filtro inteiro: gerado em pedaços, só quando pedido
+    uf_param = {"uf": chave[0]} if chave[0] else {}
+    params = urlencode({**uf_param, "ano_min": ano_min, "ano_max": ano_max,
+                        "sexo": list(chave[3]), **({"sort_by": sort_by} if sort_by else {}),
+                        "descending": str(decrescente).lower()}, doseq=True)
+    if total == 0:
+        # inclui "nenhum sexo marcado": sem `sexo` na URL a API exportaria todos
+        st.caption("Nada a exportar com estes filtros.")
+    elif PUBLIC_API_URL:
+        st.link_button("⬇️ Baixar CSV", f"{PUBLIC_API_URL.rstrip('/')}/v1/pronaf/rows.csv?{params}")
+    elif total > CSV_MAX_LINHAS:
+        linhas, limite = (f"{n:,}".replace(",", ".") for n in (total, CSV_MAX_LINHAS))
+        st.caption(
+            f"Exportação indisponível: o filtro tem {linhas} linhas e a página só gera CSV "
+            f"de até {limite} sem a API (CHAT_PRONAF_PUBLIC_API_URL). Restrinja os filtros "
+            "ou configure a API para baixar o CSV em streaming."
+        )
+    elif st.button("Gerar CSV"):
+        with st.spinner(f"Gerando {total:,} linhas…".replace(",", ".")):
+            csv = "".join(painel.detail_csv(*chave, sort_by=sort_by, descending=decrescente))
+        st.download_button("⬇️ Baixar CSV", csv, file_name="pronaf_filtrado.csv", mime="text/csv")
 
 
 
@@ -1,5 +1,4 @@
 import streamlit as st
-import graphviz
 
 # Cabeçalho da página
 st.title("Como Funciona o Chat-PRONAF?")
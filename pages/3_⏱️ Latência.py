@@ -0,0 +1,174 @@
+###############################################################################
+# pages/3_⏱️ Latência.py                                                      #
+# --------------------------------------------------------------------------- #
+# Página de administração: decomposição da latência dos turnos do chat.       #
+# Lê os traces gravados por `core/tracing.py` (OTLP/JSON, um turno por linha  #
+# em CHAT_PRONAF_TRACE_PATH) e mostra p50/p95/p99 por etapa, a fração do      #
+# turno gasta em cada uma e os turnos mais lentos. Mostra também o perfil de  #
+# inicialização do processo (`core/startup.py`) e as trocas de versão dos    #
+# dados (`core/hot_swap.py`).                                                 #
+###############################################################################
+
+import streamlit as st
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Configuração da página
+# ─────────────────────────────────────────────────────────────────────────────
+st.set_page_config(page_title="Latência do chat", page_icon="⏱️", layout="wide")
+st.title("Latência do chat por etapa")
+
+import time
+
+import pandas as pd
+
+from core.data_versions import active_version, list_versions, read_current
+from core.hot_swap import DATA_POLL_S, swap_history
+from core.lazy import lazy_import
+from core.startup import startup_report
+from core.tracing import TRACE_PATH, read_spans
+
+px = lazy_import("plotly.express")
+
+# ordem do pipeline (etapas novas aparecem no fim)
+ETAPAS = ["turn", "semantic_cache", "retrieval", "pack_context", "history",
+          "router", "tool", "llm.1", "llm.2", "cache_store"]
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _spans(path: str, max_traces: int) -> pd.DataFrame:
+    return pd.DataFrame(read_spans(path, max_traces=max_traces))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Barra lateral
+# ─────────────────────────────────────────────────────────────────────────────
+with st.sidebar:
+    st.header("Traces")
+    st.caption(f"Arquivo: `{TRACE_PATH or '(desligado)'}`")
+    max_traces = st.number_input("Últimos turnos lidos", 100, 100_000, 5000, step=500)
+    janela_h = st.selectbox("Janela", [1, 6, 24, 24 * 7, 0],
+                            format_func=lambda h: f"{h} h" if h else "tudo", index=2)
+    if st.button("Recarregar"):
+        _spans.clear()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Inicialização deste processo (core/startup.py)
+# ─────────────────────────────────────────────────────────────────────────────
+ini = startup_report()
+with st.expander(f"🚀 Inicialização do processo · 1º render em "
+                 f"{ini['marks'].get('primeiro render', float('nan')):.2f}s"):
+    st.caption("Segundos desde o início do processo. A página do chat registra os "
+               "marcos na 1ª execução; reinicie o servidor para medir de novo.")
+    st.dataframe(pd.Series(ini["marks"], name="s").to_frame(), use_container_width=True)
+    if ini["packages"]:
+        c1, c2 = st.columns(2)
+        c1.caption("Tempo de import por pacote (próprio, ms)")
+        c1.dataframe(pd.DataFrame(ini["packages"]).set_index("package").head(25),
+                     use_container_width=True)
+        c2.caption("Módulos mais lentos (acumulado, ms)")
+        c2.dataframe(pd.DataFrame(ini["modules"]).set_index("module").round(1),
+                     use_container_width=True)
+    else:
+        st.caption("Imports não cronometrados: defina `CHAT_PRONAF_STARTUP_PROFILE=1` "
+                   "e reinicie o servidor.")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Versão dos dados deste processo (core/data_versions.py, core/hot_swap.py)
+# ─────────────────────────────────────────────────────────────────────────────
+versao = active_version()
+with st.expander(f"🗂️ Dados · versão {versao.name}"):
+    st.caption(
+        f"Publicada: {versao.manifest.get('created_at', '-')} · origem: "
+        f"{versao.manifest.get('source') or '-'} · CURRENT: {read_current() or '(sem versões)'} · "
+        f"publicadas: {', '.join(list_versions()) or '-'} · verificação a cada "
+        + (f"{DATA_POLL_S:g}s" if DATA_POLL_S > 0 else "— (CHAT_PRONAF_DATA_POLL_S=0)")
+    )
+    trocas = swap_history()
+    if trocas:
+        st.dataframe(
+            pd.DataFrame(trocas)[["old", "new", "ok", "prepare_s", "swap_ms", "invalidate_ms",
+                                  "rss_before_mb", "overlap_mb", "released_mb", "prepared", "error"]],
+            use_container_width=True, hide_index=True,
+        )
+    else:
+        st.caption("Nenhuma troca de versão neste processo.")
+
+df = _spans(TRACE_PATH, int(max_traces)) if TRACE_PATH else pd.DataFrame()
+if not df.empty and janela_h:
+    df = df[df["start"] >= time.time() - janela_h * 3600]
+
+if df.empty:
+    st.info("Nenhum trace no período. Os turnos do chat são gravados em "
+            "`CHAT_PRONAF_TRACE_PATH` (vazio desliga).")
+    st.stop()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Percentis por etapa
+# ─────────────────────────────────────────────────────────────────────────────
+turnos = df[df["name"] == "turn"]
+n_turnos = turnos["trace_id"].nunique()
+st.caption(f"{n_turnos} turnos · {len(df)} spans")
+
+agg = (
+    df.groupby("name")["duration_ms"]
+      .agg(n="count",
+           p50=lambda s: s.quantile(0.50),
+           p95=lambda s: s.quantile(0.95),
+           p99=lambda s: s.quantile(0.99),
+           max="max",
+           total="sum")
+)
+agg["erros"] = df.groupby("name")["error"].sum()
+# fração do tempo de turno gasta na etapa (tools rodam em paralelo → pode passar de 100%)
+agg["% do turno"] = 100 * agg["total"] / max(turnos["duration_ms"].sum(), 1e-9)
+ordem = [e for e in ETAPAS if e in agg.index] + sorted(set(agg.index) - set(ETAPAS))
+agg = agg.loc[ordem].drop(columns="total")
+
+st.dataframe(agg.style.format({
+    "p50": "{:.1f}", "p95": "{:.1f}", "p99": "{:.1f}", "max": "{:.1f}", "% do turno": "{:.1f}",
+}), use_container_width=True)
+
+longo = agg[["p50", "p95", "p99"]].reset_index().melt(
+    id_vars="name", var_name="percentil", value_name="ms")
+fig = px.bar(longo, x="name", y="ms", color="percentil", barmode="group",
+             labels={"name": "etapa", "ms": "ms"})
+st.plotly_chart(fig, use_container_width=True)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Detalhes: TTFT, tools e turnos mais lentos
+# ─────────────────────────────────────────────────────────────────────────────
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("Tools")
+    tools = df[df["name"] == "tool"]
+    if tools.empty:
+        st.caption("Nenhuma tool executada no período.")
+    else:
+        cols = ["attr.tool"] + (["attr.cache_hit"] if "attr.cache_hit" in tools else [])
+        st.dataframe(
+            tools.groupby(cols, dropna=False)["duration_ms"]
+                 .describe(percentiles=[0.5, 0.95, 0.99])[["count", "50%", "95%", "99%"]]
+                 .round(1),
+            use_container_width=True,
+        )
+
+with col2:
+    st.subheader("LLM")
+    llm = df[df["name"].str.startswith("llm.")]
+    if llm.empty:
+        st.caption("Nenhuma chamada à LLM no período.")
+    else:
+        medidas = [c for c in ("duration_ms", "attr.queue_wait_ms", "attr.ttft_ms",
+                               "attr.prompt_tokens", "attr.completion_tokens",
+                               "attr.attempts") if c in llm]
+        st.dataframe(llm.groupby("name")[medidas].median().round(1), use_container_width=True)
+
+st.subheader("Turnos mais lentos")
+etapas = df[df["name"] != "turn"].pivot_table(
+    index="trace_id", columns="name", values="duration_ms", aggfunc="sum")
+lentos = turnos.nlargest(20, "duration_ms").set_index("trace_id")
+colunas = [c for c in ("duration_ms", "attr.cache_hit", "attr.routed", "attr.ttft_ms") if c in lentos]
+lentos = lentos[colunas].join(etapas, how="left")
+lentos.insert(0, "início", pd.to_datetime(turnos.set_index("trace_id")["start"], unit="s"))
+st.dataframe(lentos.round(1), use_container_width=True)
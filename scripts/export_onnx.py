@@ -0,0 +1,93 @@
+"""
+Exporta o modelo de embeddings do RAG para ONNX e quantiza em int8.
+
+Gera o diretório lido por :class:`core.embeddings.OnnxEmbeddings`
+(``CHAT_PRONAF_EMBED_BACKEND=onnx``):
+
+- ``model.onnx`` (FP32, opcional) e ``model.int8.onnx`` (quantização
+  dinâmica dos pesos, ``QInt8``);
+- ``tokenizer.json`` (tokenizer *fast*, lido pela lib ``tokenizers``);
+- ``embed_config.json`` (arquivo ONNX em uso, ``max_length``, pooling).
+
+Só o transformer é exportado; mean pooling e normalização L2 — os módulos
+seguintes do *sentence-transformer* — ficam em NumPy.
+
+Uso (na raiz do projeto)::
+
+    python -m scripts.export_onnx [--model sentence-transformers/all-mpnet-base-v2]
+        [--out data/models/all-mpnet-base-v2-int8] [--keep-fp32] [--no-quantize]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from core.embeddings import ONNX_DIR
+from core.rag_engine import EMBED_MODEL
+
+MAX_LENGTH = 384          # max_seq_length do all-mpnet-base-v2
+OPSET      = 17
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Exporta o modelo de embeddings para ONNX (int8).")
+    ap.add_argument("--model", default=EMBED_MODEL)
+    ap.add_argument("--out", default=ONNX_DIR)
+    ap.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    ap.add_argument("--keep-fp32", action="store_true", help="mantém o model.onnx FP32")
+    ap.add_argument("--no-quantize", action="store_true", help="usa o FP32 no backend")
+    args = ap.parse_args()
+
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(args.out, exist_ok=True)
+    t0 = time.perf_counter()
+    tok = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModel.from_pretrained(args.model).eval()
+    tok.save_pretrained(args.out)                      # inclui tokenizer.json
+
+    fp32 = os.path.join(args.out, "model.onnx")
+    amostra = tok(["exportação do modelo"], return_tensors="pt")
+    eixos = {0: "lote", 1: "seq"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (amostra["input_ids"], amostra["attention_mask"]),
+            fp32,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": eixos, "attention_mask": eixos, "last_hidden_state": eixos},
+            opset_version=OPSET,
+        )
+    t_export = time.perf_counter() - t0
+
+    arquivo = "model.onnx"
+    if not args.no_quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        arquivo = "model.int8.onnx"
+        quantize_dynamic(fp32, os.path.join(args.out, arquivo), weight_type=QuantType.QInt8)
+        if not args.keep_fp32:
+            os.remove(fp32)
+
+    with open(os.path.join(args.out, "embed_config.json"), "w", encoding="utf-8") as fh:
+        json.dump({
+            "model": args.model,
+            "onnx_file": arquivo,
+            "max_length": args.max_length,
+            "pad_token": tok.pad_token,
+            "pooling": "mean",
+            "normalize": True,
+            "quantized": not args.no_quantize,
+        }, fh, indent=1)
+
+    tam = os.path.getsize(os.path.join(args.out, arquivo)) / 2**20
+    print(f"exportado em {t_export:.1f}s → {args.out}/{arquivo} ({tam:.0f} MB)")
+    print("use com: CHAT_PRONAF_EMBED_BACKEND=onnx"
+          + (f" CHAT_PRONAF_ONNX_DIR={args.out}" if args.out != ONNX_DIR else ""))
+
+
+if __name__ == "__main__":
+    main()
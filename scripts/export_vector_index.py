@@ -0,0 +1,64 @@
+"""
+Exporta a coleção do Chroma para o índice NumPy de ``core/vector_index.py``.
+
+Lê ids, vetores, textos e metadados do ``persist_directory`` (sem recalcular
+embeddings) e grava o diretório aberto por :class:`core.vector_index.NumpyVectorIndex`
+(``CHAT_PRONAF_VECTOR_STORE=numpy``). Rode de novo após cada
+``python -m scripts.ingest_mcr``.
+
+Uso (na raiz do projeto)::
+
+    python -m scripts.export_vector_index [--dtype int8|float16|float32]
+        [--persist-dir data/data-rag/persist_directory] [--out data/data-rag/vector_index]
+"""
+
+from utils.sqlite_patch import patch_sqlite
+patch_sqlite()                      # antes de qualquer import do Chroma
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from core.data_loader import dir_fingerprint
+from core.rag_engine import PERSIST_DIR
+from core.vector_index import DTYPES, INDEX_DIR, NumpyVectorIndex, export_index
+from scripts.ingest_mcr import COLLECTION
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Exporta a coleção do Chroma para o índice NumPy.")
+    ap.add_argument("--persist-dir", default=PERSIST_DIR)
+    ap.add_argument("--out", default=INDEX_DIR)
+    ap.add_argument("--dtype", choices=DTYPES, default="int8")
+    args = ap.parse_args()
+
+    import chromadb
+
+    t0 = time.perf_counter()
+    col = chromadb.PersistentClient(path=args.persist_dir).get_collection(COLLECTION)
+    dados = col.get(include=["embeddings", "documents", "metadatas"])
+    vetores = np.asarray(dados["embeddings"], dtype=np.float32)
+    t_leitura = time.perf_counter() - t0
+
+    meta = export_index(
+        dados["ids"], vetores, dados["documents"], dados["metadatas"], args.out,
+        dtype=args.dtype, source_version=dir_fingerprint(args.persist_dir),
+    )
+    tam = sum(os.path.getsize(os.path.join(args.out, f)) for f in os.listdir(args.out)) / 2**20
+    print(f"{meta['count']} chunks × {meta['dim']} dim ({meta['dtype']}) → {args.out} "
+          f"({tam:.1f} MB; float32 seria {vetores.nbytes / 2**20:.1f} MB só nos vetores)")
+
+    # conferência: o vizinho mais próximo de cada vetor amostrado é ele mesmo
+    idx = NumpyVectorIndex(args.out)
+    amostra = np.arange(0, len(vetores), max(1, len(vetores) // 200))
+    pos, _ = idx.search(vetores[amostra], 1)
+    acerto = float(np.mean(pos[:, 0] == amostra))
+    print(f"leitura do Chroma {t_leitura:.1f}s · auto-recuperação top-1: {acerto:.1%}")
+    print("use com: CHAT_PRONAF_VECTOR_STORE=numpy"
+          + (f" CHAT_PRONAF_VECTOR_INDEX={args.out}" if args.out != INDEX_DIR else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Ingestão incremental do Manual de Crédito Rural (MCR) no Chroma.
+
+Substitui o passo manual de ``a_preparatorios/primeiro_rag.ipynb``:
+
+1. extrai o texto das páginas do PDF em um *pool* de processos;
+2. divide em chunks com o mesmo ``RecursiveCharacterTextSplitter(500, 100)``;
+3. identifica cada chunk pelo SHA-256 do seu texto — chunks já presentes na
+   coleção não são reembedados (só os metadados são atualizados);
+4. gera embeddings dos chunks novos em lotes grandes e grava em lote;
+5. remove da coleção os chunks que não existem mais no PDF.
+
+Uso (na raiz do projeto)::
+
+    python -m scripts.ingest_mcr data/data-rag/manual_credito_rural_AAAAMMDD.pdf
+        [--workers 4] [--batch 512] [--dry-run]
+
+Na primeira execução sobre a coleção criada pelo notebook (ids aleatórios)
+todos os chunks são reembedados e os ids antigos, removidos.
+"""
+
+from utils.sqlite_patch import patch_sqlite
+patch_sqlite()                      # antes de qualquer import do Chroma
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.rag_engine import EMBED_MODEL, PERSIST_DIR
+
+COLLECTION  = "langchain"           # nome padrão usado pelo wrapper do LangChain
+CHUNK_SIZE  = 500
+CHUNK_OVER  = 100
+
+
+# -------- Etapa 1+2: PDF → chunks (roda nos processos filhos) --------
+def _parse_range(pdf_path: str, inicio: int, fim: int) -> list[tuple[str, dict]]:
+    from pypdf import PdfReader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    leitor = PdfReader(pdf_path)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVER)
+    saida = []
+    for pagina in range(inicio, fim):
+        texto = leitor.pages[pagina].extract_text() or ""
+        for chunk in splitter.split_text(texto):
+            saida.append((chunk, {"source": pdf_path, "page": pagina}))
+    return saida
+
+
+def parse_pdf(pdf_path: str, workers: int) -> tuple[list[tuple[str, dict]], int]:
+    """Extrai e divide o PDF em paralelo; devolve (chunks, nº de páginas)."""
+    from pypdf import PdfReader
+
+    n_paginas = len(PdfReader(pdf_path).pages)
+    passo = max(1, -(-n_paginas // (workers * 4)))     # ~4 fatias por worker
+    fatias = [(i, min(i + passo, n_paginas)) for i in range(0, n_paginas, passo)]
+
+    chunks: list[tuple[str, dict]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(_parse_range, pdf_path, a, b) for a, b in fatias]
+        for fut in futuros:                              # mantém a ordem das páginas
+            chunks.extend(fut.result())
+    return chunks, n_paginas
+
+
+def chunk_id(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:32]
+
+
+def _lotes(seq: list, tamanho: int):
+    for i in range(0, len(seq), tamanho):
+        yield seq[i:i + tamanho]
+
+
+# -------- Execução --------
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Ingestão incremental do MCR no Chroma.")
+    ap.add_argument("pdf")
+    ap.add_argument("--persist-dir", default=PERSIST_DIR)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    ap.add_argument("--batch", type=int, default=512, help="chunks por lote de embedding/escrita")
+    ap.add_argument("--dry-run", action="store_true", help="só calcula o diff, não grava")
+    args = ap.parse_args()
+
+    # 1+2) parse paralelo
+    t0 = time.perf_counter()
+    brutos, n_paginas = parse_pdf(args.pdf, args.workers)
+    t_parse = time.perf_counter() - t0
+
+    novos: dict[str, tuple[str, dict]] = {}
+    for texto, meta in brutos:                           # texto repetido → 1 chunk
+        novos.setdefault(chunk_id(texto), (texto, meta))
+
+    # 3) diff contra a coleção
+    import chromadb
+    client = chromadb.PersistentClient(path=args.persist_dir)
+    col = client.get_or_create_collection(COLLECTION)
+    existentes = set(col.get(include=[])["ids"])
+
+    a_embedar = [i for i in novos if i not in existentes]
+    mantidos  = [i for i in novos if i in existentes]
+    removidos = sorted(existentes - novos.keys())
+
+    print(f"páginas: {n_paginas}  chunks: {len(novos)}  "
+          f"novos: {len(a_embedar)}  inalterados: {len(mantidos)}  removidos: {len(removidos)}")
+    print(f"parse: {t_parse:.1f}s  ({n_paginas / t_parse:.1f} páginas/s, {args.workers} processos)")
+    if args.dry_run:
+        return
+
+    lote_max = min(args.batch, client.get_max_batch_size())
+
+    # 4) embeddings + escrita em lote só do que mudou
+    t1 = time.perf_counter()
+    if a_embedar:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        emb = HuggingFaceEmbeddings(
+            model_name=EMBED_MODEL, encode_kwargs={"batch_size": 64},
+        )
+        for ids in _lotes(a_embedar, lote_max):
+            textos = [novos[i][0] for i in ids]
+            col.upsert(
+                ids=ids,
+                documents=textos,
+                embeddings=emb.embed_documents(textos),
+                metadatas=[novos[i][1] for i in ids],
+            )
+    t_embed = time.perf_counter() - t1
+
+    # metadados (ex.: nº da página) podem mudar mesmo com o texto igual
+    for ids in _lotes(mantidos, lote_max):
+        col.update(ids=ids, metadatas=[novos[i][1] for i in ids])
+
+    # 5) limpeza
+    for ids in _lotes(removidos, lote_max):
+        col.delete(ids=ids)
+
+    taxa = len(a_embedar) / t_embed if t_embed > 0 else 0.0
+    print(f"embedding+escrita: {t_embed:.1f}s  ({taxa:.1f} chunks/s)")
+    print(f"total: {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
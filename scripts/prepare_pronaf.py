@@ -0,0 +1,156 @@
+"""
+Regrava ``data/pronaf.parquet`` ordenado e particionado por UF × ANO.
+
+Substitui o ``df_tratado.to_parquet(...)`` de ``a_preparatorios/data_preper.ipynb``,
+que grava as linhas em ordem arbitrária — com isso as estatísticas dos
+row groups cobrem todas as UFs e anos e nenhum filtro consegue pular nada.
+
+O arquivo gerado:
+
+1. é ordenado por ``CD_ESTADO``, ``ANO``;
+2. tem row groups que nunca misturam duas partições (UF, ANO); partições
+   grandes são quebradas em blocos de ``--row-group-size`` linhas;
+3. grava estatísticas (min/max) por coluna, codifica em dicionário as
+   colunas de baixa cardinalidade e usa o codec escolhido;
+4. vem acompanhado de ``data/pronaf.manifest.json``, que mapeia cada
+   partição para os seus row groups e carrega o fingerprint do Parquet.
+
+:func:`core.data_loader.read_pronaf` usa o manifesto para ler só os row
+groups de um filtro por UF/ano; o DuckDB aproveita as estatísticas.
+
+Uso (na raiz do projeto)::
+
+    python -m scripts.prepare_pronaf [--src data/pronaf.parquet]
+        [--out data/pronaf.parquet] [--row-group-size 131072]
+        [--compression zstd] [--level 3]
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from core.data_loader import (
+    CATEGORICAL_COLS, PARTITION_COLS, PRONAF_PATH, manifest_path, parquet_fingerprint,
+)
+
+ROW_GROUP_SIZE = 128 * 1024
+DICT_COLS = (*CATEGORICAL_COLS, "ANO")
+
+
+def _limites(tabela) -> list[tuple[int, int]]:
+    """(início, fim) de cada partição numa tabela já ordenada por PARTITION_COLS."""
+    import numpy as np
+
+    if tabela.num_rows == 0:
+        return []
+    muda = np.zeros(tabela.num_rows, dtype=bool)
+    muda[0] = True
+    for col in PARTITION_COLS:
+        v = tabela.column(col).to_pandas().to_numpy(dtype=object)
+        muda[1:] |= v[1:] != v[:-1]
+    inicios = np.flatnonzero(muda).tolist()
+    return list(zip(inicios, inicios[1:] + [tabela.num_rows]))
+
+
+def write_partitioned(
+    tabela,
+    out: str,
+    *,
+    row_group_size: int = ROW_GROUP_SIZE,
+    compression: str = "zstd",
+    level: int | None = 3,
+) -> dict:
+    """
+    Grava ``tabela`` (``pyarrow.Table``) ordenada e particionada em ``out``
+    (troca atômica) e devolve o manifesto, já gravado ao lado do arquivo.
+    """
+    import pyarrow.parquet as pq
+
+    tabela = tabela.sort_by([(c, "ascending") for c in PARTITION_COLS])
+    dict_cols = [c for c in DICT_COLS if c in tabela.column_names]
+
+    particoes = []
+    n_grupos = 0
+    tmp = out + ".tmp"
+    with pq.ParquetWriter(
+        tmp,
+        tabela.schema,
+        compression=compression,
+        compression_level=level,
+        use_dictionary=dict_cols,
+        write_statistics=True,
+    ) as writer:
+        for inicio, fim in _limites(tabela):
+            fatia = tabela.slice(inicio, fim - inicio)
+            writer.write_table(fatia, row_group_size=row_group_size)
+            n = -(-fatia.num_rows // row_group_size)
+            particoes.append({
+                **{c: fatia.column(c)[0].as_py() for c in PARTITION_COLS},
+                "rows": fatia.num_rows,
+                "row_groups": list(range(n_grupos, n_grupos + n)),
+            })
+            n_grupos += n
+    os.replace(tmp, out)
+
+    manifesto = {
+        "file": os.path.basename(out),
+        "fingerprint": parquet_fingerprint(out),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": tabela.num_rows,
+        "sort_by": list(PARTITION_COLS),
+        "row_group_size": row_group_size,
+        "num_row_groups": n_grupos,
+        "compression": compression,
+        "compression_level": level,
+        "dictionary_columns": dict_cols,
+        "partitions": particoes,
+    }
+    tmp = manifest_path(out) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifesto, fh, ensure_ascii=False, indent=1)
+    os.replace(tmp, manifest_path(out))
+    return manifesto
+
+
+# -------- Execução --------
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Regrava o Parquet do PRONAF ordenado e particionado.")
+    ap.add_argument("--src", default=PRONAF_PATH, help="Parquet tratado (saída do notebook)")
+    ap.add_argument("--out", default=PRONAF_PATH)
+    ap.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    ap.add_argument("--compression", default="zstd", choices=["zstd", "snappy", "gzip", "brotli", "lz4", "none"])
+    ap.add_argument("--level", type=int, default=3, help="nível do codec (zstd/gzip/brotli)")
+    args = ap.parse_args()
+
+    import pyarrow.parquet as pq
+
+    t0 = time.perf_counter()
+    tam_antes = os.path.getsize(args.src)
+    grupos_antes = pq.ParquetFile(args.src).metadata.num_row_groups
+    tabela = pq.read_table(args.src)
+    t_leitura = time.perf_counter() - t0
+
+    nivel = args.level if args.compression in ("zstd", "gzip", "brotli") else None
+    t1 = time.perf_counter()
+    man = write_partitioned(
+        tabela, args.out,
+        row_group_size=args.row_group_size,
+        compression=args.compression,
+        level=nivel,
+    )
+    t_escrita = time.perf_counter() - t1
+
+    maior = max((p["rows"] for p in man["partitions"]), default=0)
+    print(f"linhas: {man['rows']:,}  partições UF×ANO: {len(man['partitions'])}  "
+          f"(maior: {maior:,} linhas)")
+    print(f"row groups: {grupos_antes} → {man['num_row_groups']}  "
+          f"tamanho: {tam_antes / 2**20:.1f} MB → {os.path.getsize(args.out) / 2**20:.1f} MB "
+          f"({args.compression})")
+    print(f"leitura: {t_leitura:.1f}s  escrita: {t_escrita:.1f}s  "
+          f"manifesto: {manifest_path(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Publica uma versão dos dados em ``data/versions/<nome>`` (ver ``core/data_versions.py``).
+
+Copia o Parquet do PRONAF (com o manifesto de partições e o cubo, se
+existirem), a coleção do Chroma e, se houver, o índice NumPy e o BM25 para
+um diretório novo, grava o ``manifest.json`` e, com ``--activate``, aponta
+``CURRENT`` para ele. Os processos em execução trocam de versão sozinhos
+(``CHAT_PRONAF_DATA_POLL_S`` > 0, ``core/hot_swap.py``), sem reinício.
+
+O diretório é montado com outro nome e renomeado no fim: uma versão
+pela metade nunca aparece em ``data/versions/``.
+
+Uso (na raiz do projeto)::
+
+    python -m scripts.publish_data_version 2026-10 --source "SICOR 2026-09 / MCR 2026-10"
+        [--parquet data/pronaf.parquet] [--persist-dir data/data-rag/persist_directory]
+        [--vector-index data/data-rag/vector_index] [--link] [--activate]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+from core.data_loader import PRONAF_PATH, dir_fingerprint, manifest_path, parquet_fingerprint
+from core.data_versions import MANIFEST, VERSIONS_DIR, list_versions, read_current, write_current
+from core.pronaf_cube import cube_path
+from core.rag_engine import BM25_PATH, PERSIST_DIR
+from core.vector_index import INDEX_DIR
+
+PARQUET = "pronaf.parquet"
+
+
+def _copiar(src: str, dst: str, link: bool) -> None:
+    if link:
+        try:
+            os.link(src, dst)                        # mesmo FS: sem cópia, mtime preservado
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)                           # copy2 preserva o mtime (fingerprints)
+
+
+def publish(
+    name: str,
+    *,
+    parquet: str,
+    persist_dir: str,
+    vector_index: str | None,
+    bm25: str | None,
+    source: str,
+    link: bool,
+) -> dict:
+    destino = os.path.join(VERSIONS_DIR, name)
+    if os.path.exists(destino):
+        raise SystemExit(f"versão {name!r} já existe em {destino}")
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    tmp = os.path.join(VERSIONS_DIR, f".{name}.{os.getpid()}.tmp")
+    os.makedirs(tmp)
+
+    try:
+        alvo = os.path.join(tmp, PARQUET)
+        _copiar(parquet, alvo, link)
+        for lateral, dst in ((manifest_path(parquet), manifest_path(alvo)),
+                             (cube_path(parquet), cube_path(alvo))):
+            if os.path.exists(lateral):
+                _copiar(lateral, dst, link)
+
+        # Chroma sempre copiado: o cliente escreve no SQLite ao abrir
+        shutil.copytree(persist_dir, os.path.join(tmp, "persist_directory"))
+        if vector_index and os.path.isdir(vector_index):
+            shutil.copytree(vector_index, os.path.join(tmp, "vector_index"),
+                            copy_function=lambda s, d: _copiar(s, d, link))
+        if bm25 and os.path.exists(bm25):
+            shutil.copy2(bm25, os.path.join(tmp, "bm25_index.pkl"))   # refeito se não servir
+
+        import pyarrow.parquet as pq
+
+        manifesto = {
+            "version": name,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source": source,
+            "parquet": PARQUET,
+            "parquet_sha256": parquet_fingerprint(alvo).split("-", 1)[1],
+            "rows": pq.ParquetFile(alvo).metadata.num_rows,
+            "persist_dir": "persist_directory",
+            "persist_fingerprint": dir_fingerprint(os.path.join(tmp, "persist_directory")),
+            "vector_index": "vector_index" if os.path.isdir(os.path.join(tmp, "vector_index")) else None,
+        }
+        with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as fh:
+            json.dump(manifesto, fh, ensure_ascii=False, indent=1)
+        os.rename(tmp, destino)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return manifesto
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Publica uma versão dos dados em data/versions/.")
+    ap.add_argument("name", help="nome da versão (ex.: 2026-10)")
+    ap.add_argument("--parquet", default=PRONAF_PATH)
+    ap.add_argument("--persist-dir", default=PERSIST_DIR)
+    ap.add_argument("--vector-index", default=INDEX_DIR, help="copiado se existir")
+    ap.add_argument("--bm25", default=BM25_PATH, help="copiado se existir (refeito se não servir)")
+    ap.add_argument("--source", default="", help="origem dos dados (extração do BCB, edição do MCR)")
+    ap.add_argument("--link", action="store_true",
+                    help="hardlink em vez de cópia para Parquet e índice NumPy (somente leitura)")
+    ap.add_argument("--activate", action="store_true", help="aponta CURRENT para a nova versão")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    man = publish(
+        args.name, parquet=args.parquet, persist_dir=args.persist_dir,
+        vector_index=args.vector_index, bm25=args.bm25, source=args.source, link=args.link,
+    )
+    print(f"versão {args.name}: {man['rows']:,} linhas, Parquet {man['parquet_sha256']}, "
+          f"índice NumPy {'sim' if man['vector_index'] else 'não'} ({time.perf_counter() - t0:.1f}s)")
+    if args.activate:
+        write_current(args.name)
+    print(f"ativa: {read_current() or '(layout sem versões)'} · publicadas: {', '.join(list_versions())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Filtro por sexo em ``consulta_pronaf`` nos três executores (cubo, colunar, DuckDB).
+
+A base grava ``SEXO_BIOLOGICO`` como "Feminino"/"Masculino"; a LLM e o
+roteador costumam mandar "FEMININO". A consulta precisa achar as linhas nos
+três caminhos — e dar o mesmo número que o pandas direto sobre o Parquet.
+
+Rodar (na raiz do projeto)::
+
+    python -m pytest -q tests
+"""
+
+import pandas as pd
+import pytest
+
+from core import query_engine
+from core.data_versions import DataVersion, set_active
+from core.query_engine import QueryError, parse_query
+
+
+@pytest.fixture
+def base(tmp_path):
+    linhas = []
+    for i in range(240):
+        linhas.append({
+            "CD_ESTADO": ["MG", "RS", "SP"][i % 3],
+            "VL_PARC_CREDITO": 1000.0 + 10 * i,
+            "ANO": 2024 + i % 2,
+            "SAFRA": "2024/2025" if i % 4 < 2 else "2025/2026",
+            "CD_CPF_CNPJ": f"{i % 97:011d}",
+            "SEXO_BIOLOGICO": ["Feminino", "Masculino", "Não se aplica"][i % 5 % 3],
+        })
+    df = pd.DataFrame(linhas)
+    path = str(tmp_path / "pronaf.parquet")
+    df.to_parquet(path, index=False)
+
+    anterior = set_active(DataVersion("teste", path, str(tmp_path), str(tmp_path), str(tmp_path / "bm25.pkl")))
+    yield df
+    set_active(anterior)
+
+
+def _esperado(df: pd.DataFrame) -> tuple[float, int]:
+    sel = df[(df.CD_ESTADO == "MG") & (df.ANO == 2025) & (df.SEXO_BIOLOGICO == "Feminino")]
+    return float(sel.VL_PARC_CREDITO.sum()), int(sel.CD_CPF_CNPJ.nunique())
+
+
+@pytest.mark.parametrize("executor", ["cubo", "colunar", "duckdb"])
+@pytest.mark.parametrize("sexo", ["FEMININO", "feminino", "Feminino"])
+def test_filtro_por_sexo_nos_tres_executores(base, monkeypatch, executor, sexo):
+    if executor == "duckdb":
+        pytest.importorskip("duckdb")
+        monkeypatch.setattr(query_engine, "PRONAF_BACKEND", "duckdb")
+    spec = parse_query({
+        "medidas": ["credito_total", "beneficiarios"],
+        "filtros": {"ufs": ["MG"], "ano_min": 2025, "ano_max": 2025, "sexos": [sexo]},
+    })
+    assert spec.sexos == ["Feminino"]
+
+    res = query_engine._EXECUTORES[executor](spec)
+    credito, beneficiarios = _esperado(base)
+    assert beneficiarios > 0
+    assert res["beneficiarios"].iloc[0] == beneficiarios
+    assert res["credito_total"].iloc[0] == pytest.approx(credito)
+
+
+def test_sexo_desconhecido_vira_erro_de_consulta(base):
+    with pytest.raises(QueryError, match="Feminino"):
+        parse_query({"medidas": ["operacoes"], "filtros": {"sexos": ["OUTRO"]}})